@@ -34,6 +34,10 @@ SECRET_KEY = os.environ.get(
 
 DEBUG = os.environ.get('DEBUG', 'False') == 'True'
 
+# Vercel freezes a function once it has responded, so background worker
+# threads never get to run there; the cron jobs in vercel.json do their work
+SERVERLESS = bool(os.environ.get('VERCEL'))
+
 ALLOWED_HOSTS = _split_env_list(
     'ALLOWED_HOSTS',
     'localhost,127.0.0.1,.vercel.app,.now.sh'
@@ -62,7 +66,7 @@ INSTALLED_APPS = [
 # ─── Middleware ───────────────────────────────────────────────
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'hub.middleware.AsyncWhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -113,6 +117,9 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # A file rather than shared-cache memory, whose table locks fail instead of wait,
+            # so the concurrency tests see the same locking as the real database
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
 
@@ -135,6 +142,9 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Optional CDN origin for uploaded media, e.g. https://cdn.example.com/media
+MEDIA_CDN_BASE_URL = os.environ.get('MEDIA_CDN_BASE_URL', '')
+MEDIA_SRCSET_WIDTHS = (320, 640, 1024)
 
 STORAGES = {
     "default": {
@@ -206,11 +216,39 @@ CORS_ALLOWED_ORIGIN_REGEXES = [
 CORS_ALLOW_CREDENTIALS = True
 
 # ─── Cache ────────────────────────────────────────────────────
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Counters adjusted in place (platform stats, unread counts) need one cache
+# shared by every worker; without CACHE_URL each process keeps its own and
+# recounts them every LOCAL_COUNTER_TIMEOUT seconds instead
+CACHE_URL = os.environ.get('CACHE_URL', os.environ.get('REDIS_URL', ''))
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+LOCAL_COUNTER_TIMEOUT = 30  # seconds
+
+# ─── Chatbot Transcripts ──────────────────────────────────────
+# Chat turns are buffered and bulk-inserted off the request path
+CHAT_TRANSCRIPT_BACKGROUND = os.environ.get('CHAT_TRANSCRIPT_BACKGROUND', str(not SERVERLESS)) == 'True'
+CHAT_TRANSCRIPT_BATCH_SIZE = 50
+CHAT_TRANSCRIPT_FLUSH_INTERVAL = 2.0  # seconds
+CHAT_TRANSCRIPT_MAX_BUFFER = 5000  # unsaved turns kept while the database is failing
+CHAT_ARCHIVE_DIR = BASE_DIR / 'chat_archive'
+
+# ─── Real-time Events ─────────────────────────────────────────
+# Redis URL for cross-worker pub/sub; empty uses the in-process bus (single worker only)
+EVENT_BUS_URL = os.environ.get('EVENT_BUS_URL', os.environ.get('REDIS_URL', ''))
+# Streams are only served under ASGI (EduCycle/asgi.py); WSGI answers 204 and pages poll
+EVENT_STREAM_MAX_SECONDS = 300
+EVENT_STREAM_RETRY_MS = 5000
 
 # ─── Security Headers ─────────────────────────────────────────
 SECURE_BROWSER_XSS_FILTER = True
@@ -225,9 +263,87 @@ LOGIN_URL = '/login/'
 # ─── Email (console for now) ──────────────────────────────────
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# ─── Notifications ────────────────────────────────────────────
+# Repeats of an unread message notification (user, type, item) are folded into
+# one row; the repeats are emailed as a digest once this window has passed
+NOTIFICATION_COALESCE_WINDOW = 15 * 60  # seconds
+# Read notifications older than this (days, per type) move to NotificationArchive
+NOTIFICATION_RETENTION_DAYS = {
+    'default': 90,
+    'item_added': 30,
+    'message_received': 30,
+}
+NOTIFICATION_ARCHIVE_DAYS = 2 * 365  # archived rows are purged after this
+
+# ─── Messaging ────────────────────────────────────────────────
+# Message notifications are queued with the message and sent by a background
+# worker; off on serverless hosts, where deliver_messages runs from cron instead
+MESSAGE_DELIVERY_BACKGROUND = os.environ.get('MESSAGE_DELIVERY_BACKGROUND', str(not SERVERLESS)) == 'True'
+MESSAGE_DELIVERY_MAX_ATTEMPTS = 5
+MESSAGE_DELIVERY_CLAIM_TIMEOUT = 5 * 60  # seconds before a dead worker's batch is retried
+# Immediate message emails per receiver per window; the rest go out with the digests
+MESSAGE_EMAIL_RATE_LIMIT = 5
+MESSAGE_EMAIL_RATE_WINDOW = 15 * 60  # seconds
+
+# ─── Scheduled Jobs ───────────────────────────────────────────
+# Vercel Cron calls /api/cron/<job>/ with this as a bearer token (see vercel.json)
+CRON_SECRET = os.environ.get('CRON_SECRET', '')
+
+# ─── Swap Matching ────────────────────────────────────────────
+# Longest multi-party swap suggested (2 = direct swaps only), and how many
+# suggestions are kept per listing change
+SWAP_MAX_CYCLE_LENGTH = 4
+SWAP_MAX_CYCLES_PER_ITEM = 20
+
 # ─── Payments ─────────────────────────────────────────────────
+# Checkout options in display order; 'path' names the provider plugin, which is
+# imported on first use (entries without one are listed but not selectable)
+PAYMENT_PROVIDERS = {
+    'stripe': {
+        'path': 'hub.providers.stripe.StripeProvider',
+        'name': 'Credit/Debit Card',
+        'icon': 'fas fa-credit-card',
+        'description': 'Pay securely with your card',
+    },
+    'razorpay': {
+        'path': 'hub.providers.razorpay.RazorpayProvider',
+        'name': 'UPI & Digital Wallets',
+        'icon': 'fas fa-mobile-alt',
+        'description': 'Pay with UPI, PayTM, Google Pay',
+    },
+    # Shown at checkout as coming soon; no provider until the integration lands
+    'paypal': {
+        'name': 'PayPal',
+        'icon': 'fab fa-paypal',
+        'description': 'Pay with PayPal account',
+        'enabled': False,
+    },
+    'cod': {
+        'path': 'hub.providers.cod.CashOnDeliveryProvider',
+        'name': 'Cash on Delivery',
+        'icon': 'fas fa-money-bill-wave',
+        'description': 'Pay when you receive the item',
+    },
+}
 STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY', '')
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', '')
 STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', '')
 RAZORPAY_KEY_ID = os.environ.get('RAZORPAY_KEY_ID', '')
 RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET', '')
+RAZORPAY_WEBHOOK_SECRET = os.environ.get('RAZORPAY_WEBHOOK_SECRET', '')
+# Webhooks are acknowledged after one INSERT and handled by a background worker;
+# off on serverless hosts, where process_webhook_events runs from cron instead
+WEBHOOK_BACKGROUND = os.environ.get('WEBHOOK_BACKGROUND', str(not SERVERLESS)) == 'True'
+WEBHOOK_MAX_ATTEMPTS = 5
+# Outbound provider calls: pooled connections, strict timeouts, and a circuit
+# breaker that fails fast for PAYMENT_CIRCUIT_RESET seconds after repeated errors
+STRIPE_API_BASE = os.environ.get('STRIPE_API_BASE', 'https://api.stripe.com')
+RAZORPAY_API_BASE = os.environ.get('RAZORPAY_API_BASE', 'https://api.razorpay.com')
+PAYMENT_GATEWAY_CONNECT_TIMEOUT = 3.05  # seconds
+PAYMENT_GATEWAY_READ_TIMEOUT = 10
+PAYMENT_GATEWAY_POOL_SIZE = 10
+PAYMENT_CIRCUIT_FAILURES = 5
+PAYMENT_CIRCUIT_RESET = 30
+# reconcile_payments: parallel provider lookups, capped well under provider API limits
+PAYMENT_RECONCILE_CONCURRENCY = 8
+PAYMENT_RECONCILE_RATE = 20  # requests per second
@@ -1,8 +1,8 @@
 from django.contrib import admin
 from .models import (
-    UserProfile, Item, Message, Cart, CartItem,
+    UserProfile, Item, Conversation, Message, Cart, CartItem,
     Order, OrderItem, Payment, Notification, Review, ChatMessage,
-    SwapProposal, Watchlist, Report, CollegeDomain, ItemView, MeetupPoint
+    SwapProposal, Watchlist, SavedSearch, Report, CollegeDomain, ItemView, MeetupPoint
 )
 
 @admin.register(UserProfile)
@@ -18,6 +18,12 @@ class ItemAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description', 'seller__username']
     ordering = ['-created_at']
 
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ['item', 'buyer', 'seller', 'last_message_at', 'buyer_unread', 'seller_unread']
+    search_fields = ['item__name', 'buyer__username', 'seller__username']
+    raw_id_fields = ['last_message']
+
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
     list_display = ['sender', 'receiver', 'item', 'timestamp']
@@ -74,6 +80,12 @@ class WatchlistAdmin(admin.ModelAdmin):
     list_display = ['user', 'item', 'price_threshold', 'created_at']
     search_fields = ['user__username', 'item__name']
 
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ['user', 'name', 'query', 'category', 'min_price', 'max_price', 'is_active', 'created_at']
+    list_filter = ['is_active', 'category']
+    search_fields = ['user__username', 'name', 'query']
+
 @admin.register(Report)
 class ReportAdmin(admin.ModelAdmin):
     list_display = ['reporter', 'item', 'reason', 'status', 'created_at']
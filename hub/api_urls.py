@@ -6,21 +6,24 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 from .api_views import (
-    ItemViewSet, MessageViewSet, CartViewSet,
+    ItemViewSet, MessageViewSet, ConversationViewSet, CartViewSet,
     OrderViewSet, UserViewSet, SwapProposalViewSet,
-    WatchlistViewSet, ReportViewSet, NotificationViewSet,
+    WatchlistViewSet, SavedSearchViewSet, ReportViewSet, NotificationViewSet,
     ReviewViewSet, MeetupPointViewSet,
-    SellerAnalyticsView, AIPriceSuggesterView,
+    SellerAnalyticsView, AIPriceSuggesterView, PlatformStatsView,
+    notification_unread_count, event_stream, cron_job,
 )
 
 router = DefaultRouter()
 router.register(r'items', ItemViewSet, basename='item')
 router.register(r'messages', MessageViewSet, basename='message')
+router.register(r'conversations', ConversationViewSet, basename='conversation')
 router.register(r'carts', CartViewSet, basename='cart')
 router.register(r'orders', OrderViewSet, basename='order')
 router.register(r'users', UserViewSet, basename='user')
 router.register(r'swaps', SwapProposalViewSet, basename='swap')
 router.register(r'watchlist', WatchlistViewSet, basename='watchlist')
+router.register(r'saved-searches', SavedSearchViewSet, basename='savedsearch')
 router.register(r'reports', ReportViewSet, basename='report')
 router.register(r'notifications', NotificationViewSet, basename='notification')
 router.register(r'reviews', ReviewViewSet, basename='review')
@@ -32,6 +35,11 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('token/verify/', TokenVerifyView.as_view(), name='token_verify'),
 
+    # Async endpoints (must precede the router, whose detail routes would swallow them)
+    path('notifications/unread-count/', notification_unread_count, name='api_unread_count'),
+    path('events/', event_stream, name='api_event_stream'),
+    path('cron/<slug:job>/', cron_job, name='api_cron_job'),
+
     # Router URLs
     path('', include(router.urls)),
 
@@ -45,14 +53,15 @@ urlpatterns = [
     path('cart/checkout/', CartViewSet.as_view({'post': 'checkout'}), name='api_checkout'),
     path('messages/received/', MessageViewSet.as_view({'get': 'received'}), name='api_messages_received'),
     path('messages/sent/', MessageViewSet.as_view({'get': 'sent'}), name='api_messages_sent'),
-    path('notifications/unread-count/', NotificationViewSet.as_view({'get': 'unread_count'}), name='api_unread_count'),
     path('notifications/mark-all-read/', NotificationViewSet.as_view({'post': 'mark_all_read'}), name='api_mark_all_read'),
     path('orders/sold/', OrderViewSet.as_view({'get': 'sold'}), name='api_orders_sold'),
     path('swaps/received/', SwapProposalViewSet.as_view({'get': 'received'}), name='api_swaps_received'),
     path('swaps/sent/', SwapProposalViewSet.as_view({'get': 'sent'}), name='api_swaps_sent'),
+    path('swaps/suggestions/', SwapProposalViewSet.as_view({'get': 'suggestions'}), name='api_swap_suggestions'),
     path('watchlist/toggle/', WatchlistViewSet.as_view({'post': 'toggle'}), name='api_watchlist_toggle'),
 
     # Analytics & AI
     path('analytics/seller/', SellerAnalyticsView.as_view(), name='api_seller_analytics'),
     path('ai/suggest-price/', AIPriceSuggesterView.as_view(), name='api_suggest_price'),
+    path('stats/platform/', PlatformStatsView.as_view(), name='api_platform_stats'),
 ]
@@ -3,29 +3,55 @@ from rest_framework.decorators import action, api_view, permission_classes as pe
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny
 from rest_framework.views import APIView
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.pagination import CursorPagination
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Avg, Count
+from django.db.models import Q, Avg, Count, Prefetch
 from django.contrib.auth.models import User
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_GET
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.core.management import call_command
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from .models import (
     Item, Message, Cart, CartItem, Order, OrderItem,
     SwapProposal, Watchlist, Report, Notification, Review,
-    CollegeDomain, MeetupPoint, ItemView, UserProfile
+    CollegeDomain, MeetupPoint, ItemView, UserProfile, SavedSearch,
+    SwapCycle, SwapCycleMember
 )
 from .serializers import (
     UserSerializer, ItemSerializer, ItemCreateSerializer, MessageSerializer,
     CartSerializer, CartItemSerializer, OrderSerializer, SearchSerializer,
     UserProfileSerializer, SwapProposalSerializer, WatchlistSerializer,
     ReportSerializer, NotificationSerializer, ReviewSerializer,
-    CollegeDomainSerializer, MeetupPointSerializer
+    CollegeDomainSerializer, MeetupPointSerializer, SavedSearchSerializer,
+    SwapCycleSerializer, SwapProposalSummarySerializer, ConversationSerializer,
+    ConversationMessageSerializer
 )
+from .media import MediaURLResolver
+from .messaging import inbox, mark_read, send_message
+from .services import CheckoutService, NotificationService, PlatformStatsService, SwapError, SwapService, UnreadCountService
+from .events import get_broker, format_sse, sse_stream
+import hmac
+import io
 import os
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Jobs Vercel Cron may trigger over HTTP (see vercel.json) -> management command
+CRON_JOBS = {
+    'deliver-messages': 'deliver_messages',
+    'process-webhook-events': 'process_webhook_events',
+    'send-digests': 'send_notification_digests',
+}
+
 
 class ItemViewSet(viewsets.ModelViewSet):
     serializer_class = ItemSerializer
@@ -86,12 +112,9 @@ class ItemViewSet(viewsets.ModelViewSet):
         content = request.data.get('content')
         if not content:
             return Response({'error': 'Message content is required'}, status=status.HTTP_400_BAD_REQUEST)
-        message = Message.objects.create(
-            sender=request.user,
-            receiver=item.seller,
-            item=item,
-            content=content
-        )
+        if item.seller_id == request.user.pk:
+            return Response({'error': 'You cannot message yourself'}, status=status.HTTP_400_BAD_REQUEST)
+        message = send_message(request.user, item, content)
         return Response(MessageSerializer(message).data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'])
@@ -149,8 +172,37 @@ class MessageViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def unread_notifications_count(self, request):
-        count = Notification.objects.filter(user=request.user, is_read=False).count()
-        return Response({'count': count})
+        return Response({'count': UnreadCountService.get(request.user.pk)})
+
+
+class ThreadPagination(CursorPagination):
+    """Keyset pages over (conversation, id), newest first"""
+    page_size = 30
+    ordering = '-id'
+
+
+class ConversationViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = ConversationSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return inbox(self.request.user)
+
+    @action(detail=True, methods=['get', 'post'], url_path='messages')
+    def thread(self, request, pk=None):
+        """Messages newest first; POST replies. Reading the newest page marks the thread read"""
+        conversation = self.get_object()
+        if request.method == 'POST':
+            content = (request.data.get('content') or '').strip()
+            if not content:
+                return Response({'error': 'Message content is required'}, status=status.HTTP_400_BAD_REQUEST)
+            message = send_message(request.user, conversation.item, content, conversation=conversation)
+            return Response(ConversationMessageSerializer(message).data, status=status.HTTP_201_CREATED)
+        paginator = ThreadPagination()
+        page = paginator.paginate_queryset(conversation.messages.all(), request)
+        if not request.query_params.get(paginator.cursor_query_param):
+            mark_read(conversation, request.user)
+        return paginator.get_paginated_response(ConversationMessageSerializer(page, many=True).data)
 
 
 class CartViewSet(viewsets.ModelViewSet):
@@ -168,40 +220,14 @@ class CartViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def checkout(self, request):
         cart, _ = Cart.objects.get_or_create(user=request.user)
-        cart_items = cart.cartitem_set.select_related('item__seller').all()
-        if not cart_items.exists():
+        if not cart.cartitem_set.exists():
             return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
 
         shipping_address = request.data.get('shipping_address', '')
         payment_method = request.data.get('payment_method', 'cod')
 
-        # Group by seller
-        seller_orders = {}
-        for cart_item in cart_items:
-            seller = cart_item.item.seller
-            if seller.id not in seller_orders:
-                order = Order.objects.create(
-                    buyer=request.user,
-                    seller=seller,
-                    total_amount=0,
-                    shipping_address=shipping_address,
-                    payment_method=payment_method,
-                )
-                seller_orders[seller.id] = {'order': order, 'total': 0}
-            oi = OrderItem.objects.create(
-                order=seller_orders[seller.id]['order'],
-                item=cart_item.item,
-                quantity=cart_item.quantity,
-                price_at_time=cart_item.item.price or 0,
-            )
-            seller_orders[seller.id]['total'] += oi.get_total_price()
-
-        for sd in seller_orders.values():
-            sd['order'].total_amount = sd['total']
-            sd['order'].save()
-
-        cart.cartitem_set.all().delete()
-        first_order = list(seller_orders.values())[0]['order']
+        seller_orders = CheckoutService.place_orders(request.user, cart, shipping_address, payment_method)
+        first_order = seller_orders[0][0]
         return Response(OrderSerializer(first_order).data, status=status.HTTP_201_CREATED)
 
 
@@ -308,23 +334,45 @@ class SwapProposalViewSet(viewsets.ModelViewSet):
         user = self.request.user
         return SwapProposal.objects.filter(
             Q(proposer=user) | Q(receiver=user)
-        ).select_related('proposer', 'receiver', 'offered_item', 'requested_item').order_by('-created_at')
+        ).select_related(
+            'proposer__userprofile', 'receiver__userprofile', 'offered_item', 'requested_item'
+        ).order_by('-created_at')
 
-    @action(detail=False, methods=['get'])
-    def received(self, request):
-        proposals = SwapProposal.objects.filter(receiver=request.user).order_by('-created_at')
+    def get_serializer_class(self):
+        if self.action in ('list', 'received', 'sent'):
+            return SwapProposalSummarySerializer
+        return SwapProposalSerializer
+
+    def _list(self, proposals):
         page = self.paginate_queryset(proposals)
         if page is not None:
             return self.get_paginated_response(self.get_serializer(page, many=True).data)
         return Response(self.get_serializer(proposals, many=True).data)
 
+    @action(detail=False, methods=['get'])
+    def received(self, request):
+        return self._list(self.get_queryset().filter(receiver=request.user))
+
     @action(detail=False, methods=['get'])
     def sent(self, request):
-        proposals = SwapProposal.objects.filter(proposer=request.user).order_by('-created_at')
-        page = self.paginate_queryset(proposals)
+        return self._list(self.get_queryset().filter(proposer=request.user))
+
+    @action(detail=False, methods=['get'])
+    def suggestions(self, request):
+        """Suggested direct and multi-party swaps involving the user's listings (?item= narrows to one)"""
+        mine = SwapCycleMember.objects.filter(item__seller=request.user)
+        item_id = request.query_params.get('item')
+        if item_id:
+            if not item_id.isdigit():
+                return Response({'error': 'Invalid item'}, status=status.HTTP_400_BAD_REQUEST)
+            mine = mine.filter(item_id=item_id)
+        cycles = SwapCycle.objects.filter(pk__in=mine.values('cycle_id')).prefetch_related(
+            Prefetch('members', queryset=SwapCycleMember.objects.select_related('item__seller'))
+        )
+        page = self.paginate_queryset(cycles)
         if page is not None:
-            return self.get_paginated_response(self.get_serializer(page, many=True).data)
-        return Response(self.get_serializer(proposals, many=True).data)
+            return self.get_paginated_response(SwapCycleSerializer(page, many=True, context={'request': request}).data)
+        return Response(SwapCycleSerializer(cycles, many=True, context={'request': request}).data)
 
     @action(detail=True, methods=['patch'])
     def respond(self, request, pk=None):
@@ -334,8 +382,13 @@ class SwapProposalViewSet(viewsets.ModelViewSet):
         new_status = request.data.get('status')
         if new_status not in ['accepted', 'rejected']:
             return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
-        proposal.status = new_status
-        proposal.save()
+        try:
+            if new_status == 'accepted':
+                proposal = SwapService.accept(proposal.pk)
+            else:
+                proposal = SwapService.reject(proposal.pk)
+        except SwapError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
         return Response(self.get_serializer(proposal).data)
 
     @action(detail=True, methods=['patch'])
@@ -343,8 +396,10 @@ class SwapProposalViewSet(viewsets.ModelViewSet):
         proposal = self.get_object()
         if proposal.proposer != request.user:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
-        proposal.status = 'cancelled'
-        proposal.save()
+        try:
+            proposal = SwapService.cancel(proposal.pk)
+        except SwapError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
         return Response(self.get_serializer(proposal).data)
 
 
@@ -377,6 +432,26 @@ class WatchlistViewSet(viewsets.ModelViewSet):
         return Response({'status': 'added', 'watchlisted': True})
 
 
+class SavedSearchViewSet(viewsets.ModelViewSet):
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def matches(self, request, pk=None):
+        """Listings matched by this saved search, newest first"""
+        saved_search = self.get_object()
+        items = Item.objects.filter(
+            saved_search_matches__saved_search=saved_search, is_active=True
+        ).select_related('seller').order_by('-saved_search_matches__created_at')
+        page = self.paginate_queryset(items)
+        if page is not None:
+            return self.get_paginated_response(ItemSerializer(page, many=True, context={'request': request}).data)
+        return Response(ItemSerializer(items, many=True, context={'request': request}).data)
+
+
 class ReportViewSet(viewsets.ModelViewSet):
     serializer_class = ReportSerializer
     permission_classes = [IsAuthenticated]
@@ -401,13 +476,78 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        NotificationService.mark_all_notifications_read(request.user)
         return Response({'status': 'ok'})
 
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
-        count = Notification.objects.filter(user=request.user, is_read=False).count()
-        return Response({'count': count})
+        return Response({'count': UnreadCountService.get(request.user.pk)})
+
+
+async def _aauthenticate(request):
+    """Session or JWT user for plain async views; DRF authentication is sync-only"""
+    user = await request.auser()
+    if user.is_authenticated:
+        return user
+    jwt = JWTAuthentication()
+    header = jwt.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = jwt.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = jwt.get_validated_token(raw_token)
+        return await User.objects.aget(pk=token[jwt_settings.USER_ID_CLAIM], is_active=True)
+    except (AuthenticationFailed, InvalidToken, KeyError, User.DoesNotExist):
+        return None
+
+
+@require_GET
+async def notification_unread_count(request):
+    """Unread badge count for the navbar, served from the cached per-user counter"""
+    user = await _aauthenticate(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    return JsonResponse({'count': await UnreadCountService.aget(user.pk)})
+
+
+async def event_stream(request):
+    """Server-Sent Events feed of the user's notifications and messages"""
+    user = await _aauthenticate(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    if not isinstance(request, ASGIRequest):
+        # WSGI (Vercel, runserver) drains an async stream before sending a byte and
+        # holds a worker per open tab; 204 tells EventSource to stop and the page polls
+        return HttpResponse(status=204)
+
+    async def events():
+        # Subscribe before the snapshot so nothing created in between is missed
+        async with get_broker().subscribe(user.pk) as subscription:
+            count = await UnreadCountService.aget(user.pk)
+            yield format_sse('unread_count', {'count': count}, retry=settings.EVENT_STREAM_RETRY_MS)
+            async for frame in sse_stream(subscription, max_seconds=settings.EVENT_STREAM_MAX_SECONDS):
+                yield frame
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+def cron_job(request, job):
+    """Run a queue-draining command for Vercel Cron, which has no long-lived worker"""
+    secret = settings.CRON_SECRET
+    token = request.headers.get('Authorization', '')
+    if not secret or not hmac.compare_digest(token.encode(), f'Bearer {secret}'.encode()):
+        return JsonResponse({'detail': 'Forbidden'}, status=403)
+    if job not in CRON_JOBS:
+        return JsonResponse({'detail': 'Unknown job'}, status=404)
+    output = io.StringIO()
+    call_command(CRON_JOBS[job], stdout=output)
+    return JsonResponse({'job': job, 'output': output.getvalue().strip()})
 
 
 class ReviewViewSet(viewsets.ModelViewSet):
@@ -462,6 +602,7 @@ class SellerAnalyticsView(APIView):
             views_data.append(count)
 
         # Per-item stats
+        media = MediaURLResolver(request)
         listings = []
         for item in items:
             item_views = item.views.count()
@@ -475,7 +616,7 @@ class SellerAnalyticsView(APIView):
                 'views': item_views,
                 'messages': item_msgs,
                 'days_listed': days_listed,
-                'image_url': request.build_absolute_uri(item.image1.url) if item.image1 else None,
+                'image_url': media.url(item.image1),
             })
 
         top_item = max(listings, key=lambda x: x['views'], default=None) if listings else None
@@ -490,6 +631,13 @@ class SellerAnalyticsView(APIView):
         })
 
 
+class PlatformStatsView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(PlatformStatsService.get_stats())
+
+
 class AIPriceSuggesterView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -0,0 +1,183 @@
+"""
+Live catalogue lookups for the chatbot.
+
+Free-text questions such as "any calculators under 500?" are reduced to
+category / price / keyword slots and answered with real listings. Keywords
+are matched like ``ItemViewSet.search`` (name, description, category) but
+any one of them is enough: listings are ranked by how many they match, so a
+stray word ("good", "hello") narrows nothing. Results are cached per
+normalised slot set, so popular questions asked in different words share
+one database query.
+"""
+import hashlib
+import operator
+import re
+from functools import reduce
+
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import Item
+
+LISTINGS_CACHE_TIMEOUT = 300  # seconds
+LISTINGS_LIMIT = 5
+
+CATEGORY_SYNONYMS = {
+    'textbook': 'textbook', 'book': 'textbook', 'novel': 'textbook', 'note': 'textbook',
+    'equipment': 'equipment', 'lab': 'equipment', 'apparatus': 'equipment',
+    'decor': 'decor', 'decoration': 'decor', 'poster': 'decor',
+    'appliance': 'appliance', 'fridge': 'appliance', 'kettle': 'appliance',
+}
+
+# Phrases that signal the user wants actual listings rather than a how-to
+SEARCH_TRIGGERS = re.compile(
+    r"\b(any|anyone selling|do you have|is there|are there|looking for|find|search|show me|available|in stock)\b"
+)
+# Of those, the ones that ask for listings even when a help topic shares a word ("show me cheap lamps")
+EXPLICIT_SEARCH_TRIGGERS = re.compile(
+    r"\b(anyone selling|do you have|looking for|show me|in stock)\b"
+)
+MAX_PRICE_RE = re.compile(r"\b(?:under|below|less than|cheaper than|up ?to|within|max)\s*(?:₹|rs\.?|inr)?\s*(\d+(?:\.\d+)?)")
+MIN_PRICE_RE = re.compile(r"\b(?:over|above|more than|at least|min)\s*(?:₹|rs\.?|inr)?\s*(\d+(?:\.\d+)?)")
+BETWEEN_PRICE_RE = re.compile(r"\bbetween\s*(?:₹|rs\.?|inr)?\s*(\d+(?:\.\d+)?)\s*(?:and|-|to)\s*(?:₹|rs\.?|inr)?\s*(\d+(?:\.\d+)?)")
+WORD_RE = re.compile(r"[a-z][a-z0-9\-]+")
+FILLER_WORDS = frozenset(
+    'a an and any anyone are available between buy can cheap cheaper do does find for from get have '
+    'here i in is it item items listing listings looking me more my need of on or over please price '
+    'rs inr rupees search sell selling show some stock than the there thing things to under up upto '
+    'want what which with within you below above less least max min cost costs how where when why '
+    'hello hi hey thanks thank good nice great best new used this that these those also just really'.split()
+)
+
+
+def _singular(word):
+    if len(word) > 3 and word.endswith('es') and word[-3] in 'sxz':
+        return word[:-2]
+    # "this", "campus", "glass" are not plurals
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'is', 'us')):
+        return word[:-1]
+    return word
+
+
+def extract_slots(message):
+    """Return a dict of category/min_price/max_price/keywords found in ``message``"""
+    text = message.lower()
+    slots = {'category': None, 'min_price': None, 'max_price': None, 'keywords': []}
+
+    between = BETWEEN_PRICE_RE.search(text)
+    if between:
+        low, high = sorted(float(value) for value in between.groups())
+        slots['min_price'], slots['max_price'] = low, high
+        text = text[:between.start()] + text[between.end():]
+    else:
+        maximum = MAX_PRICE_RE.search(text)
+        if maximum:
+            slots['max_price'] = float(maximum.group(1))
+            text = text[:maximum.start()] + text[maximum.end():]
+        minimum = MIN_PRICE_RE.search(text)
+        if minimum:
+            slots['min_price'] = float(minimum.group(1))
+            text = text[:minimum.start()] + text[minimum.end():]
+
+    for word in WORD_RE.findall(text):
+        if word in FILLER_WORDS:
+            continue
+        word = _singular(word)
+        if slots['category'] is None and word in CATEGORY_SYNONYMS:
+            slots['category'] = CATEGORY_SYNONYMS[word]
+            # Generic category words ("book", "lab") don't narrow the search further
+            if word == slots['category'] or word in ('book', 'lab'):
+                continue
+        if word not in slots['keywords']:
+            slots['keywords'].append(word)
+    return slots
+
+
+def is_catalogue_query(message, slots=None):
+    """True when the message asks for listings and names something to look for"""
+    slots = slots if slots is not None else extract_slots(message)
+    has_target = bool(slots['category'] or slots['keywords'])
+    has_price = slots['min_price'] is not None or slots['max_price'] is not None
+    return has_target and (has_price or bool(SEARCH_TRIGGERS.search(message.lower())))
+
+
+def _cache_key(slots, limit):
+    normalized = '|'.join([
+        str(limit),
+        slots['category'] or '',
+        '' if slots['min_price'] is None else f"{slots['min_price']:g}",
+        '' if slots['max_price'] is None else f"{slots['max_price']:g}",
+        ' '.join(sorted(slots['keywords'])),
+    ])
+    return 'chatbot:listings:' + hashlib.md5(normalized.encode('utf-8')).hexdigest()
+
+
+def _listings_queryset(slots, limit):
+    queryset = Item.objects.filter(is_active=True)
+    if slots['category']:
+        queryset = queryset.filter(category=slots['category'])
+    if slots['min_price'] is not None:
+        queryset = queryset.filter(price__gte=slots['min_price'])
+    if slots['max_price'] is not None:
+        queryset = queryset.filter(price__lte=slots['max_price'])
+    ordering = ['price', '-created_at']
+    if slots['keywords']:
+        hits = reduce(operator.add, [
+            Case(
+                When(Q(name__icontains=keyword) | Q(description__icontains=keyword) | Q(category__icontains=keyword), then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            for keyword in slots['keywords']
+        ])
+        queryset = queryset.annotate(hits=hits).filter(hits__gt=0)
+        ordering.insert(0, '-hits')
+    return queryset.order_by(*ordering).values('id', 'name', 'price', 'condition')[:limit]
+
+
+def _listing(item):
+    return {
+        'id': item['id'],
+        'name': item['name'],
+        'price': str(item['price']) if item['price'] is not None else None,
+        'condition': dict(Item.CONDITION_CHOICES).get(item['condition']),
+    }
+
+
+def find_listings(slots, limit=LISTINGS_LIMIT):
+    """Return up to ``limit`` active listings matching ``slots`` as plain dicts"""
+    key = _cache_key(slots, limit)
+    listings = cache.get(key)
+    if listings is not None:
+        return listings
+
+    listings = [_listing(item) for item in _listings_queryset(slots, limit)]
+    cache.set(key, listings, LISTINGS_CACHE_TIMEOUT)
+    return listings
+
+
+async def afind_listings(slots, limit=LISTINGS_LIMIT):
+    """Async variant of find_listings using the async ORM"""
+    key = _cache_key(slots, limit)
+    listings = await cache.aget(key)
+    if listings is not None:
+        return listings
+
+    listings = [_listing(item) async for item in _listings_queryset(slots, limit)]
+    await cache.aset(key, listings, LISTINGS_CACHE_TIMEOUT)
+    return listings
+
+
+def describe_slots(slots):
+    parts = []
+    if slots['keywords']:
+        parts.append(' '.join(slots['keywords']))
+    if slots['category']:
+        parts.append(f"in {dict(Item.CATEGORY_CHOICES)[slots['category']]}")
+    if slots['min_price'] is not None and slots['max_price'] is not None:
+        parts.append(f"between ₹{slots['min_price']:g} and ₹{slots['max_price']:g}")
+    elif slots['max_price'] is not None:
+        parts.append(f"under ₹{slots['max_price']:g}")
+    elif slots['min_price'] is not None:
+        parts.append(f"over ₹{slots['min_price']:g}")
+    return ' '.join(parts) or 'items'
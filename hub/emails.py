@@ -0,0 +1,82 @@
+"""
+Email template registry.
+
+Every notification email is registered once by name with a subject line and
+text/HTML templates under ``hub/emails/``. Templates are compiled on first
+use and kept for the life of the process; ``render_many`` reuses the
+compiled templates and a single context stack across recipients, so digests
+and announcements render in one pass.
+"""
+import threading
+
+from django.template import Context, engines
+
+
+class RenderedEmail:
+    def __init__(self, subject, text, html=None):
+        self.subject = subject
+        self.text = text
+        self.html = html
+
+
+class EmailTemplateRegistry:
+    def __init__(self):
+        self._registered = {}  # name -> (subject, text_template, html_template)
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, subject, text_template, html_template=None):
+        with self._lock:
+            self._registered[name] = (subject, text_template, html_template)
+            self._compiled.pop(name, None)
+
+    def _get(self, name):
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            subject, text_template, html_template = self._registered[name]
+            engine = engines['django'].engine
+            compiled = (
+                engine.from_string(subject),
+                engine.get_template(text_template),
+                engine.get_template(html_template) if html_template else None,
+            )
+            self._compiled[name] = compiled
+        return compiled
+
+    def render(self, name, context):
+        return self.render_many(name, [context])[0]
+
+    def render_many(self, name, contexts, shared=None):
+        """Render ``name`` once per context dict; ``shared`` values apply to all"""
+        subject_template, text_template, html_template = self._get(name)
+        # Subjects and plain text are not HTML, so they are rendered unescaped
+        text_context = Context(shared or {}, autoescape=False)
+        html_context = Context(shared or {})
+        rendered = []
+        for context in contexts:
+            with text_context.push(context):
+                subject = ' '.join(subject_template.render(text_context).split())
+                text = text_template.render(text_context)
+            html = None
+            if html_template is not None:
+                with html_context.push(context):
+                    html = html_template.render(html_context)
+            rendered.append(RenderedEmail(subject, text, html))
+        return rendered
+
+
+email_templates = EmailTemplateRegistry()
+
+for _name, _subject in [
+    ('item_added', "Item '{{ item.name }}' Successfully Added"),
+    ('item_sold', "Congratulations! Your item '{{ item.name }}' has been sold!"),
+    ('item_purchased', "Order Confirmed - '{{ item.name }}'"),
+    ('review_received', "New Review for '{{ item.name }}'"),
+    ('order_status', "Order Status Update - {{ status_display }}"),
+    ('message_received', "New Message about '{{ item.name }}'"),
+    ('notification_digest', "EduCycle digest: {{ notification.title }}"),
+    ('announcement', "{{ subject }}"),
+    ('price_drop', "Price drop on '{{ item.name }}'"),
+    ('saved_search_match', "New listing: '{{ item.name }}'"),
+]:
+    email_templates.register(_name, _subject, f"hub/emails/{_name}.txt", f"hub/emails/{_name}.html")
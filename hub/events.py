@@ -0,0 +1,173 @@
+"""
+Per-user real-time event bus.
+
+Notifications and messages are published to the recipient's channel as
+they are committed, and browsers receive them over a Server-Sent Events
+stream instead of polling. The in-memory broker fans out within one
+process (development, tests, single-worker deployments); set
+``EVENT_BUS_URL`` to a Redis URL to share events across workers.
+"""
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+    aioredis = None
+
+CHANNEL_PREFIX = 'events:user:'
+
+
+class InMemoryBroker:
+    """Process-local fan-out; safe to publish from any thread"""
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = {}  # user_id -> set of (loop, queue)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, ()))
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # Subscriber's event loop already closed; it unsubscribes on its own
+                pass
+        return len(targets)
+
+    @staticmethod
+    def _offer(queue, event):
+        # A stalled client loses events rather than growing without bound
+        if not queue.full():
+            queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(entry)
+        try:
+            yield _QueueSubscription(queue)
+        finally:
+            with self._lock:
+                entries = self._subscribers.get(user_id)
+                if entries is not None:
+                    entries.discard(entry)
+                    if not entries:
+                        del self._subscribers[user_id]
+
+    def subscriber_count(self, user_id):
+        with self._lock:
+            return len(self._subscribers.get(user_id, ()))
+
+
+class _QueueSubscription:
+    def __init__(self, queue):
+        self._queue = queue
+
+    async def get(self, timeout):
+        """Next event, or None if nothing arrives within ``timeout`` seconds"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class RedisBroker:
+    """Redis pub/sub, one channel per user, shared by every worker"""
+
+    def __init__(self, url):
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, user_id, event):
+        return self._client.publish(f"{CHANNEL_PREFIX}{user_id}", json.dumps(event))
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(f"{CHANNEL_PREFIX}{user_id}")
+        try:
+            yield _RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await client.aclose()
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """The process-wide broker selected by ``EVENT_BUS_URL``"""
+    url = getattr(settings, 'EVENT_BUS_URL', '')
+    if url and REDIS_AVAILABLE:
+        return RedisBroker(url)
+    if url:
+        logger.warning("EVENT_BUS_URL is set but redis is not installed - using in-memory event bus")
+    return InMemoryBroker()
+
+
+def publish_event(user_id, event_type, data):
+    """Send an event to ``user_id``'s subscribers once the current transaction commits"""
+    event = {'type': event_type, 'data': data}
+
+    def send():
+        try:
+            get_broker().publish(user_id, event)
+        except Exception as e:
+            logger.error(f"Failed to publish {event_type} event to user {user_id}: {str(e)}")
+
+    transaction.on_commit(send)
+
+
+def format_sse(event_type, data, retry=None):
+    lines = [f"retry: {retry}"] if retry is not None else []
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+async def sse_stream(subscription, heartbeat=15, max_seconds=300):
+    """Yield SSE frames from ``subscription`` with keep-alive comments.
+
+    Streams end after ``max_seconds`` so proxies and serverless timeouts
+    never cut them mid-frame; EventSource reconnects automatically.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_seconds
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return
+        event = await subscription.get(min(heartbeat, remaining))
+        if event is None:
+            yield ': keep-alive\n\n'
+        else:
+            yield format_sse(event['type'], event['data'])
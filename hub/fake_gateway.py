@@ -0,0 +1,135 @@
+"""
+Local fake payment provider.
+
+Implements the handful of Stripe and Razorpay endpoints the gateway clients
+call, with configurable latency and error rate, so payment flows, the
+circuit breaker and reconciliation can be exercised offline. Point
+``STRIPE_API_BASE`` / ``RAZORPAY_API_BASE`` at it (see the
+``fake_payment_gateway`` command).
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+class FakeGatewayState:
+    def __init__(self, latency=0.0, error_rate=0.0, payment_status='succeeded'):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.payment_status = payment_status
+        self.payment_intents = {}
+        self.razorpay_orders = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so client connection pooling is exercised
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        try:
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timeout test); nothing to answer
+            self.close_connection = True
+
+    def _body(self):
+        raw = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.headers.get('Content-Type', '').startswith('application/json'):
+            return json.loads(raw or b'{}')
+        return dict(parse_qsl(raw.decode()))
+
+    def _handle(self, method):
+        state = self.server.state
+        body = self._body() if method == 'POST' else {}
+        with state.lock:
+            state.requests += 1
+        if state.latency:
+            time.sleep(state.latency)
+        if state.error_rate and random.random() < state.error_rate:
+            return self._send(503, {'error': {'message': 'Simulated provider outage'}})
+
+        path = self.path.split('?')[0].rstrip('/')
+        if method == 'POST' and path == '/v1/payment_intents':
+            intent_id = f"pi_fake_{uuid.uuid4().hex[:16]}"
+            intent = {
+                'id': intent_id,
+                'object': 'payment_intent',
+                'amount': int(body.get('amount', 0)),
+                'currency': body.get('currency', 'inr'),
+                'status': 'requires_payment_method',
+                'client_secret': f"{intent_id}_secret_{uuid.uuid4().hex[:8]}",
+                'metadata': {key[9:-1]: value for key, value in body.items() if key.startswith('metadata[')},
+            }
+            with state.lock:
+                state.payment_intents[intent_id] = intent
+            return self._send(200, intent)
+        if method == 'GET' and path.startswith('/v1/payment_intents/'):
+            intent_id = path.rsplit('/', 1)[1]
+            with state.lock:
+                # Ids the fake never issued (e.g. seeded Payment rows) are answered too
+                intent = state.payment_intents.get(intent_id, {'id': intent_id, 'object': 'payment_intent'})
+            return self._send(200, dict(intent, status=state.payment_status))
+        if method == 'POST' and path.startswith('/v1/payment_intents/') and path.endswith('/capture'):
+            intent_id = path.split('/')[3]
+            return self._send(200, {'id': intent_id, 'object': 'payment_intent', 'status': 'succeeded'})
+        if method == 'POST' and path.startswith('/v1/payments/') and path.endswith('/capture'):
+            return self._send(200, {'id': path.split('/')[3], 'entity': 'payment', 'status': 'captured'})
+        if method == 'POST' and path.startswith('/v1/payments/') and path.endswith('/refund'):
+            return self._send(200, {
+                'id': f"rfnd_fake_{uuid.uuid4().hex[:14]}",
+                'entity': 'refund',
+                'payment_id': path.split('/')[3],
+                'status': 'processed',
+            })
+        if method == 'POST' and path == '/v1/refunds':
+            return self._send(200, {
+                'id': f"re_fake_{uuid.uuid4().hex[:16]}",
+                'object': 'refund',
+                'payment_intent': body.get('payment_intent'),
+                'status': 'succeeded',
+            })
+        if method == 'POST' and path == '/v1/orders':
+            order = dict(body, id=f"order_fake_{uuid.uuid4().hex[:14]}", status='created')
+            with state.lock:
+                state.razorpay_orders[order['id']] = order
+            return self._send(200, order)
+        if method == 'GET' and path.startswith('/v1/payments/'):
+            status = 'captured' if state.payment_status == 'succeeded' else state.payment_status
+            return self._send(200, {'id': path.rsplit('/', 1)[1], 'entity': 'payment', 'status': status})
+        return self._send(404, {'error': {'message': f"Unknown endpoint {method} {path}"}})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+def make_server(host='127.0.0.1', port=0, **options):
+    """A fake provider server (not yet serving); ``port=0`` picks a free port"""
+    server = ThreadingHTTPServer((host, port), FakeGatewayHandler)
+    server.daemon_threads = True
+    server.state = FakeGatewayState(**options)
+    return server
+
+
+def start_in_thread(**options):
+    """Start a fake provider in a daemon thread; returns (server, base_url)"""
+    server = make_server(**options)
+    threading.Thread(target=server.serve_forever, name='fake-gateway', daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
@@ -0,0 +1,191 @@
+"""
+Outbound payment-gateway clients.
+
+Each provider gets one pooled ``requests`` session (keep-alive connections
+shared by every request thread), strict connect/read timeouts and a
+circuit breaker: after ``PAYMENT_CIRCUIT_FAILURES`` consecutive transport
+or 5xx failures calls fail fast for ``PAYMENT_CIRCUIT_RESET`` seconds, then
+a single trial call decides whether the circuit closes again. Base URLs are
+settings so the fake provider in ``hub.fake_gateway`` can stand in.
+"""
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayError(Exception):
+    """A provider call failed; ``retryable`` is False for requests the provider rejected"""
+
+    def __init__(self, message, status_code=None, retryable=True):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+class CircuitOpenError(GatewayError):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self):
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return
+            # Half-open lets exactly one trial call through
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+        raise CircuitOpenError(f"{self.name} circuit is open - failing fast")
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"{self.name} circuit closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or (self._opened_at is None and self._failures >= self.failure_threshold):
+                logger.warning(f"{self.name} circuit opened after {self._failures} failures")
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class GatewayClient:
+    """JSON-over-HTTP client for one provider"""
+
+    def __init__(self, name, base_url, auth, timeout=(3.05, 10), pool_size=10,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.session = requests.Session()
+        self.session.auth = auth
+        # Retries are the caller's decision (webhooks, reconciliation), never the transport's
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, path, **kwargs):
+        self.breaker.before_call()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            raise GatewayError(f"{self.name} {method} {path} failed: {str(e)}") from e
+
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+            raise GatewayError(f"{self.name} {method} {path} returned {response.status_code}", response.status_code)
+        # A 4xx is our request's fault; the provider itself is healthy
+        self.breaker.record_success()
+        if response.status_code >= 400:
+            raise GatewayError(
+                f"{self.name} {method} {path} rejected ({response.status_code}): {response.text[:500]}",
+                response.status_code,
+                retryable=False,
+            )
+        return response.json()
+
+
+class StripeGateway(GatewayClient):
+    def create_payment_intent(self, amount, currency, metadata):
+        data = {'amount': amount, 'currency': currency}
+        data.update({f'metadata[{key}]': value for key, value in metadata.items()})
+        return self.request('POST', '/v1/payment_intents', data=data)
+
+    def retrieve_payment_intent(self, intent_id):
+        return self.request('GET', f'/v1/payment_intents/{intent_id}')
+
+    def capture_payment_intent(self, intent_id):
+        return self.request('POST', f'/v1/payment_intents/{intent_id}/capture')
+
+    def create_refund(self, intent_id):
+        return self.request('POST', '/v1/refunds', data={'payment_intent': intent_id})
+
+
+class RazorpayGateway(GatewayClient):
+    def create_order(self, data):
+        return self.request('POST', '/v1/orders', json=data)
+
+    def fetch_payment(self, payment_id):
+        return self.request('GET', f'/v1/payments/{payment_id}')
+
+    def fetch_order_payments(self, order_id):
+        return self.request('GET', f'/v1/orders/{order_id}/payments')
+
+    def capture_payment(self, payment_id, amount, currency):
+        return self.request('POST', f'/v1/payments/{payment_id}/capture', json={'amount': amount, 'currency': currency})
+
+    def refund_payment(self, payment_id):
+        return self.request('POST', f'/v1/payments/{payment_id}/refund', json={})
+
+
+def _client_options():
+    return {
+        'timeout': (
+            getattr(settings, 'PAYMENT_GATEWAY_CONNECT_TIMEOUT', 3.05),
+            getattr(settings, 'PAYMENT_GATEWAY_READ_TIMEOUT', 10),
+        ),
+        'pool_size': getattr(settings, 'PAYMENT_GATEWAY_POOL_SIZE', 10),
+        'failure_threshold': getattr(settings, 'PAYMENT_CIRCUIT_FAILURES', 5),
+        'reset_timeout': getattr(settings, 'PAYMENT_CIRCUIT_RESET', 30),
+    }
+
+
+@lru_cache(maxsize=None)
+def get_stripe_gateway():
+    return StripeGateway(
+        'stripe',
+        getattr(settings, 'STRIPE_API_BASE', 'https://api.stripe.com'),
+        (getattr(settings, 'STRIPE_SECRET_KEY', ''), ''),
+        **_client_options()
+    )
+
+
+@lru_cache(maxsize=None)
+def get_razorpay_gateway():
+    return RazorpayGateway(
+        'razorpay',
+        getattr(settings, 'RAZORPAY_API_BASE', 'https://api.razorpay.com'),
+        (getattr(settings, 'RAZORPAY_KEY_ID', ''), getattr(settings, 'RAZORPAY_KEY_SECRET', '')),
+        **_client_options()
+    )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from hub.retention import archive_read_notifications, expired_notifications, purge_archive
+
+
+class Command(BaseCommand):
+    help = 'Move expired read notifications to the archive and purge old archive rows (run daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Notifications moved per transaction')
+        parser.add_argument('--skip-purge', action='store_true', help='Archive only; keep old archive rows')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be archived without writing')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f"Would archive {expired_notifications().count()} notifications.")
+            return
+
+        archived = archive_read_notifications(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} notifications."))
+        if not options['skip_purge']:
+            dropped = purge_archive()
+            self.stdout.write(self.style.SUCCESS(f"Purged expired archive rows ({dropped} partitions dropped)."))
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hub.chatbot import get_chatbot, intent_engine
+
+
+# (message, expected intent); misclassifications fail the run before anything is timed
+SAMPLE_MESSAGES = [
+    ("How do I buy items?", 'buying'),
+    ("How do I sell items?", 'selling'),
+    ("How do I create an account?", 'account'),
+    ("Is it safe to meet sellers?", 'safety'),
+    ("What payment methods are accepted?", 'payment'),
+    ("What can I buy and sell?", 'categories'),
+    ("How do I contact support?", 'contact'),
+    ("How do reviews work?", 'reviews'),
+    ("How do I set a good price?", 'pricing'),
+    ("Where should I meet buyers/sellers?", 'shipping'),
+    ("What if I have technical issues?", 'technical'),
+    ("How do refunds work?", 'refund'),
+    ("hello there", 'greeting'),
+    ("my account was hacked, this is urgent", 'urgent'),
+    ("something the bot has never heard of", None),
+    # Suffix stripping once read "his" as "hi"
+    ("his book is great", None),
+]
+
+
+class Command(BaseCommand):
+    help = 'Measure chatbot intent classification throughput (messages/second)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        chatbot = get_chatbot()
+        wrong = [
+            f"{message!r}: expected {expected}, got {intent_engine.classify(message)}"
+            for message, expected in SAMPLE_MESSAGES
+            if intent_engine.classify(message) != expected
+        ]
+        if wrong:
+            raise CommandError('Misclassified sample messages:\n' + '\n'.join(wrong))
+
+        for label, func in [
+            ('classify', intent_engine.classify),
+            ('process_message', lambda message: chatbot._process_message(message.lower())),
+        ]:
+            started = time.perf_counter()
+            for i in range(iterations):
+                func(SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)][0])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{label}: {iterations / elapsed:,.0f} messages/second")
@@ -0,0 +1,114 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from hub.message_delivery import deliver_pending
+from hub.models import Item
+
+
+class _Rollback(Exception):
+    pass
+
+
+class SlowEmailBackend:
+    """Stands in for an SMTP server that takes ``delay`` seconds per connection"""
+    delay = 0.0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def open(self):
+        time.sleep(self.delay)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send_messages(self, messages):
+        time.sleep(self.delay)
+        return len(messages)
+
+
+class Command(BaseCommand):
+    help = 'Measure send-message endpoint latency, with notification delivery queued or inline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200)
+        parser.add_argument('--smtp-latency', type=float, default=0.1, help='Simulated seconds per SMTP round trip')
+        parser.add_argument('--inline', action='store_true',
+                            help='Deliver right after each send, as the request used to')
+
+    def handle(self, *args, **options):
+        SlowEmailBackend.delay = options['smtp_latency']
+        backend = f"{__name__}.SlowEmailBackend"
+        # Everything runs in one transaction that is rolled back, so nothing is left behind
+        with override_settings(EMAIL_BACKEND=backend, MESSAGE_DELIVERY_BACKGROUND=False, ALLOWED_HOSTS=['*']):
+            try:
+                with transaction.atomic():
+                    self._run(options['messages'], options['inline'])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _run(self, count, inline):
+        # One seller and item per send: nothing is coalesced or rate limited, so
+        # every delivery sends its own email in both modes
+        urls = []
+        for i in range(count):
+            seller = User.objects.create_user(f'benchmark_seller{i}', f'seller{i}@benchmark.invalid')
+            item = Item.objects.create(seller=seller, name='Benchmark item', description='-', category='other', price=1)
+            urls.append(reverse('send_message', args=[item.pk]))
+        buyers = [User.objects.create_user(f'benchmark_buyer{i}', f'buyer{i}@benchmark.invalid') for i in range(10)]
+        clients = []
+        for buyer in buyers:
+            client = Client()
+            client.force_login(buyer)
+            clients.append(client)
+
+        latencies = []
+        for i in range(count):
+            started = time.perf_counter()
+            response = clients[i % len(clients)].post(urls[i], {'content': f'Is this still available? ({i})'}, secure=True)
+            if inline:
+                deliver_pending()
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 302:
+                self.stderr.write(f"Unexpected status {response.status_code}")
+                return
+
+        started = time.perf_counter()
+        delivered = 0
+        while True:
+            handled = deliver_pending()
+            if not handled:
+                break
+            delivered += handled
+        drain = time.perf_counter() - started
+
+        latencies.sort()
+        self.stdout.write(f"{count} sends ({'inline delivery' if inline else 'queued delivery'}):")
+        self.stdout.write(
+            f"Latency ms: p50 {self._percentile(latencies, 50):.1f}, "
+            f"p95 {self._percentile(latencies, 95):.1f}, "
+            f"p99 {self._percentile(latencies, 99):.1f}, "
+            f"mean {statistics.mean(latencies):.1f}"
+        )
+        if not inline:
+            self.stdout.write(f"Worker drained {delivered} deliveries in {drain:.2f}s")
+
+    @staticmethod
+    def _percentile(sorted_values, percent):
+        index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+        return sorted_values[index]
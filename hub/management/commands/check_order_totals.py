@@ -0,0 +1,36 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+
+from hub.models import CENTS, Order, line_total_sum
+
+
+class Command(BaseCommand):
+    help = 'Verify that every stored Order.total_amount equals the sum of its line items; exits non-zero on a mismatch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rewrite mismatched totals from the line items')
+        parser.add_argument('--limit', type=int, default=20, help='Mismatches to list individually')
+
+    def handle(self, *args, **options):
+        mismatched = list(
+            Order.objects.annotate(items_total=Coalesce(line_total_sum('orderitem__'), Value(Decimal('0.00'))))
+            .exclude(total_amount=F('items_total'))
+            .order_by('pk')
+            .values_list('pk', 'total_amount', 'items_total')
+        )
+        if not mismatched:
+            self.stdout.write(self.style.SUCCESS('All order totals match their line items.'))
+            return
+
+        mismatched = [(pk, stored, computed.quantize(CENTS)) for pk, stored, computed in mismatched]
+        for pk, stored, computed in mismatched[:options['limit']]:
+            self.stdout.write(f"  Order {pk}: stored {stored}, line items {computed}")
+        if not options['fix']:
+            raise CommandError(f"{len(mismatched)} orders have a stored total that does not match; rerun with --fix to rewrite them.")
+
+        orders = [Order(pk=pk, total_amount=computed) for pk, _, computed in mismatched]
+        Order.objects.bulk_update(orders, ['total_amount'], batch_size=500)
+        self.stdout.write(self.style.SUCCESS(f"Fixed {len(orders)} order totals."))
@@ -0,0 +1,77 @@
+import gzip
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from hub.models import ChatMessage
+from hub.transcripts import transcript_writer
+
+
+class Command(BaseCommand):
+    help = 'Archive chat sessions idle for more than N days to gzipped JSONL and delete them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Archive sessions with no activity in this many days')
+        parser.add_argument('--output-dir', default=None, help='Directory for archive files (default: CHAT_ARCHIVE_DIR)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Sessions archived per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be archived without writing')
+
+    def handle(self, *args, **options):
+        transcript_writer.flush()
+
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        session_ids = list(
+            ChatMessage.objects.values('session_id')
+            .annotate(last_activity=Max('timestamp'))
+            .filter(last_activity__lt=cutoff)
+            .values_list('session_id', flat=True)
+        )
+        if not session_ids:
+            self.stdout.write('No chat sessions to archive.')
+            return
+        if options['dry_run']:
+            count = ChatMessage.objects.filter(session_id__in=session_ids).count()
+            self.stdout.write(f"Would archive {len(session_ids)} sessions ({count} messages).")
+            return
+
+        output_dir = Path(options['output_dir'] or getattr(settings, 'CHAT_ARCHIVE_DIR', 'chat_archive'))
+        output_dir.mkdir(parents=True, exist_ok=True)
+        path = output_dir / f"chat-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz"
+
+        archived_sessions = archived_messages = 0
+        batch_size = options['batch_size']
+        # Write and close the whole archive before deleting anything
+        with gzip.open(path, 'wt', encoding='utf-8') as archive:
+            for start in range(0, len(session_ids), batch_size):
+                sessions = {}
+                rows = (
+                    ChatMessage.objects.filter(session_id__in=session_ids[start:start + batch_size], timestamp__lt=cutoff)
+                    .order_by('session_id', 'timestamp', 'id')
+                    .values_list('session_id', 'message_type', 'content', 'timestamp')
+                )
+                for session_id, message_type, content, timestamp in rows.iterator(chunk_size=2000):
+                    sessions.setdefault(session_id, []).append({
+                        'type': message_type,
+                        'content': content,
+                        'timestamp': timestamp.isoformat(),
+                    })
+                for session_id, messages in sessions.items():
+                    archive.write(json.dumps({'session_id': session_id, 'messages': messages}) + '\n')
+                    archived_messages += len(messages)
+                archived_sessions += len(sessions)
+
+        for start in range(0, len(session_ids), batch_size):
+            with transaction.atomic():
+                ChatMessage.objects.filter(
+                    session_id__in=session_ids[start:start + batch_size], timestamp__lt=cutoff
+                ).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived_sessions} sessions ({archived_messages} messages) to {path}"
+        ))
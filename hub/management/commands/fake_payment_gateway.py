@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from hub.fake_gateway import make_server
+
+
+class Command(BaseCommand):
+    help = 'Run a local fake Stripe/Razorpay API for tests and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+        parser.add_argument('--payment-status', default='succeeded', help='Status reported for payment lookups')
+
+    def handle(self, *args, **options):
+        server = make_server(
+            options['host'],
+            options['port'],
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+            payment_status=options['payment_status'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Fake payment gateway on http://{options['host']}:{options['port']} "
+            f"- set STRIPE_API_BASE and RAZORPAY_API_BASE to this URL"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,95 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Fire concurrent HTTP requests at a running server and report throughput and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='e.g. http://127.0.0.1:8000/search-suggestions/?q=book')
+        parser.add_argument('--requests', type=int, default=2000, help='Total requests to send')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once')
+        parser.add_argument('--data', action='append', default=[], metavar='KEY=VALUE',
+                            help='Send a form-encoded POST with this field (repeatable)')
+        parser.add_argument('--header', action='append', default=[], metavar='NAME: VALUE',
+                            help='Extra request header (repeatable)')
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Only plain http:// URLs are supported')
+        request = self._build_request(url, options['data'], options['header'])
+        results = asyncio.run(self._run(
+            url.hostname, url.port or 80, request,
+            options['requests'], options['concurrency'], options['timeout']
+        ))
+
+        elapsed, latencies, statuses, errors = results
+        ok = sum(count for status, count in statuses.items() if 200 <= status < 400)
+        self.stdout.write(f"{options['requests']} requests, concurrency {options['concurrency']}: {elapsed:.2f}s")
+        self.stdout.write(f"Throughput: {len(latencies) / elapsed:,.1f} req/s ({ok} successful, {errors} errors)")
+        self.stdout.write(f"Status codes: {dict(sorted(statuses.items()))}")
+        if latencies:
+            latencies.sort()
+            self.stdout.write(
+                f"Latency ms: p50 {self._percentile(latencies, 50):.1f}, "
+                f"p95 {self._percentile(latencies, 95):.1f}, "
+                f"p99 {self._percentile(latencies, 99):.1f}, "
+                f"mean {statistics.mean(latencies):.1f}"
+            )
+
+    def _build_request(self, url, data, headers):
+        path = url.path or '/'
+        if url.query:
+            path += '?' + url.query
+        lines = [f"{'POST' if data else 'GET'} {path} HTTP/1.1", f"Host: {url.netloc}", 'Connection: close']
+        lines.extend(headers)
+        body = b''
+        if data:
+            body = urlencode([field.split('=', 1) for field in data]).encode()
+            lines.append('Content-Type: application/x-www-form-urlencoded')
+            lines.append(f"Content-Length: {len(body)}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode() + body
+
+    async def _run(self, host, port, request, total, concurrency, timeout):
+        latencies = []
+        statuses = {}
+        errors = 0
+        remaining = iter(range(total))
+
+        async def fetch():
+            reader, writer = await asyncio.open_connection(host, port)
+            try:
+                writer.write(request)
+                await writer.drain()
+                status_line = await reader.readline()
+                await reader.read()
+                return int(status_line.split()[1])
+            finally:
+                writer.close()
+
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(fetch(), timeout)
+                except (OSError, ValueError, IndexError, asyncio.TimeoutError):
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started, latencies, statuses, errors
+
+    @staticmethod
+    def _percentile(sorted_values, percent):
+        index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+        return sorted_values[index]
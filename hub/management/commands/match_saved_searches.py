@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from hub.saved_searches import match_recent_items
+
+
+class Command(BaseCommand):
+    help = 'Match recent listings against saved searches (catch-up for matches missed at creation time)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Look at listings created in the last N hours')
+        parser.add_argument('--batch-size', type=int, default=200, help='Listings matched per batch')
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(hours=options['hours'])
+        matched = match_recent_items(since, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Recorded {matched} new saved-search matches."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from hub.webhooks import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Apply stored payment webhook events (cron fallback for the background worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=500, help='Maximum events to process in this run')
+
+    def handle(self, *args, **options):
+        handled = 0
+        while handled < options['limit']:
+            count = process_pending(limit=min(100, options['limit'] - handled))
+            if not count:
+                break
+            handled += count
+        self.stdout.write(self.style.SUCCESS(f"Processed {handled} webhook events."))
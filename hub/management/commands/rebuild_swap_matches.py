@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from hub.swap_matching import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the swap-matching index and suggested swaps from every active listing (listing changes keep it current)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk insert')
+
+    def handle(self, *args, **options):
+        edges, cycles = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {edges} swap matches and {cycles} suggested swaps."))
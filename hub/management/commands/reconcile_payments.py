@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from hub.reconciliation import MockProvider, PaymentReconciler, default_providers
+
+
+class Command(BaseCommand):
+    help = 'Check pending/processing payments against the payment providers and apply missed transitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Payments fetched and applied per page')
+        parser.add_argument('--concurrency', type=int, default=None, help='Parallel provider requests')
+        parser.add_argument('--rate', type=float, default=None, help='Provider requests per second (0 = unlimited)')
+        parser.add_argument('--settle-minutes', type=int, default=10, help='Skip payments updated more recently than this')
+        parser.add_argument('--mock', action='store_true',
+                            help='Use the offline mock provider (every online payment succeeds); implies --dry-run')
+        parser.add_argument('--mock-latency', type=float, default=0.05, help='Simulated provider round trip in seconds')
+        parser.add_argument('--dry-run', action='store_true', help='Report transitions without writing them')
+
+    def handle(self, *args, **options):
+        if options['mock']:
+            # The mock's answers are made up, so they are never written
+            options['dry_run'] = True
+            providers = [MockProvider(latency=options['mock_latency'])]
+        else:
+            providers = default_providers()
+            if not providers:
+                raise CommandError('No payment provider is configured; use --mock for an offline run.')
+
+        concurrency = options['concurrency'] or getattr(settings, 'PAYMENT_RECONCILE_CONCURRENCY', 8)
+        rate = options['rate'] if options['rate'] is not None else getattr(settings, 'PAYMENT_RECONCILE_RATE', 20)
+        reconciler = PaymentReconciler(
+            providers,
+            concurrency=concurrency,
+            rate=rate,
+            batch_size=options['batch_size'],
+            settle_after=options['settle_minutes'] * 60,
+            dry_run=options['dry_run'],
+        )
+
+        started = time.perf_counter()
+        result = reconciler.run()
+        elapsed = time.perf_counter() - started
+
+        verb = 'Would apply' if options['dry_run'] else 'Applied'
+        for (old, new), count in sorted(result.transitions.items()):
+            self.stdout.write(f"  {verb} {old} -> {new}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {result.checked} payments in {elapsed:.1f}s "
+            f"({result.checked / elapsed if elapsed else 0:.0f}/s): "
+            f"{sum(result.transitions.values())} changed, {result.unchanged} unchanged, "
+            f"{result.skipped} without a provider, {result.errors} errors."
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from hub.services import UnreadCountService
+
+
+class Command(BaseCommand):
+    help = 'Correct cached unread-notification counters against the database (run periodically)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users checked per query')
+
+    def handle(self, *args, **options):
+        cached, corrected = UnreadCountService.reconcile(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Checked {cached} cached counters, corrected {corrected}."))
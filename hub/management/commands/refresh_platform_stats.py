@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from hub.services import PlatformStatsService
+
+
+class Command(BaseCommand):
+    help = 'Recount platform stats from the database and reseed the cache (run periodically)'
+
+    def handle(self, *args, **options):
+        stats = PlatformStatsService.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f"{name}={value}" for name, value in stats.items())
+        ))
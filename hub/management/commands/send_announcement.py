@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from hub.services import NotificationService
+
+
+class Command(BaseCommand):
+    help = 'Email an announcement to every active user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('subject')
+        parser.add_argument('body')
+        parser.add_argument('--batch-size', type=int, default=500, help='Recipients rendered and sent per SMTP connection')
+        parser.add_argument('--dry-run', action='store_true', help='Count recipients without sending')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True).exclude(email='').order_by('pk')
+        if options['dry_run']:
+            self.stdout.write(f"Would email {users.count()} users.")
+            return
+
+        context = {'subject': options['subject'], 'body': options['body']}
+        batch_size = options['batch_size']
+        sent = 0
+        batch = []
+        for user in users.iterator(chunk_size=batch_size):
+            batch.append(user)
+            if len(batch) == batch_size:
+                sent += NotificationService.send_bulk_email(batch, 'announcement', context)
+                batch = []
+        if batch:
+            sent += NotificationService.send_bulk_email(batch, 'announcement', context)
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} announcement emails."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from hub.services import NotificationService
+
+
+class Command(BaseCommand):
+    help = 'Email digests for coalesced notifications whose window has closed (run every few minutes)'
+
+    def handle(self, *args, **options):
+        sent = NotificationService.send_digests()
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} notification digests."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from hub.price_alerts import sweep_price_alerts
+
+
+class Command(BaseCommand):
+    help = 'Alert watchers whose price threshold is met but who have not been alerted yet (catch-up sweep)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Watches alerted per transaction')
+
+    def handle(self, *args, **options):
+        alerted, rearmed = sweep_price_alerts(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Sent {alerted} price-drop alerts ({rearmed} watches re-armed after a price rise)."))
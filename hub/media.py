@@ -0,0 +1,87 @@
+"""
+Media URL resolution for item images.
+
+``Storage.url()`` is not free on remote backends (Cloudinary signs and builds
+the delivery URL on every call) and ``request.build_absolute_uri`` re-derives
+the host for every row. Stored file names are unique per upload, so the URL
+for a given name never changes and can be memoized for the process lifetime.
+"""
+from functools import lru_cache
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+
+def _is_absolute(url):
+    return url.startswith(('http://', 'https://', '//'))
+
+
+@lru_cache(maxsize=4096)
+def storage_url(name):
+    """Return the public URL for a stored file name, via the CDN if configured"""
+    cdn_base = getattr(settings, 'MEDIA_CDN_BASE_URL', '')
+    if cdn_base:
+        return f"{cdn_base.rstrip('/')}/{name.lstrip('/')}"
+    return default_storage.url(name)
+
+
+@lru_cache(maxsize=4096)
+def storage_srcset(name):
+    """Return a responsive ``srcset`` string for a stored image name.
+
+    Cloudinary URLs get a width transformation injected after ``/upload/``;
+    other backends/CDNs receive a ``?w=`` hint which resizing CDNs understand
+    and plain file servers ignore.
+    """
+    url = storage_url(name)
+    widths = getattr(settings, 'MEDIA_SRCSET_WIDTHS', (320, 640, 1024))
+    candidates = []
+    for width in widths:
+        if '/upload/' in url:
+            sized = url.replace('/upload/', f'/upload/c_limit,w_{width}/', 1)
+        else:
+            sized = f"{url}{'&' if '?' in url else '?'}w={width}"
+        candidates.append(f"{sized} {width}w")
+    return ', '.join(candidates)
+
+
+def clear_media_url_cache():
+    """Drop memoized URLs, e.g. after changing storage or CDN settings"""
+    storage_url.cache_clear()
+    storage_srcset.cache_clear()
+
+
+class MediaURLResolver:
+    """Resolve absolute media URLs for a single request.
+
+    The request's base URI is computed once, so serializing a page of items
+    costs one ``build_absolute_uri`` call instead of one per image.
+    """
+
+    def __init__(self, request=None):
+        self.base_uri = request.build_absolute_uri('/') if request is not None else None
+
+    def _absolute(self, url):
+        if _is_absolute(url):
+            return url
+        if self.base_uri is None:
+            return None
+        return urljoin(self.base_uri, url)
+
+    def url(self, field_file):
+        if not field_file:
+            return None
+        return self._absolute(storage_url(field_file.name))
+
+    def srcset(self, field_file):
+        if not field_file:
+            return None
+        if _is_absolute(storage_url(field_file.name)):
+            return storage_srcset(field_file.name)
+        if self.base_uri is None:
+            return None
+        return ', '.join(
+            f"{self._absolute(url)} {descriptor}"
+            for url, descriptor in (c.rsplit(' ', 1) for c in storage_srcset(field_file.name).split(', '))
+        )
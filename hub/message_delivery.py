@@ -0,0 +1,116 @@
+"""
+Asynchronous message notifications.
+
+Sending a message inserts the ``Message`` and a pending ``MessageDelivery``
+in one transaction and returns; the in-app notification and the email are
+produced afterwards by a background worker (or the ``deliver_messages``
+command), so the request never waits on SMTP. The notification is written
+in the same transaction that marks the delivery done, and the email is sent
+after it: a failed email is left to ``send_notification_digests`` rather
+than retried with the delivery. Emails are rate limited per receiver:
+beyond ``MESSAGE_EMAIL_RATE_LIMIT`` per ``MESSAGE_EMAIL_RATE_WINDOW`` the
+notification is still created, but its email is left to the digests too.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import MessageDelivery
+from .services import NotificationService
+from .workers import QueueWorker
+
+logger = logging.getLogger(__name__)
+
+RATE_KEY_PREFIX = 'message_email_rate:'
+
+
+def enqueue(message):
+    """Queue delivery of a freshly inserted message; call inside the transaction that inserted it"""
+    MessageDelivery.objects.create(message=message)
+    if getattr(settings, 'MESSAGE_DELIVERY_BACKGROUND', True):
+        transaction.on_commit(delivery_worker.notify)
+
+
+def email_allowed(receiver_id):
+    """Take one email from the receiver's allowance for the current window"""
+    limit = getattr(settings, 'MESSAGE_EMAIL_RATE_LIMIT', 5)
+    window = getattr(settings, 'MESSAGE_EMAIL_RATE_WINDOW', 15 * 60)
+    key = f"{RATE_KEY_PREFIX}{receiver_id}"
+    cache.add(key, 0, window)
+    try:
+        return cache.incr(key) <= limit
+    except ValueError:
+        # The window expired between add() and incr()
+        cache.set(key, 1, window)
+        return True
+
+
+def _claim(limit, retry_failed):
+    """Mark up to ``limit`` deliveries as processing; claims left by a dead worker are taken over.
+
+    A dead worker's claim that has used up its attempts is marked failed
+    instead, so it does not sit in 'processing' forever.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'MESSAGE_DELIVERY_CLAIM_TIMEOUT', 5 * 60))
+    max_attempts = getattr(settings, 'MESSAGE_DELIVERY_MAX_ATTEMPTS', 5)
+    claimable = Q(status='pending') | Q(status='processing', claimed_at__lt=stale)
+    if retry_failed:
+        claimable |= Q(status='failed')
+    with transaction.atomic():
+        MessageDelivery.objects.filter(status='processing', claimed_at__lt=stale, attempts__gte=max_attempts).update(
+            status='failed', last_error='Worker stopped before finishing the last attempt'
+        )
+        pks = list(
+            MessageDelivery.objects.select_for_update(skip_locked=True)
+            .filter(claimable, attempts__lt=max_attempts)
+            .order_by('created_at')
+            .values_list('pk', flat=True)[:limit]
+        )
+        MessageDelivery.objects.filter(pk__in=pks).update(
+            status='processing', claimed_at=now, attempts=F('attempts') + 1
+        )
+    return pks
+
+
+def deliver_pending(limit=100, retry_failed=True):
+    """Deliver one batch of queued messages, oldest first; returns the number handled"""
+    pks = _claim(limit, retry_failed)
+    if not pks:
+        return 0
+    deliveries = (
+        MessageDelivery.objects.filter(pk__in=pks)
+        .select_related('message__sender', 'message__receiver', 'message__item')
+        .order_by('created_at')
+    )
+    for delivery in deliveries:
+        message = delivery.message
+        try:
+            # The notification and the delivered mark commit together, so a retry never notifies twice
+            with transaction.atomic():
+                notification, created = NotificationService.notify_message_received(
+                    receiver=message.receiver,
+                    sender=message.sender,
+                    item=message.item,
+                    message_content=message.content,
+                    send_email=False,
+                )
+                MessageDelivery.objects.filter(pk=delivery.pk).update(
+                    status='delivered', processed_at=timezone.now(), last_error=''
+                )
+        except Exception as e:
+            logger.error(f"Failed to deliver message {message.pk}: {str(e)}")
+            MessageDelivery.objects.filter(pk=delivery.pk).update(status='failed', last_error=str(e)[:1000])
+            continue
+        # Emails past the receiver's allowance, or that fail, go out with the digests
+        if created and email_allowed(message.receiver_id):
+            NotificationService.send_message_email(notification, message.sender, message.item, message.content)
+    return len(pks)
+
+
+delivery_worker = QueueWorker('message-delivery-worker', deliver_pending)
@@ -0,0 +1,64 @@
+"""
+Buyer-seller conversations.
+
+Messages are grouped into one ``Conversation`` per (item, buyer). The
+conversation carries a pointer to its last message, a preview and one
+unread counter per participant, all written in the same transaction as
+the message itself. The inbox is then a single query over a participant's
+conversations, and a thread is read newest first in keyset pages on
+(conversation, id) instead of scanning every message a user has exchanged.
+Notifying the receiver is queued in the same transaction (see
+``hub.message_delivery``).
+"""
+from django.db import transaction
+from django.db.models import F, Q
+
+from .message_delivery import enqueue
+from .models import Conversation, Message
+
+PREVIEW_LENGTH = Conversation._meta.get_field('preview').max_length
+
+
+def inbox(user):
+    return (
+        Conversation.objects.filter(Q(buyer=user) | Q(seller=user))
+        .select_related('item', 'buyer__userprofile', 'seller__userprofile')
+        .order_by(F('last_message_at').desc(nulls_last=True), '-pk')
+    )
+
+
+def send_message(sender, item, content, conversation=None):
+    """Store a message from ``sender`` and update its conversation; returns the Message.
+
+    Without ``conversation`` the sender is the buyer writing to the item's
+    seller and the thread is created on first contact.
+    """
+    with transaction.atomic():
+        if conversation is None:
+            conversation, _ = Conversation.objects.get_or_create(
+                item=item, buyer=sender, defaults={'seller_id': item.seller_id}
+            )
+        receiver_id = conversation.seller_id if sender.pk == conversation.buyer_id else conversation.buyer_id
+        message = Message.objects.create(
+            sender=sender,
+            receiver_id=receiver_id,
+            item_id=conversation.item_id,
+            conversation=conversation,
+            content=content,
+        )
+        unread = 'seller_unread' if receiver_id == conversation.seller_id else 'buyer_unread'
+        Conversation.objects.filter(pk=conversation.pk).update(
+            last_message=message,
+            last_message_at=message.timestamp,
+            preview=content[:PREVIEW_LENGTH],
+            **{unread: F(unread) + 1}
+        )
+        enqueue(message)
+    return message
+
+
+def mark_read(conversation, user):
+    unread = 'buyer_unread' if user.pk == conversation.buyer_id else 'seller_unread'
+    if getattr(conversation, unread):
+        Conversation.objects.filter(pk=conversation.pk).update(**{unread: 0})
+        setattr(conversation, unread, 0)
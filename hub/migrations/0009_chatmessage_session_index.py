@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 12:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0008_update_image_paths'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['session_id', 'timestamp'], name='hub_chatmes_session_4611d3_idx'),
+        ),
+    ]
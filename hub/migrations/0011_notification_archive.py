@@ -0,0 +1,87 @@
+# Generated by Django 5.2 on 2026-10-19 13:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def partition_archive_on_postgres(apps, schema_editor):
+    """Rebuild the (empty) archive table as range-partitioned by month"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in [
+        'ALTER TABLE hub_notificationarchive RENAME TO hub_notificationarchive_unpartitioned',
+        'CREATE TABLE hub_notificationarchive (LIKE hub_notificationarchive_unpartitioned '
+        'INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS) PARTITION BY RANGE (created_at)',
+        'DROP TABLE hub_notificationarchive_unpartitioned',
+        # The partition key has to be part of the primary key
+        'ALTER TABLE hub_notificationarchive ADD PRIMARY KEY (id, created_at)',
+        'ALTER TABLE hub_notificationarchive ADD CONSTRAINT hub_notificationarchive_user_id_fk '
+        'FOREIGN KEY (user_id) REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED',
+        'CREATE INDEX hub_notific_user_id_3e3158_idx ON hub_notificationarchive (user_id, created_at DESC)',
+        'CREATE TABLE hub_notificationarchive_default PARTITION OF hub_notificationarchive DEFAULT',
+    ]:
+        schema_editor.execute(statement)
+
+
+def unpartition_archive_on_postgres(apps, schema_editor):
+    """Turn the archive back into a plain table, keeping its rows, before the model is unwound"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in [
+        'CREATE TABLE hub_notificationarchive_plain (LIKE hub_notificationarchive '
+        'INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS)',
+        'INSERT INTO hub_notificationarchive_plain SELECT * FROM hub_notificationarchive',
+        # Drops every monthly partition with it
+        'DROP TABLE hub_notificationarchive',
+        'ALTER TABLE hub_notificationarchive_plain RENAME TO hub_notificationarchive',
+        "SELECT setval(pg_get_serial_sequence('hub_notificationarchive', 'id'), "
+        'COALESCE(MAX(id), 0) + 1, false) FROM hub_notificationarchive',
+        'ALTER TABLE hub_notificationarchive ADD PRIMARY KEY (id)',
+        'ALTER TABLE hub_notificationarchive ADD CONSTRAINT hub_notificationarchive_user_id_fk '
+        'FOREIGN KEY (user_id) REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED',
+        'CREATE INDEX hub_notific_user_id_3e3158_idx ON hub_notificationarchive (user_id, created_at DESC)',
+        'CREATE INDEX hub_notificationarchive_user_id_00e08706 ON hub_notificationarchive (user_id)',
+    ]:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0010_notification_coalescing'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(choices=[('item_added', 'Item Added'), ('item_sold', 'Item Sold'), ('item_purchased', 'Item Purchased'), ('review_received', 'Review Received'), ('message_received', 'Message Received'), ('order_status', 'Order Status Update')], max_length=20)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('related_item_id', models.BigIntegerField(blank=True, null=True)),
+                ('occurrences', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at'], name='hub_notific_user_id_b07067_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationarchive',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notificationarchive',
+            index=models.Index(fields=['user', '-created_at'], name='hub_notific_user_id_3e3158_idx'),
+        ),
+        migrations.RunPython(partition_archive_on_postgres, unpartition_archive_on_postgres),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-19 13:12
+
+from django.db import migrations, models
+
+def backfill_provider(apps, schema_editor):
+    """Existing rows: Stripe payments carry an intent id, Razorpay ids live in stripe_charge_id"""
+    Payment = apps.get_model('hub', 'Payment')
+    Payment.objects.exclude(stripe_payment_intent_id__isnull=True).exclude(stripe_payment_intent_id='').update(provider='stripe')
+    Payment.objects.filter(provider='').exclude(stripe_charge_id__isnull=True).exclude(stripe_charge_id='').update(provider='razorpay')
+    Payment.objects.filter(provider='').update(provider='cod')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0012_webhook_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='provider',
+            field=models.CharField(blank=True, default='', max_length=30),
+        ),
+        migrations.RunPython(backfill_provider, migrations.RunPython.noop),
+    ]
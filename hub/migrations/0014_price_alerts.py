@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0013_payment_provider'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='watchlist',
+            name='alerted_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('item_added', 'Item Added'), ('item_sold', 'Item Sold'), ('item_purchased', 'Item Purchased'), ('review_received', 'Review Received'), ('message_received', 'Message Received'), ('order_status', 'Order Status Update'), ('price_drop', 'Price Drop')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='notificationarchive',
+            name='notification_type',
+            field=models.CharField(choices=[('item_added', 'Item Added'), ('item_sold', 'Item Sold'), ('item_purchased', 'Item Purchased'), ('review_received', 'Review Received'), ('message_received', 'Message Received'), ('order_status', 'Order Status Update'), ('price_drop', 'Price Drop')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='watchlist',
+            index=models.Index(fields=['item', 'price_threshold'], name='hub_watchli_item_id_eb43b5_idx'),
+        ),
+    ]
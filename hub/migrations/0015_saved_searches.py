@@ -0,0 +1,69 @@
+# Generated by Django 5.2 on 2026-10-19 13:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0014_price_alerts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('item_added', 'Item Added'), ('item_sold', 'Item Sold'), ('item_purchased', 'Item Purchased'), ('review_received', 'Review Received'), ('message_received', 'Message Received'), ('order_status', 'Order Status Update'), ('price_drop', 'Price Drop'), ('saved_search_match', 'Saved Search Match')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='notificationarchive',
+            name='notification_type',
+            field=models.CharField(choices=[('item_added', 'Item Added'), ('item_sold', 'Item Sold'), ('item_purchased', 'Item Purchased'), ('review_received', 'Review Received'), ('message_received', 'Message Received'), ('order_status', 'Order Status Update'), ('price_drop', 'Price Drop'), ('saved_search_match', 'Saved Search Match')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('query', models.CharField(blank=True, max_length=200)),
+                ('category', models.CharField(blank=True, max_length=50)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('term_count', models.PositiveSmallIntegerField(default=0, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedSearchMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_search_matches', to='hub.item')),
+                ('saved_search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='hub.savedsearch')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'unique_together': {('saved_search', 'item')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('saved_search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='hub.savedsearch')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term'], name='hub_savedse_term_5a267f_idx')],
+                'unique_together': {('saved_search', 'term')},
+            },
+        ),
+    ]
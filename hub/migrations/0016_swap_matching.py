@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-19 13:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0015_saved_searches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SwapCycle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True)),
+                ('size', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['size', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SwapCycleMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('cycle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='hub.swapcycle')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='swap_cycle_memberships', to='hub.item')),
+            ],
+            options={
+                'ordering': ['position'],
+                'unique_together': {('cycle', 'item')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SwapEdge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('from_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='swap_edges_out', to='hub.item')),
+                ('to_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='swap_edges_in', to='hub.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['to_item'], name='hub_swapedg_to_item_d0cf24_idx')],
+                'unique_together': {('from_item', 'to_item')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SwapTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('offer', 'Offers'), ('want', 'Wants')], max_length=5)),
+                ('term', models.CharField(max_length=50)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='swap_terms', to='hub.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'term'], name='hub_swapter_kind_0161fc_idx')],
+                'unique_together': {('item', 'kind', 'term')},
+            },
+        ),
+    ]
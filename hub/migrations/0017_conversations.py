@@ -0,0 +1,77 @@
+# Generated by Django 5.2 on 2026-10-19 13:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+def backfill_conversations(apps, schema_editor):
+    """Group existing messages into (item, buyer) threads; history counts as read"""
+    Conversation = apps.get_model('hub', 'Conversation')
+    Message = apps.get_model('hub', 'Message')
+    threads = {}
+    for pk, sender_id, receiver_id, item_id, seller_id in (
+        Message.objects.order_by('pk').values_list('pk', 'sender_id', 'receiver_id', 'item_id', 'item__seller_id').iterator()
+    ):
+        buyer_id = receiver_id if sender_id == seller_id else sender_id
+        threads.setdefault((item_id, buyer_id, seller_id), []).append(pk)
+    for (item_id, buyer_id, seller_id), pks in threads.items():
+        last = Message.objects.get(pk=pks[-1])
+        conversation = Conversation.objects.create(
+            item_id=item_id,
+            buyer_id=buyer_id,
+            seller_id=seller_id,
+            last_message=last,
+            last_message_at=last.timestamp,
+            preview=last.content[:200],
+        )
+        Message.objects.filter(pk__in=pks).update(conversation=conversation)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0016_swap_matching'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('preview', models.CharField(blank=True, max_length=200)),
+                ('buyer_unread', models.PositiveIntegerField(default=0)),
+                ('seller_unread', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('buyer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buyer_conversations', to=settings.AUTH_USER_MODEL)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to='hub.item')),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='hub.message')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seller_conversations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-last_message_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='hub.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', '-id'], name='hub_message_convers_28e58f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['buyer', '-last_message_at'], name='hub_convers_buyer_i_4b4410_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['seller', '-last_message_at'], name='hub_convers_seller__858c4c_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='conversation',
+            unique_together={('item', 'buyer')},
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 13:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0017_conversations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['seller', '-created_at'], name='hub_item_seller__ab369c_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 14:04
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+def close_duplicate_digests(apps, schema_editor):
+    """Keep the newest unread row per (user, type, item) open; mark older duplicates read"""
+    Notification = apps.get_model('hub', 'Notification')
+    open_rows = Notification.objects.filter(is_read=False, notification_type='message_received', related_item__isnull=False)
+    duplicated = (
+        open_rows.values('user_id', 'related_item_id')
+        .annotate(rows=Count('id')).filter(rows__gt=1)
+    )
+    for key in duplicated:
+        rows = open_rows.filter(user_id=key['user_id'], related_item_id=key['related_item_id']).order_by('-created_at', '-pk')
+        newest = rows.values_list('pk', flat=True).first()
+        rows.exclude(pk=newest).update(is_read=True)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0019_message_delivery'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_digests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_read', False), ('notification_type__in', ('message_received',))), fields=('user', 'notification_type', 'related_item'), name='unique_open_coalesced_notification'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-19 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0020_notification_coalescing_constraint'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='swapterm',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='swapterm',
+            name='group',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterUniqueTogether(
+            name='swapterm',
+            unique_together={('item', 'kind', 'group', 'term')},
+        ),
+    ]
@@ -1,4 +1,9 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import F, Sum
+from django.db.models.functions import Round
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 # UserProfile to extend User with student_id
@@ -63,20 +68,88 @@ class Item(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # A seller's listings newest first (profile page)
+            models.Index(fields=['seller', '-created_at']),
+        ]
+
     def __str__(self):
         return self.name
 
+# Conversation: one thread per (item, buyer), kept current by hub.messaging
+class Conversation(models.Model):
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='conversations')
+    buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='buyer_conversations')
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='seller_conversations')
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    preview = models.CharField(max_length=200, blank=True)
+    buyer_unread = models.PositiveIntegerField(default=0)
+    seller_unread = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['item', 'buyer']
+        ordering = ['-last_message_at']
+        indexes = [
+            # Inbox: a participant's threads, most recent first
+            models.Index(fields=['buyer', '-last_message_at']),
+            models.Index(fields=['seller', '-last_message_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.buyer.username} and {self.seller.username} about {self.item.name}"
+
+    def other_participant(self, user):
+        return self.seller if user.pk == self.buyer_id else self.buyer
+
+    def unread_for(self, user):
+        return self.buyer_unread if user.pk == self.buyer_id else self.seller_unread
+
 # Message model for internal messaging
 class Message(models.Model):
     sender = models.ForeignKey(User, related_name='sent_messages', on_delete=models.CASCADE)
     receiver = models.ForeignKey(User, related_name='received_messages', on_delete=models.CASCADE)
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, null=True, blank=True, related_name='messages')
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Thread pages are keyset reads on (conversation, id)
+            models.Index(fields=['conversation', '-id']),
+        ]
+
     def __str__(self):
         return f"From {self.sender.username} to {self.receiver.username} about {self.item.name}"
 
+# Queued notification work for a message (see hub.message_delivery)
+class MessageDelivery(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('delivered', 'Delivered'),
+        ('failed', 'Failed'),
+    ]
+
+    message = models.OneToOneField(Message, on_delete=models.CASCADE, related_name='delivery')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Delivery of message {self.message_id} ({self.status})"
+
 # Cart model for shopping cart functionality
 class Cart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -105,6 +178,18 @@ class CartItem(models.Model):
     def get_total_price(self):
         return self.item.price * self.quantity if self.item.price else 0
 
+CENTS = Decimal('0.01')
+
+
+def line_total_sum(prefix=''):
+    """``Sum(price_at_time * quantity)`` over order items, optionally through a relation prefix.
+
+    Rounded to cents in SQL: SQLite multiplies decimals as floats, and
+    30.299999999999997 would not compare equal to a stored 30.30.
+    """
+    money = models.DecimalField(max_digits=10, decimal_places=2)
+    return Round(Sum(F(f'{prefix}price_at_time') * F(f'{prefix}quantity'), output_field=money), 2, output_field=money)
+
 # Order model for completed purchases
 class Order(models.Model):
     STATUS_CHOICES = [
@@ -127,6 +212,14 @@ class Order(models.Model):
     def __str__(self):
         return f"Order {self.id} by {self.buyer.username}"
 
+    def calculate_total(self):
+        """Sum of the order's line items, computed in the database.
+
+        ``total_amount`` is stored at checkout and is what the payment path
+        charges; this is for recomputing it (see ``check_order_totals``).
+        """
+        return (self.orderitem_set.aggregate(total=line_total_sum())['total'] or Decimal('0.00')).quantize(CENTS)
+
 # OrderItem model for individual items in orders
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
@@ -151,6 +244,7 @@ class Payment(models.Model):
     ]
     
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='payments')
+    provider = models.CharField(max_length=30, blank=True, default='')  # key in settings.PAYMENT_PROVIDERS
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=3, default='INR')
     status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending')
@@ -165,6 +259,40 @@ class Payment(models.Model):
     def get_amount_display(self):
         return f"{self.currency} {self.amount}"
 
+class WebhookEvent(models.Model):
+    """Payment provider webhook deliveries, stored once per provider event id"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+
+    provider = models.CharField(max_length=20)
+    event_id = models.CharField(max_length=255)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'event_id'], name='unique_webhook_event'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'received_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_type} {self.event_id} ({self.status})"
+
+# Types folded into one unread row per (user, type, item); see NotificationService.notify_coalesced
+COALESCED_NOTIFICATION_TYPES = ('message_received',)
+
+
 class Notification(models.Model):
     NOTIFICATION_TYPES = [
         ('item_added', 'Item Added'),
@@ -173,6 +301,8 @@ class Notification(models.Model):
         ('review_received', 'Review Received'),
         ('message_received', 'Message Received'),
         ('order_status', 'Order Status Update'),
+        ('price_drop', 'Price Drop'),
+        ('saved_search_match', 'Saved Search Match'),
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
@@ -183,13 +313,53 @@ class Notification(models.Model):
     related_order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True, blank=True)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bursts of the same event are folded into one row (see NotificationService.notify_coalesced)
+    occurrences = models.PositiveIntegerField(default=1)
+    emailed_occurrences = models.PositiveIntegerField(default=1)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'notification_type', 'related_item', 'is_read']),
+            models.Index(fields=['user', '-created_at']),
+        ]
+        constraints = [
+            # Concurrent first notifications cannot both insert; the loser folds into the winner
+            models.UniqueConstraint(
+                fields=['user', 'notification_type', 'related_item'],
+                condition=models.Q(is_read=False, notification_type__in=COALESCED_NOTIFICATION_TYPES),
+                name='unique_open_coalesced_notification',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.title}"
 
+class NotificationArchive(models.Model):
+    """Read notifications moved out of the hot table by ``archive_notifications``.
+
+    On PostgreSQL the table is range-partitioned by month on ``created_at``
+    (see migration 0011 and ``hub.retention``), so expired months are
+    dropped whole instead of deleted row by row.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    related_item_id = models.BigIntegerField(null=True, blank=True)
+    occurrences = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.title} (archived)"
+
 class Review(models.Model):
     RATING_CHOICES = [
         (1, '1 - Poor'),
@@ -230,10 +400,14 @@ class ChatMessage(models.Model):
     session_id = models.CharField(max_length=100)  # To group conversation
     message_type = models.CharField(max_length=10, choices=MESSAGE_TYPES)
     content = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the turn happens, not when the buffered write reaches the DB
+    timestamp = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['session_id', 'timestamp']),
+        ]
     
     def __str__(self):
         return f"{self.session_id} - {self.message_type} - {self.timestamp}"
@@ -263,20 +437,119 @@ class SwapProposal(models.Model):
     def __str__(self):
         return f"Swap: {self.offered_item.name} for {self.requested_item.name}"
 
+# Swap matching index and suggestions (see hub.swap_matching)
+class SwapTerm(models.Model):
+    """Inverted index: one row per term a listing offers or wants"""
+    KIND_CHOICES = [
+        ('offer', 'Offers'),
+        ('want', 'Wants'),
+    ]
+    
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='swap_terms')
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES)
+    term = models.CharField(max_length=50)
+    # Wants are alternatives ("calculator or textbook"); terms sharing a group are all required
+    group = models.PositiveSmallIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['item', 'kind', 'group', 'term']
+        indexes = [
+            models.Index(fields=['kind', 'term']),
+        ]
+
+class SwapEdge(models.Model):
+    """The owner of from_item would swap it for to_item"""
+    from_item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='swap_edges_out')
+    to_item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='swap_edges_in')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['from_item', 'to_item']
+        indexes = [
+            models.Index(fields=['to_item']),
+        ]
+
+class SwapCycle(models.Model):
+    """A suggested swap: each member's owner receives the next member's item"""
+    # Member item ids joined by '-', rotated to start at the smallest
+    key = models.CharField(max_length=200, unique=True)
+    size = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['size', '-created_at']
+    
+    def __str__(self):
+        return f"Swap cycle {self.key}"
+
+class SwapCycleMember(models.Model):
+    cycle = models.ForeignKey(SwapCycle, on_delete=models.CASCADE, related_name='members')
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='swap_cycle_memberships')
+    position = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        unique_together = ['cycle', 'item']
+        ordering = ['position']
+
 # Watchlist & Price Alerts
 class Watchlist(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='watchlist')
     item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='watchers')
     price_threshold = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    # Price the watcher was last alerted at; cleared when the price rises again (see hub.price_alerts)
+    alerted_price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         unique_together = ['user', 'item']
         ordering = ['-created_at']
+        indexes = [
+            # Range scan for "threshold >= new price" on one item
+            models.Index(fields=['item', 'price_threshold']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} watching {self.item.name}"
 
+# Saved Searches, matched against new listings (see hub.saved_searches)
+class SavedSearch(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100, blank=True)
+    query = models.CharField(max_length=200, blank=True)
+    category = models.CharField(max_length=50, blank=True)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    # Number of index terms a listing must contain to match
+    term_count = models.PositiveSmallIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.name or self.query or self.category or 'all listings'}"
+
+class SavedSearchTerm(models.Model):
+    """Inverted index: one row per term of a saved search"""
+    saved_search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=50)
+    
+    class Meta:
+        unique_together = ['saved_search', 'term']
+        indexes = [
+            models.Index(fields=['term']),
+        ]
+
+class SavedSearchMatch(models.Model):
+    saved_search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='matches')
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='saved_search_matches')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['saved_search', 'item']
+        ordering = ['-created_at']
+
 # Item Reporting System
 class Report(models.Model):
     REASON_CHOICES = [
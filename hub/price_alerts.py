@@ -0,0 +1,105 @@
+"""
+Price-drop alerts for ``Watchlist.price_threshold``.
+
+A watcher is alerted when an item's price falls to or below their
+threshold. Matching watchers are found with one range scan on the
+(item, price_threshold) index instead of iterating watchers, and each
+batch becomes one ``bulk_create`` of notifications plus one UPDATE of
+``alerted_price``, so an item with thousands of watchers costs a handful of
+queries. The notifications are emailed later by ``send_notification_digests``.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Notification, Watchlist
+from .services import NotificationService
+
+logger = logging.getLogger(__name__)
+
+
+def _not_yet_alerted(price):
+    # Alert again only if the price fell below the last alert
+    return Q(alerted_price__isnull=True) | Q(alerted_price__gt=price)
+
+
+def _claim(queryset, batch_size):
+    """Lock up to ``batch_size`` matching watches; concurrent runs skip each other's rows"""
+    return list(
+        queryset.select_for_update(skip_locked=True, of=('self',))
+        .order_by('pk')
+        .values_list('pk', 'user_id', 'price_threshold', 'item_id', 'item__name', 'item__price')[:batch_size]
+    )
+
+
+def _send_alerts(rows):
+    # A newer alert supersedes one for the same item that has not been emailed yet
+    watchers_by_item = {}
+    for _, user_id, _, item_id, _, _ in rows:
+        watchers_by_item.setdefault(item_id, []).append(user_id)
+    for item_id, user_ids in watchers_by_item.items():
+        Notification.objects.filter(
+            notification_type='price_drop', related_item_id=item_id, user_id__in=user_ids, emailed_occurrences=0
+        ).update(emailed_occurrences=1)
+
+    NotificationService.create_bulk([
+        Notification(
+            user_id=user_id,
+            notification_type='price_drop',
+            title=f"Price drop: {item_name}",
+            message=f"'{item_name}' is now ₹{price}, at or below your alert price of ₹{threshold}.",
+            related_item_id=item_id,
+            emailed_occurrences=0,  # picked up by the digest job
+        )
+        for _, user_id, threshold, item_id, item_name, price in rows
+    ])
+
+    by_price = {}
+    for pk, _, _, _, _, price in rows:
+        by_price.setdefault(price, []).append(pk)
+    for price, pks in by_price.items():
+        Watchlist.objects.filter(pk__in=pks).update(alerted_price=price)
+
+
+def _run(queryset, batch_size):
+    alerted = 0
+    while True:
+        with transaction.atomic():
+            rows = _claim(queryset, batch_size)
+            if rows:
+                _send_alerts(rows)
+        if len(rows) < batch_size:
+            return alerted + len(rows)
+        alerted += len(rows)
+
+
+def alert_price_drop(item_id, price, batch_size=1000):
+    """Alert every watcher of ``item_id`` whose threshold ``price`` now meets; returns the count"""
+    queryset = Watchlist.objects.filter(
+        _not_yet_alerted(price),
+        item_id=item_id,
+        price_threshold__gte=price,
+        item__is_active=True,
+    )
+    alerted = _run(queryset, batch_size)
+    if alerted:
+        logger.info(f"Sent {alerted} price-drop alerts for item {item_id} at {price}")
+    return alerted
+
+
+def rearm_alerts(item_id, price):
+    """The price went back up: watchers alerted below ``price`` are alerted again on the next drop"""
+    return Watchlist.objects.filter(item_id=item_id, alerted_price__lt=price).update(alerted_price=None)
+
+
+def sweep_price_alerts(batch_size=1000):
+    """Catch-up pass over every active item; returns (alerted, rearmed)"""
+    rearmed = Watchlist.objects.filter(alerted_price__lt=F('item__price')).update(alerted_price=None)
+    queryset = Watchlist.objects.filter(
+        _not_yet_alerted(F('item__price')),
+        item__is_active=True,
+        item__price__isnull=False,
+        price_threshold__gte=F('item__price'),
+    )
+    return _run(queryset, batch_size), rearmed
@@ -0,0 +1,74 @@
+"""
+Payment provider registry.
+
+Providers are plugins named in ``settings.PAYMENT_PROVIDERS`` by dotted
+path, next to the name, icon and description shown at checkout. Nothing is
+imported until a provider is first asked for by name, so rendering the
+checkout page or taking cash-on-delivery orders never loads a payment SDK
+or opens a gateway session. Adding a provider means writing a
+``PaymentProvider`` subclass and listing it in the setting; the views,
+webhook endpoint and reconciliation job look providers up by name.
+"""
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .base import PaymentProvider, ProviderError, WebhookError
+
+__all__ = ['PaymentProvider', 'ProviderError', 'WebhookError', 'ProviderRegistry', 'payment_providers']
+
+
+class ProviderRegistry:
+    def __init__(self):
+        self._entries = None
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def _registered(self):
+        if self._entries is None:
+            self._entries = dict(getattr(settings, 'PAYMENT_PROVIDERS', {}))
+        return self._entries
+
+    def register(self, name, path, **options):
+        """Add or replace a provider by dotted path; it is imported on first use"""
+        with self._lock:
+            self._registered()[name] = {'path': path, **options}
+            self._instances.pop(name, None)
+
+    def names(self):
+        """Providers that can take payments, in setting order"""
+        return [name for name, entry in self._registered().items() if entry.get('path')]
+
+    def get(self, name):
+        provider = self._instances.get(name)
+        if provider is None:
+            with self._lock:
+                provider = self._instances.get(name)
+                if provider is None:
+                    path = self._registered().get(name, {}).get('path')
+                    if not path:
+                        raise ProviderError(f"Unknown payment provider '{name}'")
+                    provider = import_string(path)()
+                    provider.name = name
+                    self._instances[name] = provider
+        return provider
+
+    def loaded(self):
+        """Names of providers instantiated so far in this process"""
+        return list(self._instances)
+
+    def options(self):
+        """Checkout options from the setting, in order; reads no provider code"""
+        return {
+            name: {
+                'enabled': bool(entry.get('path')) and entry.get('enabled', True),
+                'name': entry.get('name', name),
+                'icon': entry.get('icon', ''),
+                'description': entry.get('description', ''),
+            }
+            for name, entry in self._registered().items()
+        }
+
+
+payment_providers = ProviderRegistry()
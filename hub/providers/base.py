@@ -0,0 +1,61 @@
+from ..models import Order, Payment
+
+
+class ProviderError(Exception):
+    pass
+
+
+class WebhookError(ProviderError):
+    """The webhook request could not be authenticated or parsed"""
+
+
+class PaymentProvider:
+    """Common interface for payment providers.
+
+    ``create`` starts a payment for an order and returns what the checkout
+    page needs; ``capture`` and ``refund`` act on a stored ``Payment``;
+    ``parse_webhook`` authenticates a webhook request and returns
+    ``(event_id, event_type, payload)``; ``handle_event`` applies a stored
+    event and returns False for event types it does not act on.
+    """
+    name = None  # set by the registry
+    configured = True
+    reconcilable = False  # implements fetch_status
+
+    def create(self, order):
+        raise NotImplementedError
+
+    def capture(self, payment):
+        raise NotImplementedError
+
+    def refund(self, payment):
+        """Return the money; False means the refund has to be made by hand"""
+        return False
+
+    def parse_webhook(self, request):
+        raise WebhookError(f"{self.name} does not send webhooks")
+
+    def handle_event(self, event_type, payload):
+        return False
+
+    def fetch_status(self, payment):
+        """Current provider-side status mapped to a ``Payment`` status, or None if unknown"""
+        return None
+
+    def handles(self, payment):
+        return payment.provider == self.name
+
+    def open_payment(self, order):
+        """Lock the order and return its pending payment with this provider, if any.
+
+        Call inside a transaction: checkouts of one order queue on the lock,
+        so a double click or refresh reuses the first payment instead of
+        starting another.
+        """
+        list(Order.objects.select_for_update().filter(pk=order.pk).values_list('pk'))
+        return (
+            Payment.objects.filter(order=order, provider=self.name, status='pending', amount=order.total_amount)
+            .exclude(stripe_payment_intent_id=None)
+            .order_by('-created_at')
+            .first()
+        )
@@ -0,0 +1,23 @@
+from django.utils import timezone
+
+from ..models import Payment
+from .base import PaymentProvider
+
+
+class CashOnDeliveryProvider(PaymentProvider):
+    def create(self, order):
+        return Payment.objects.create(
+            order=order,
+            provider=self.name,
+            amount=order.total_amount,
+            currency='INR',
+            status='pending',
+        )
+
+    def capture(self, payment):
+        # Cash was collected on delivery
+        Payment.objects.filter(pk=payment.pk, status='pending').update(status='completed', updated_at=timezone.now())
+
+    def refund(self, payment):
+        # Cash refunds are handled by hand
+        return False
@@ -0,0 +1,108 @@
+import json
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from ..gateway import get_stripe_gateway
+from ..models import Payment
+from ..webhooks import apply_payment
+from .base import PaymentProvider, WebhookError
+
+logger = logging.getLogger(__name__)
+
+# PaymentIntent status -> Payment status; anything unlisted leaves the row alone
+STATUSES = {
+    'succeeded': 'completed',
+    'processing': 'processing',
+    'canceled': 'failed',
+}
+
+
+class StripeProvider(PaymentProvider):
+    reconcilable = True
+
+    @property
+    def configured(self):
+        return bool(getattr(settings, 'STRIPE_SECRET_KEY', ''))
+
+    def create(self, order):
+        with transaction.atomic():
+            payment = self.open_payment(order)
+            if payment is not None:
+                intent = get_stripe_gateway().retrieve_payment_intent(payment.stripe_payment_intent_id)
+                if intent['status'] != 'canceled':
+                    return {'client_secret': intent['client_secret']}
+                payment.status = 'failed'
+                payment.save(update_fields=['status', 'updated_at'])
+            intent = get_stripe_gateway().create_payment_intent(
+                amount=int(order.total_amount * 100),  # Convert to cents
+                currency='inr',
+                metadata={
+                    'order_id': order.id,
+                    'user_id': order.buyer_id,
+                    'seller_id': order.seller_id
+                }
+            )
+            # Recorded now so reconciliation can settle it if the webhook never arrives
+            Payment.objects.create(
+                order=order,
+                provider=self.name,
+                amount=order.total_amount,
+                currency='INR',
+                status='pending',
+                stripe_payment_intent_id=intent['id'],
+            )
+        return {'client_secret': intent['client_secret']}
+
+    def capture(self, payment):
+        get_stripe_gateway().capture_payment_intent(payment.stripe_payment_intent_id)
+
+    def refund(self, payment):
+        get_stripe_gateway().create_refund(payment.stripe_payment_intent_id)
+        return True
+
+    def parse_webhook(self, request):
+        # The SDK is only needed to verify signatures, so it is imported here
+        try:
+            import stripe
+        except ImportError:
+            raise WebhookError('stripe package is not installed')
+        try:
+            event = stripe.Webhook.construct_event(
+                request.body, request.META.get('HTTP_STRIPE_SIGNATURE'), settings.STRIPE_WEBHOOK_SECRET
+            )
+        except (ValueError, stripe.error.SignatureVerificationError) as e:
+            raise WebhookError(str(e))
+        return event['id'], event['type'], json.loads(request.body)
+
+    def handle_event(self, event_type, payload):
+        if event_type == 'payment_intent.succeeded':
+            status = 'completed'
+        elif event_type == 'payment_intent.payment_failed':
+            status = 'failed'
+        else:
+            return False
+        payment_intent = payload['data']['object']
+        order_id = payment_intent['metadata']['order_id']
+        apply_payment(
+            self.name,
+            order_id,
+            {'stripe_payment_intent_id': payment_intent['id']},
+            Decimal(payment_intent['amount']) / 100,  # Convert from cents
+            payment_intent['currency'],
+            status,
+        )
+        if status == 'completed' and payment_intent.get('latest_charge'):
+            Payment.objects.filter(stripe_payment_intent_id=payment_intent['id']).update(
+                stripe_charge_id=payment_intent['latest_charge']
+            )
+        logger.info(f"Stripe payment {status} for order {order_id}")
+        return True
+
+    def fetch_status(self, payment):
+        intent = get_stripe_gateway().retrieve_payment_intent(payment.stripe_payment_intent_id)
+        if intent['status'] == 'requires_payment_method' and intent.get('last_payment_error'):
+            return 'failed'
+        return STATUSES.get(intent['status'])
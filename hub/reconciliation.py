@@ -0,0 +1,177 @@
+"""
+Payment reconciliation.
+
+Pending and processing ``Payment`` rows are paged by primary key, their
+provider state is fetched concurrently under a shared rate limit, and the
+resulting transitions are applied per page with one locked bulk update per
+status. Orders are locked first, in the same order the webhook handlers
+lock them, so a payment settled here is never announced twice.
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Order, Payment
+from .providers import payment_providers
+from .webhooks import _notify_order_paid
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ('pending', 'processing')
+
+
+class RateLimiter:
+    """Token bucket shared by all fetch threads"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class MockProvider:
+    """Offline stand-in that answers for every online payment after a simulated round trip"""
+    name = 'mock'
+
+    def __init__(self, latency=0.05, statuses=None, default='completed'):
+        self.latency = latency
+        self.statuses = statuses or {}
+        self.default = default
+
+    def handles(self, payment):
+        return payment.provider != 'cod'
+
+    def fetch_status(self, payment):
+        if self.latency:
+            time.sleep(random.uniform(0.5, 1.5) * self.latency)
+        return self.statuses.get(payment.pk, self.default)
+
+
+def default_providers():
+    """Registered providers that can report payment state and have credentials"""
+    providers = (payment_providers.get(name) for name in payment_providers.names())
+    return [provider for provider in providers if provider.reconcilable and provider.configured]
+
+
+class ReconciliationResult:
+    def __init__(self):
+        self.checked = 0
+        self.unchanged = 0
+        self.skipped = 0
+        self.errors = 0
+        self.transitions = {}  # (old, new) -> count
+
+    def record(self, old, new):
+        self.transitions[(old, new)] = self.transitions.get((old, new), 0) + 1
+
+
+class PaymentReconciler:
+    def __init__(self, providers, concurrency=8, rate=20, batch_size=200, settle_after=10 * 60, dry_run=False):
+        self.providers = providers
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate)
+        self.batch_size = batch_size
+        self.settle_after = settle_after
+        self.dry_run = dry_run
+
+    def _provider_for(self, payment):
+        for provider in self.providers:
+            if provider.handles(payment):
+                return provider
+        return None
+
+    def _fetch(self, payment):
+        provider = self._provider_for(payment)
+        if provider is None:
+            return payment, None, None, None
+        self.limiter.acquire()
+        try:
+            return payment, provider, provider.fetch_status(payment), None
+        except Exception as e:
+            return payment, provider, None, e
+
+    def _queryset(self):
+        # Fresh checkouts are left to their webhooks
+        cutoff = timezone.now() - timedelta(seconds=self.settle_after)
+        # Cash on delivery stays pending until it is collected; no provider knows better
+        return (
+            Payment.objects.filter(status__in=OPEN_STATUSES, updated_at__lt=cutoff)
+            .exclude(provider='cod')
+            .order_by('pk')
+        )
+
+    def run(self):
+        result = ReconciliationResult()
+        last_pk = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                page = list(self._queryset().filter(pk__gt=last_pk)[:self.batch_size])
+                if not page:
+                    return result
+                last_pk = page[-1].pk
+                changes = {}
+                for payment, provider, status, error in executor.map(self._fetch, page):
+                    result.checked += 1
+                    if provider is None:
+                        result.skipped += 1
+                    elif error is not None:
+                        result.errors += 1
+                        logger.warning(f"Could not fetch {provider.name} state for payment {payment.id}: {str(error)}")
+                    elif status is None or status == payment.status:
+                        result.unchanged += 1
+                    else:
+                        changes[payment.pk] = (payment.status, status)
+                if changes:
+                    self._apply(changes, result)
+
+    def _apply(self, changes, result):
+        """Apply one page of transitions; rows settled meanwhile by a webhook are left alone"""
+        if self.dry_run:
+            for old, new in changes.values():
+                result.record(old, new)
+            return
+        with transaction.atomic():
+            order_ids = sorted(set(
+                Payment.objects.filter(pk__in=changes).values_list('order_id', flat=True)
+            ))
+            list(Order.objects.select_for_update().filter(pk__in=order_ids).order_by('pk').values_list('pk'))
+            current = dict(
+                Payment.objects.filter(pk__in=changes, status__in=OPEN_STATUSES).values_list('pk', 'status')
+            )
+            by_status = {}
+            for pk, status in current.items():
+                new = changes[pk][1]
+                by_status.setdefault(new, []).append(pk)
+                result.record(status, new)
+            now = timezone.now()
+            for new, pks in by_status.items():
+                Payment.objects.filter(pk__in=pks).update(status=new, updated_at=now)
+            paid_ids = Payment.objects.filter(pk__in=by_status.get('completed', [])).values_list('order_id', flat=True)
+            # Only orders this run moves from pending are announced; the rest were confirmed already
+            paid_orders = list(Order.objects.filter(pk__in=paid_ids, status='pending').select_related('buyer'))
+            Order.objects.filter(pk__in=[order.pk for order in paid_orders]).update(
+                status='confirmed', updated_at=now
+            )
+            for order in paid_orders:
+                transaction.on_commit(lambda order=order: _notify_order_paid(order))
@@ -0,0 +1,124 @@
+"""
+Notification retention.
+
+Read notifications older than their type's retention period are copied to
+``NotificationArchive`` and deleted from the hot table in small batches, so
+per-user inbox queries only ever scan recent rows. Archived rows older than
+``NOTIFICATION_ARCHIVE_DAYS`` are purged; on PostgreSQL the archive is
+partitioned by month and expired months are dropped whole.
+"""
+import logging
+import re
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Notification, NotificationArchive
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_TABLE = NotificationArchive._meta.db_table
+PARTITION_RE = re.compile(rf"^{ARCHIVE_TABLE}_p(\d{{4}})(\d{{2}})$")
+
+_known_partitions = set()
+
+
+def expired_notifications(now=None):
+    """Read notifications past their type's retention period"""
+    now = now or timezone.now()
+    policy = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', {'default': 90})
+    explicit = [name for name in policy if name != 'default']
+    expired = Q(~Q(notification_type__in=explicit), created_at__lt=now - timedelta(days=policy['default']))
+    for name in explicit:
+        expired |= Q(notification_type=name, created_at__lt=now - timedelta(days=policy[name]))
+    return Notification.objects.filter(expired, is_read=True)
+
+
+def _month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def ensure_partitions(timestamps):
+    """Create monthly archive partitions covering ``timestamps`` (PostgreSQL only)"""
+    if connection.vendor != 'postgresql':
+        return
+    for start in {_month_start(value) for value in timestamps}:
+        name = f"{ARCHIVE_TABLE}_p{start:%Y%m}"
+        if name in _known_partitions:
+            continue
+        try:
+            # Savepoint: a failure (rows for this month already in the default
+            # partition) must not abort the surrounding archive transaction
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{ARCHIVE_TABLE}" '
+                    f'FOR VALUES FROM (%s) TO (%s)',
+                    [start, _next_month(start)]
+                )
+            _known_partitions.add(name)
+        except DatabaseError as e:
+            logger.warning(f"Could not create archive partition {name}, rows go to the default partition: {str(e)}")
+
+
+def archive_read_notifications(now=None, batch_size=1000):
+    """Move expired read notifications to the archive; returns the number moved"""
+    archived = 0
+    queryset = expired_notifications(now).order_by('pk')
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return archived
+        with transaction.atomic():
+            # Re-check under lock: a row may have been re-marked unread meanwhile
+            rows = list(Notification.objects.select_for_update().filter(pk__in=ids, is_read=True))
+            ensure_partitions(row.created_at for row in rows)
+            NotificationArchive.objects.bulk_create([
+                NotificationArchive(
+                    user_id=row.user_id,
+                    notification_type=row.notification_type,
+                    title=row.title,
+                    message=row.message,
+                    related_item_id=row.related_item_id,
+                    occurrences=row.occurrences,
+                    created_at=row.created_at,
+                )
+                for row in rows
+            ], batch_size=500)
+            Notification.objects.filter(pk__in=[row.pk for row in rows]).delete()
+        archived += len(rows)
+
+
+def purge_archive(now=None):
+    """Delete archived notifications past NOTIFICATION_ARCHIVE_DAYS; returns partitions dropped"""
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=getattr(settings, 'NOTIFICATION_ARCHIVE_DAYS', 730))
+    dropped = 0
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+                "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+                "WHERE parent.relname = %s",
+                [ARCHIVE_TABLE]
+            )
+            partitions = [row[0] for row in cursor.fetchall()]
+            for name in partitions:
+                match = PARTITION_RE.match(name)
+                if not match:
+                    continue
+                start = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=cutoff.tzinfo)
+                if _next_month(start) <= cutoff:
+                    cursor.execute(f'DROP TABLE "{name}"')
+                    _known_partitions.discard(name)
+                    dropped += 1
+    # Whatever is left (default partition, other databases) is deleted row-wise
+    NotificationArchive.objects.filter(created_at__lt=cutoff).delete()
+    return dropped
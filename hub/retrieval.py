@@ -0,0 +1,169 @@
+"""
+Offline FAQ retrieval for the chatbot.
+
+Documents are embedded with BM25-weighted term vectors, L2-normalised and
+stacked into a single NumPy matrix, so answering a query is one sparse-ish
+matrix-vector product plus a top-k selection. Everything is local; nothing
+is sent over the network.
+"""
+import logging
+import math
+import re
+from collections import Counter
+from html.parser import HTMLParser
+
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    logger.warning("NumPy not available - chatbot FAQ retrieval disabled")
+    NUMPY_AVAILABLE = False
+    np = None
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    'a an and any are as at be by can do does for from how i if in is it me my of on or '
+    'should the to what when where which who why will with you your'.split()
+)
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class FAQDocument:
+    def __init__(self, title, answer, source=''):
+        self.title = title
+        self.answer = answer
+        self.source = source
+
+    def __repr__(self):
+        return f"FAQDocument({self.title!r})"
+
+
+class FAQIndex:
+    """BM25 vector index over a fixed set of FAQ documents"""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        # Titles are repeated so the question wording counts more than the body
+        counts = [Counter(tokenize(f"{doc.title} {doc.title} {doc.answer}")) for doc in self.documents]
+        self.vocabulary = {}
+        for doc_counts in counts:
+            for term in doc_counts:
+                self.vocabulary.setdefault(term, len(self.vocabulary))
+
+        total = len(counts)
+        document_frequency = Counter(term for doc_counts in counts for term in doc_counts)
+        self.idf = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for term, column in self.vocabulary.items():
+            df = document_frequency[term]
+            self.idf[column] = math.log(1 + (total - df + 0.5) / (df + 0.5))
+
+        lengths = [sum(doc_counts.values()) for doc_counts in counts]
+        average_length = (sum(lengths) / total) if total else 0
+        self.matrix = np.zeros((total, len(self.vocabulary)), dtype=np.float32)
+        for row, doc_counts in enumerate(counts):
+            norm = self.k1 * (1 - self.b + self.b * lengths[row] / average_length)
+            for term, tf in doc_counts.items():
+                column = self.vocabulary[term]
+                self.matrix[row, column] = self.idf[column] * tf * (self.k1 + 1) / (tf + norm)
+        row_norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        row_norms[row_norms == 0] = 1
+        self.matrix /= row_norms
+
+    def _embed(self, text):
+        columns = [self.vocabulary[term] for term in tokenize(text) if term in self.vocabulary]
+        if not columns:
+            return None
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for column in columns:
+            vector[column] = self.idf[column]
+        return vector / np.linalg.norm(vector)
+
+    def search(self, query, k=3):
+        """Return up to ``k`` (score, document) pairs by cosine similarity"""
+        vector = self._embed(query)
+        if vector is None or not self.documents:
+            return []
+        scores = self.matrix @ vector
+        k = min(k, len(self.documents))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.documents[i]) for i in top if scores[i] > 0]
+
+
+class _AccordionParser(HTMLParser):
+    """Collect question/answer pairs from Bootstrap accordion markup"""
+
+    def __init__(self):
+        super().__init__()
+        self.pairs = []
+        self._mode = None
+        self._depth = 0
+        self._question = []
+        self._answer = []
+
+    def handle_starttag(self, tag, attrs):
+        classes = (dict(attrs).get('class') or '').split()
+        if self._mode == 'answer':
+            if tag == 'div':
+                self._depth += 1
+            if tag == 'li':
+                self._answer.append('\n• ')
+            elif tag in ('p', 'ol', 'ul'):
+                self._answer.append('\n')
+        elif tag == 'button' and 'accordion-button' in classes:
+            self._mode = 'question'
+            self._question = []
+        elif tag == 'div' and 'accordion-body' in classes:
+            self._mode = 'answer'
+            self._depth = 1
+            self._answer = []
+
+    def handle_endtag(self, tag):
+        if self._mode == 'question' and tag == 'button':
+            self._mode = None
+        elif self._mode == 'answer' and tag == 'div':
+            self._depth -= 1
+            if self._depth == 0:
+                self._mode = None
+                question = ' '.join(''.join(self._question).split())
+                lines = (' '.join(line.split()) for line in ''.join(self._answer).split('\n'))
+                answer = '\n'.join(line for line in lines if line and line != '•')
+                if question and answer:
+                    self.pairs.append((question, answer))
+
+    def handle_data(self, data):
+        if self._mode == 'question':
+            self._question.append(data)
+        elif self._mode == 'answer':
+            self._answer.append(data)
+
+
+def load_help_center_documents(template_name='hub/help_center.html'):
+    """Extract the help-center accordion articles as FAQ documents"""
+    try:
+        source = get_template(template_name).template.source
+    except Exception as e:
+        logger.error(f"Failed to load help center articles: {str(e)}")
+        return []
+    parser = _AccordionParser()
+    parser.feed(source)
+    return [
+        FAQDocument(question, f"**{question}**\n\n{answer}", source='help_center')
+        for question, answer in parser.pairs
+    ]
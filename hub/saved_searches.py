@@ -0,0 +1,129 @@
+"""
+Saved searches with incremental matching of new listings.
+
+Each saved search is stored as terms in ``SavedSearchTerm``: its query
+tokens, ``cat:<category>`` when it filters by category, and ``*`` when it
+has neither (a query of nothing but stopwords indexes no terms and matches
+nothing). A new listing emits the same kinds of terms, and one grouped
+query over that inverted index finds every search whose terms are all
+present (price range checked in the same query), so a listing is matched
+with one indexed query instead of re-running every search. Matches are
+recorded once in ``SavedSearchMatch`` and notified with one bulk insert per
+batch; emails follow through ``send_notification_digests``.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Item, Notification, SavedSearch, SavedSearchMatch, SavedSearchTerm
+from .retrieval import tokenize
+from .services import NotificationService
+
+logger = logging.getLogger(__name__)
+
+ALL_TERM = '*'
+MAX_TERM_LENGTH = SavedSearchTerm._meta.get_field('term').max_length
+
+
+def search_terms(query, category):
+    """Index terms for a saved search; empty (matches nothing) if its query is only stopwords"""
+    terms = set(tokenize(query or ''))
+    if category:
+        terms.add(f"cat:{category}")
+    if not terms and not (query or '').strip():
+        return {ALL_TERM}
+    return {term[:MAX_TERM_LENGTH] for term in terms}
+
+
+def item_terms(item):
+    # Mirrors ItemViewSet.search, which matches the query against name, description and category
+    text = f"{item.name} {item.description} {item.category} {item.get_category_display()}"
+    terms = set(tokenize(text)) | {f"cat:{item.category}", ALL_TERM}
+    return {term[:MAX_TERM_LENGTH] for term in terms}
+
+
+def index_saved_search(saved_search):
+    """(Re)build the index rows for one saved search"""
+    terms = search_terms(saved_search.query, saved_search.category)
+    with transaction.atomic():
+        SavedSearchTerm.objects.filter(saved_search=saved_search).delete()
+        SavedSearchTerm.objects.bulk_create([
+            SavedSearchTerm(saved_search=saved_search, term=term) for term in terms
+        ])
+        SavedSearch.objects.filter(pk=saved_search.pk).update(term_count=len(terms))
+    saved_search.term_count = len(terms)
+
+
+def matching_searches(item):
+    """Ids of active saved searches (other than the seller's) that ``item`` satisfies"""
+    if item.price is None:
+        price_ok = Q(saved_search__min_price__isnull=True, saved_search__max_price__isnull=True)
+    else:
+        price_ok = (
+            (Q(saved_search__min_price__isnull=True) | Q(saved_search__min_price__lte=item.price)) &
+            (Q(saved_search__max_price__isnull=True) | Q(saved_search__max_price__gte=item.price))
+        )
+    return list(
+        SavedSearchTerm.objects.filter(price_ok, term__in=item_terms(item), saved_search__is_active=True)
+        .exclude(saved_search__user_id=item.seller_id)
+        .values('saved_search_id', 'saved_search__term_count')
+        .annotate(hits=Count('id'))
+        .filter(hits=F('saved_search__term_count'))
+        .values_list('saved_search_id', flat=True)
+    )
+
+
+def _label(saved_search):
+    return saved_search.name or saved_search.query or saved_search.category or 'your saved search'
+
+
+def match_items(items):
+    """Match new listings against all saved searches and notify; returns the number of new matches"""
+    candidates = {(search_id, item.pk) for item in items for search_id in matching_searches(item)}
+    if not candidates:
+        return 0
+    with transaction.atomic():
+        seen = set(
+            SavedSearchMatch.objects.filter(item__in=[item.pk for item in items])
+            .values_list('saved_search_id', 'item_id')
+        )
+        new = candidates - seen
+        if not new:
+            return 0
+        SavedSearchMatch.objects.bulk_create(
+            [SavedSearchMatch(saved_search_id=search_id, item_id=item_id) for search_id, item_id in new],
+            ignore_conflicts=True,
+        )
+        searches = SavedSearch.objects.in_bulk({search_id for search_id, _ in new})
+        items_by_pk = {item.pk: item for item in items}
+        # One notification per user and listing, however many of their searches matched
+        notifications = {}
+        for search_id, item_id in sorted(new):
+            saved_search = searches[search_id]
+            item = items_by_pk[item_id]
+            notifications.setdefault((saved_search.user_id, item_id), Notification(
+                user_id=saved_search.user_id,
+                notification_type='saved_search_match',
+                title=f"New match for '{_label(saved_search)}'",
+                message=f"'{item.name}' was just listed" + (f" for ₹{item.price}." if item.price is not None else "."),
+                related_item_id=item_id,
+                emailed_occurrences=0,  # picked up by the digest job
+            ))
+        NotificationService.create_bulk(list(notifications.values()))
+    logger.info(f"Saved searches: {len(new)} new matches for {len(items)} listings")
+    return len(new)
+
+
+def match_recent_items(since, batch_size=200):
+    """Catch-up pass over listings created after ``since``; returns the number of new matches"""
+    queryset = Item.objects.filter(is_active=True, created_at__gte=since).order_by('pk')
+    matched = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return matched
+        last_pk = batch[-1].pk
+        matched += match_items(batch)
+
@@ -4,8 +4,11 @@ from django.db.models import Avg, Count
 from .models import (
     Item, Message, Cart, CartItem, Order, OrderItem,
     SwapProposal, Watchlist, Report, Notification, Review,
-    CollegeDomain, MeetupPoint, ItemView, UserProfile
+    CollegeDomain, MeetupPoint, ItemView, UserProfile, SavedSearch, SwapCycle,
+    Conversation
 )
+from .media import MediaURLResolver
+from .retrieval import tokenize
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -36,12 +39,47 @@ class UserSerializer(serializers.ModelSerializer):
         return Review.objects.filter(item__seller=obj).count()
 
 
-class ItemSerializer(serializers.ModelSerializer):
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Compact user for nested lists; select_related('<user>__userprofile') keeps it query-free"""
+    is_college_verified = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'is_college_verified']
+
+    def get_is_college_verified(self, obj):
+        try:
+            return obj.userprofile.is_college_verified
+        except Exception:
+            return False
+
+
+class MediaResolverMixin:
+    def _get_media_resolver(self):
+        # Shared through the root serializer's context so a list page builds it once
+        resolver = self.context.get('media_resolver')
+        if resolver is None:
+            resolver = MediaURLResolver(self.context.get('request'))
+            self.context['media_resolver'] = resolver
+        return resolver
+
+
+class ResolvedImageField(serializers.ImageField):
+    """Image upload field whose output URL comes from the parent's media resolver"""
+
+    def to_representation(self, value):
+        return self.parent._get_media_resolver().url(value)
+
+
+class ItemSerializer(MediaResolverMixin, serializers.ModelSerializer):
     seller = UserSerializer(read_only=True)
+    image1 = ResolvedImageField(required=False, allow_null=True)
+    image2 = ResolvedImageField(required=False, allow_null=True)
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     condition_display = serializers.CharField(source='get_condition_display', read_only=True)
     image_url = serializers.SerializerMethodField()
     image2_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     view_count = serializers.SerializerMethodField()
 
     class Meta:
@@ -50,28 +88,35 @@ class ItemSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'category', 'category_display',
             'condition', 'condition_display', 'price', 'desired_swap_item',
             'seller', 'is_active', 'created_at', 'updated_at',
-            'image1', 'image_url', 'image2', 'image2_url', 'view_count'
+            'image1', 'image_url', 'image2', 'image2_url', 'image_srcset', 'view_count'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
     def get_image_url(self, obj):
-        if obj.image1:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image1.url)
-        return None
+        return self._get_media_resolver().url(obj.image1)
 
     def get_image2_url(self, obj):
-        if obj.image2:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image2.url)
-        return None
+        return self._get_media_resolver().url(obj.image2)
+
+    def get_image_srcset(self, obj):
+        return self._get_media_resolver().srcset(obj.image1)
 
     def get_view_count(self, obj):
         return obj.views.count()
 
 
+class ItemSummarySerializer(MediaResolverMixin, serializers.ModelSerializer):
+    """Compact listing for nested use; needs only the item row"""
+    image_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Item
+        fields = ['id', 'name', 'category', 'condition', 'price', 'is_active', 'image_url']
+
+    def get_image_url(self, obj):
+        return self._get_media_resolver().url(obj.image1)
+
+
 class ItemCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Item
@@ -93,6 +138,30 @@ class MessageSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'timestamp']
 
 
+class ConversationSerializer(serializers.ModelSerializer):
+    """Inbox row, from the viewer's side of the conversation"""
+    item = ItemSummarySerializer(read_only=True)
+    other_participant = serializers.SerializerMethodField()
+    unread = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Conversation
+        fields = ['id', 'item', 'other_participant', 'preview', 'last_message_at', 'unread']
+
+    def get_other_participant(self, obj):
+        return UserSummarySerializer(obj.other_participant(self.context['request'].user)).data
+
+    def get_unread(self, obj):
+        return obj.unread_for(self.context['request'].user)
+
+
+class ConversationMessageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Message
+        fields = ['id', 'sender', 'content', 'timestamp']
+        read_only_fields = fields
+
+
 class CartItemSerializer(serializers.ModelSerializer):
     item = ItemSerializer(read_only=True)
     total_price = serializers.SerializerMethodField()
@@ -221,6 +290,43 @@ class SwapProposalSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class SwapProposalSummarySerializer(serializers.ModelSerializer):
+    """Swap listings: summaries only, so a page is one query however long it is"""
+    proposer = UserSummarySerializer(read_only=True)
+    receiver = UserSummarySerializer(read_only=True)
+    offered_item = ItemSummarySerializer(read_only=True)
+    requested_item = ItemSummarySerializer(read_only=True)
+
+    class Meta:
+        model = SwapProposal
+        fields = [
+            'id', 'proposer', 'receiver', 'offered_item', 'requested_item',
+            'message', 'status', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class SwapCycleSerializer(serializers.ModelSerializer):
+    """A suggested swap; each member gives their item and receives the next one"""
+    members = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SwapCycle
+        fields = ['id', 'size', 'members', 'created_at']
+
+    def get_members(self, obj):
+        members = list(obj.members.all())
+        items = ItemSummarySerializer([member.item for member in members], many=True, context=self.context).data
+        return [
+            {
+                'owner': member.item.seller.username,
+                'gives': items[position],
+                'receives': items[(position + 1) % len(members)],
+            }
+            for position, member in enumerate(members)
+        ]
+
+
 class WatchlistSerializer(serializers.ModelSerializer):
     item = ItemSerializer(read_only=True)
     item_id = serializers.PrimaryKeyRelatedField(
@@ -237,6 +343,33 @@ class WatchlistSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class SavedSearchSerializer(serializers.ModelSerializer):
+    category = serializers.ChoiceField(choices=Item.CATEGORY_CHOICES, required=False, allow_blank=True)
+
+    class Meta:
+        model = SavedSearch
+        fields = ['id', 'name', 'query', 'category', 'min_price', 'max_price', 'is_active', 'created_at']
+        read_only_fields = ['id', 'created_at']
+
+    def validate(self, data):
+        min_price = data.get('min_price', getattr(self.instance, 'min_price', None))
+        max_price = data.get('max_price', getattr(self.instance, 'max_price', None))
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise serializers.ValidationError({'max_price': 'Must be at least the minimum price.'})
+        query = data.get('query', getattr(self.instance, 'query', ''))
+        category = data.get('category', getattr(self.instance, 'category', ''))
+        if not (query or category):
+            raise serializers.ValidationError('Give a search query or a category.')
+        if query and not category and not tokenize(query):
+            # A query of only stopwords ("how to") would otherwise be alerted about every listing
+            raise serializers.ValidationError({'query': 'Use more specific words, or pick a category.'})
+        return data
+
+    def create(self, validated_data):
+        validated_data['user'] = self.context['request'].user
+        return super().create(validated_data)
+
+
 class ReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Report
@@ -1,15 +1,29 @@
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
+from django.utils import timezone
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.contrib.auth.models import User
-from .models import Notification, Item, Order, Review
+from .models import Notification, Item, Message, Order, OrderItem, Review, SwapProposal
+from .emails import email_templates
+from .events import publish_event
+from .swap_matching import update_item as update_swap_matches
+from datetime import timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
 class NotificationService:
+    # Notifications emailed by send_digests with their own template instead of the generic digest
+    DIGEST_TEMPLATES = {
+        'price_drop': 'price_drop',
+        'saved_search_match': 'saved_search_match',
+    }
+
     @staticmethod
-    def send_email_notification(user, subject, message, template_name=None, context=None):
+    def send_email_notification(user, subject, message, template_name=None, context=None, html_message=None):
         """Send email notification to user"""
         try:
             if template_name and context:
@@ -21,6 +35,7 @@ class NotificationService:
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[user.email],
                 fail_silently=False,
+                html_message=html_message,
             )
             logger.info(f"Email sent to {user.email}: {subject}")
             return True
@@ -28,6 +43,32 @@ class NotificationService:
             logger.error(f"Failed to send email to {user.email}: {str(e)}")
             return False
 
+    @staticmethod
+    def send_templated_email(user, template, context):
+        """Render a registered email template (see hub.emails) and send it"""
+        email = email_templates.render(template, {'user': user, **context})
+        return NotificationService.send_email_notification(user, email.subject, email.text, html_message=email.html)
+
+    @staticmethod
+    def send_bulk_email(users, template, context=None):
+        """Render one template for many recipients and send over a single SMTP connection"""
+        users = [user for user in users if user.email]
+        rendered = email_templates.render_many(template, [{'user': user} for user in users], shared=context)
+        emails = []
+        for user, email in zip(users, rendered):
+            message = EmailMultiAlternatives(email.subject, email.text, settings.DEFAULT_FROM_EMAIL, [user.email])
+            if email.html:
+                message.attach_alternative(email.html, 'text/html')
+            emails.append(message)
+        if not emails:
+            return 0
+        try:
+            with get_connection() as connection:
+                return connection.send_messages(emails) or 0
+        except Exception as e:
+            logger.error(f"Failed to send {len(emails)} '{template}' emails: {str(e)}")
+            return 0
+
     @staticmethod
     def create_in_app_notification(user, notification_type, title, message, related_item=None, related_order=None):
         """Create in-app notification"""
@@ -49,25 +90,8 @@ class NotificationService:
     @staticmethod
     def notify_item_added(user, item):
         """Notify when item is added"""
-        subject = f"Item '{item.name}' Successfully Added"
-        message = f"""
-        Hello {user.first_name or user.username},
-        
-        Your item '{item.name}' has been successfully added to EduCycle!
-        
-        Item Details:
-        - Name: {item.name}
-        - Category: {item.get_category_display()}
-        - Price: ₹{item.price if item.price else 'Swap only'}
-        
-        You can view and manage your listing in your profile.
-        
-        Best regards,
-        EduCycle Team
-        """
-        
         # Send email
-        NotificationService.send_email_notification(user, subject, message)
+        NotificationService.send_templated_email(user, 'item_added', {'item': item})
         
         # Create in-app notification
         NotificationService.create_in_app_notification(
@@ -81,26 +105,8 @@ class NotificationService:
     @staticmethod
     def notify_item_sold(seller, buyer, item, order):
         """Notify seller when item is sold"""
-        subject = f"Congratulations! Your item '{item.name}' has been sold!"
-        message = f"""
-        Hello {seller.first_name or seller.username},
-        
-        Great news! Your item '{item.name}' has been purchased by {buyer.first_name or buyer.username}.
-        
-        Order Details:
-        - Order ID: {order.id}
-        - Item: {item.name}
-        - Buyer: {buyer.first_name or buyer.username} ({buyer.email})
-        - Total Amount: ₹{order.total_amount}
-        
-        Please contact the buyer to arrange pickup/delivery.
-        
-        Best regards,
-        EduCycle Team
-        """
-        
         # Send email to seller
-        NotificationService.send_email_notification(seller, subject, message)
+        NotificationService.send_templated_email(seller, 'item_sold', {'buyer': buyer, 'item': item, 'order': order})
         
         # Create in-app notification for seller
         NotificationService.create_in_app_notification(
@@ -115,26 +121,8 @@ class NotificationService:
     @staticmethod
     def notify_item_purchased(buyer, seller, item, order):
         """Notify buyer when item is purchased"""
-        subject = f"Order Confirmed - '{item.name}'"
-        message = f"""
-        Hello {buyer.first_name or buyer.username},
-        
-        Your order has been confirmed!
-        
-        Order Details:
-        - Order ID: {order.id}
-        - Item: {item.name}
-        - Seller: {seller.first_name or seller.username}
-        - Total Amount: ₹{order.total_amount}
-        
-        Please contact the seller to arrange pickup/delivery.
-        
-        Best regards,
-        EduCycle Team
-        """
-        
         # Send email to buyer
-        NotificationService.send_email_notification(buyer, subject, message)
+        NotificationService.send_templated_email(buyer, 'item_purchased', {'seller': seller, 'item': item, 'order': order})
         
         # Create in-app notification for buyer
         NotificationService.create_in_app_notification(
@@ -149,25 +137,8 @@ class NotificationService:
     @staticmethod
     def notify_review_received(item_owner, reviewer, item, review):
         """Notify item owner when they receive a review"""
-        subject = f"New Review for '{item.name}'"
-        message = f"""
-        Hello {item_owner.first_name or item_owner.username},
-        
-        You have received a new review for your item '{item.name}'.
-        
-        Review Details:
-        - Reviewer: {reviewer.first_name or reviewer.username}
-        - Rating: {review.rating}/5 stars
-        - Comment: {review.comment[:100]}{'...' if len(review.comment) > 100 else ''}
-        
-        You can view the full review on your item page.
-        
-        Best regards,
-        EduCycle Team
-        """
-        
         # Send email to item owner
-        NotificationService.send_email_notification(item_owner, subject, message)
+        NotificationService.send_templated_email(item_owner, 'review_received', {'reviewer': reviewer, 'item': item, 'review': review})
         
         # Create in-app notification
         NotificationService.create_in_app_notification(
@@ -182,25 +153,9 @@ class NotificationService:
     def notify_order_status_update(user, order, new_status):
         """Notify user when order status changes"""
         status_display = dict(Order.STATUS_CHOICES)[new_status]
-        subject = f"Order Status Update - {status_display}"
-        message = f"""
-        Hello {user.first_name or user.username},
-        
-        Your order status has been updated.
-        
-        Order Details:
-        - Order ID: {order.id}
-        - New Status: {status_display}
-        - Updated: {order.updated_at.strftime('%B %d, %Y at %I:%M %p')}
-        
-        You can track your order in your orders page.
-        
-        Best regards,
-        EduCycle Team
-        """
         
         # Send email
-        NotificationService.send_email_notification(user, subject, message)
+        NotificationService.send_templated_email(user, 'order_status', {'order': order, 'status_display': status_display})
         
         # Create in-app notification
         NotificationService.create_in_app_notification(
@@ -212,33 +167,137 @@ class NotificationService:
         )
 
     @staticmethod
-    def notify_message_received(receiver, sender, item, message_content):
-        """Notify user when they receive a message"""
-        subject = f"New Message about '{item.name}'"
-        message = f"""
-        Hello {receiver.first_name or receiver.username},
-        
-        You have received a new message from {sender.first_name or sender.username} about your item '{item.name}'.
-        
-        Message: {message_content[:100]}{'...' if len(message_content) > 100 else ''}
-        
-        You can view and respond to this message in your inbox.
-        
-        Best regards,
-        EduCycle Team
+    def notify_message_received(receiver, sender, item, message_content, send_email=True):
+        """Notify user when they receive a message; returns (notification, created).
+
+        Without ``send_email`` the caller sends it later with
+        ``send_message_email``, or the digest job does.
         """
-        
-        # Send email
-        NotificationService.send_email_notification(receiver, subject, message)
-        
-        # Create in-app notification
-        NotificationService.create_in_app_notification(
+        # A burst of messages about one item becomes one notification and one email
+        notification, created = NotificationService.notify_coalesced(
             user=receiver,
             notification_type='message_received',
             title='New Message Received',
             message=f'You have a new message from {sender.first_name or sender.username} about "{item.name}".',
-            related_item=item
+            related_item=item,
         )
+        if created:
+            # Not emailed yet: until it is, the digest job owns the email
+            Notification.objects.filter(pk=notification.pk).update(emailed_occurrences=0)
+            if send_email:
+                NotificationService.send_message_email(notification, sender, item, message_content)
+        return notification, created
+
+    @staticmethod
+    def send_message_email(notification, sender, item, message_content):
+        """Email a new-message notification once; if sending fails the digest job sends it instead"""
+        if not Notification.objects.filter(pk=notification.pk, emailed_occurrences=0).update(emailed_occurrences=1):
+            return False  # the digest got there first
+        try:
+            sent = NotificationService.send_templated_email(
+                notification.user, 'message_received',
+                {'sender': sender, 'item': item, 'message_content': message_content},
+            )
+        except Exception as e:
+            logger.error(f"Failed to render message email for notification {notification.pk}: {str(e)}")
+            sent = False
+        if not sent:
+            Notification.objects.filter(pk=notification.pk, emailed_occurrences=1).update(emailed_occurrences=0)
+        return sent
+
+    @staticmethod
+    def create_bulk(notifications, batch_size=500):
+        """Insert many notifications at once; emails follow via send_digests (set emailed_occurrences=0)"""
+        Notification.objects.bulk_create(notifications, batch_size=batch_size)
+        # bulk_create skips the model signals, so do their work once for the batch
+        user_ids = {notification.user_id for notification in notifications}
+        transaction.on_commit(lambda: UnreadCountService.invalidate(user_ids))
+        for notification in notifications:
+            publish_event(notification.user_id, 'notification', {
+                'id': notification.pk,
+                'type': notification.notification_type,
+                'title': notification.title,
+                'message': notification.message,
+            })
+        return notifications
+
+    @staticmethod
+    def notify_coalesced(user, notification_type, title, message, related_item=None, email_template=None, email_context=None):
+        """Notify in-app and by email, folding repeats into the open digest.
+
+        A repeat of an unread (user, type, related_item) notification updates
+        that row instead of adding one, and its email is deferred to
+        ``send_digests``. For COALESCED_NOTIFICATION_TYPES a partial unique
+        constraint stops two concurrent first notifications from both
+        inserting; the one that loses retries into the update. Returns
+        (notification, created).
+        """
+        lookup = {'user': user, 'notification_type': notification_type, 'related_item': related_item, 'is_read': False}
+        for attempt in range(2):
+            with transaction.atomic():
+                digest = Notification.objects.select_for_update().filter(**lookup).order_by('-created_at').first()
+                if digest is not None:
+                    digest.occurrences += 1
+                    digest.title = f"{title} ({digest.occurrences})"
+                    digest.message = message
+                    digest.save(update_fields=['occurrences', 'title', 'message'])
+                    return digest, False
+                try:
+                    with transaction.atomic():
+                        notification = Notification.objects.create(
+                            user=user, notification_type=notification_type, title=title, message=message,
+                            related_item=related_item,
+                        )
+                    break
+                except IntegrityError:
+                    if attempt:
+                        raise
+        if email_template:
+            NotificationService.send_templated_email(user, email_template, email_context or {})
+        return notification, True
+
+    @staticmethod
+    def send_digests():
+        """Email one digest per closed coalescing window over a single SMTP connection"""
+        window = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 0)
+        pending = list(
+            Notification.objects.filter(
+                occurrences__gt=F('emailed_occurrences'),
+                created_at__lt=timezone.now() - timedelta(seconds=window)
+            ).select_related('user', 'related_item')
+        )
+        # Already-read rows were seen in-app, nothing left to tell them by email
+        recipients = [n for n in pending if not n.is_read and n.user.email]
+        by_template = {}
+        for n in recipients:
+            template = NotificationService.DIGEST_TEMPLATES.get(n.notification_type, 'notification_digest')
+            by_template.setdefault(template, []).append(n)
+        emails = []
+        for template, batch in by_template.items():
+            rendered = email_templates.render_many(template, [
+                {
+                    'user': n.user,
+                    'notification': n,
+                    'item': n.related_item,
+                    'extra': n.occurrences - n.emailed_occurrences,
+                }
+                for n in batch
+            ])
+            for notification, email in zip(batch, rendered):
+                message = EmailMultiAlternatives(email.subject, email.text, settings.DEFAULT_FROM_EMAIL, [notification.user.email])
+                message.attach_alternative(email.html, 'text/html')
+                emails.append(message)
+        sent = 0
+        if emails:
+            try:
+                with get_connection() as connection:
+                    sent = connection.send_messages(emails) or 0
+            except Exception as e:
+                logger.error(f"Failed to send notification digests: {str(e)}")
+                return 0
+        Notification.objects.filter(pk__in=[n.pk for n in pending]).update(emailed_occurrences=F('occurrences'))
+        logger.info(f"Sent {sent} notification digests")
+        return sent
 
     @staticmethod
     def get_user_notifications(user, unread_only=False):
@@ -251,15 +310,350 @@ class NotificationService:
     @staticmethod
     def mark_notification_read(notification_id, user):
         """Mark a notification as read"""
-        try:
-            notification = Notification.objects.get(id=notification_id, user=user)
-            notification.is_read = True
-            notification.save()
+        notifications = Notification.objects.filter(id=notification_id, user=user)
+        if notifications.filter(is_read=False).update(is_read=True):
+            UnreadCountService.adjust(user.pk, -1)
             return True
-        except Notification.DoesNotExist:
-            return False
+        return notifications.exists()
+
+    @staticmethod
+    async def amark_notification_read(notification_id, user):
+        """Async variant of mark_notification_read"""
+        notifications = Notification.objects.filter(id=notification_id, user=user)
+        if await notifications.filter(is_read=False).aupdate(is_read=True):
+            await UnreadCountService.aadjust(user.pk, -1)
+            return True
+        return await notifications.aexists()
 
     @staticmethod
     def mark_all_notifications_read(user):
         """Mark all notifications as read for a user"""
-        Notification.objects.filter(user=user, is_read=False).update(is_read=True) 
\ No newline at end of file
+        updated = Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+        if updated:
+            UnreadCountService.adjust(user.pk, -updated)
+        return updated
+
+
+class CheckoutService:
+    @staticmethod
+    def place_orders(buyer, cart, shipping_address, payment_method):
+        """Turn a cart into one order per seller and empty it; returns [(order, order_items)].
+
+        Line items are bulk-inserted and each order's total is summed once in
+        the database (``Order.calculate_total``) and stored, so the payment
+        pages charge ``total_amount`` without re-summing.
+        """
+        seller_orders = {}
+        with transaction.atomic():
+            for cart_item in cart.cartitem_set.select_related('item__seller'):
+                seller = cart_item.item.seller
+                if seller.pk not in seller_orders:
+                    order = Order.objects.create(
+                        buyer=buyer,
+                        seller=seller,
+                        total_amount=0,
+                        shipping_address=shipping_address,
+                        payment_method=payment_method,
+                    )
+                    seller_orders[seller.pk] = (order, [])
+                order, order_items = seller_orders[seller.pk]
+                order_items.append(OrderItem(
+                    order=order,
+                    item=cart_item.item,
+                    quantity=cart_item.quantity,
+                    price_at_time=cart_item.item.price or 0,
+                ))
+            for order, order_items in seller_orders.values():
+                OrderItem.objects.bulk_create(order_items)
+                order.total_amount = order.calculate_total()
+                order.save(update_fields=['total_amount'])
+            cart.cartitem_set.all().delete()
+        return list(seller_orders.values())
+
+
+class SwapError(Exception):
+    """A swap proposal can no longer move to the requested state"""
+
+
+class SwapService:
+    """Swap proposal state changes.
+
+    Accepting locks both items in primary-key order and only then the
+    proposal, so acceptances that share an item queue on the item rows
+    instead of deadlocking on each other's proposals. The items are
+    deactivated only if both are still active and every other pending
+    proposal involving either item is rejected in one UPDATE. The
+    deactivation is itself a conditional UPDATE, so a second acceptance
+    fails cleanly even on databases without row locks.
+    """
+
+    @staticmethod
+    def _lock_pending(proposal_id):
+        proposal = SwapProposal.objects.select_for_update().get(pk=proposal_id)
+        if proposal.status != 'pending':
+            raise SwapError(f"This proposal has already been {proposal.status}")
+        return proposal
+
+    @staticmethod
+    def accept(proposal_id):
+        item_ids = sorted(set(
+            SwapProposal.objects.filter(pk=proposal_id).values_list('offered_item_id', 'requested_item_id').get()
+        ))
+        with transaction.atomic():
+            items = list(Item.objects.select_for_update().filter(pk__in=item_ids).order_by('pk'))
+            proposal = SwapService._lock_pending(proposal_id)
+            now = timezone.now()
+            deactivated = Item.objects.filter(pk__in=item_ids, is_active=True).update(is_active=False, updated_at=now)
+            if deactivated != len(item_ids):
+                # Rolls back the partial deactivation with the transaction
+                raise SwapError('One of the items has already been swapped or sold')
+
+            proposal.status = 'accepted'
+            proposal.save(update_fields=['status', 'updated_at'])
+            rejected = SwapProposal.objects.filter(
+                Q(offered_item_id__in=item_ids) | Q(requested_item_id__in=item_ids),
+                status='pending',
+            ).update(status='rejected', updated_at=now)
+
+            # The UPDATE bypassed the Item signals
+            for item in items:
+                item.is_active = False
+                transaction.on_commit(lambda item=item: update_swap_matches(item))
+            transaction.on_commit(lambda: PlatformStatsService.adjust('active_items', -len(items)))
+            transaction.on_commit(lambda: ProfileStatsService.invalidate({item.seller_id for item in items}))
+        logger.info(f"Swap {proposal.pk} accepted; {rejected} competing proposals rejected")
+        return proposal
+
+    @staticmethod
+    def reject(proposal_id):
+        with transaction.atomic():
+            proposal = SwapService._lock_pending(proposal_id)
+            proposal.status = 'rejected'
+            proposal.save(update_fields=['status', 'updated_at'])
+        return proposal
+
+    @staticmethod
+    def cancel(proposal_id):
+        """Withdraw a pending proposal; an accepted swap can no longer be cancelled"""
+        with transaction.atomic():
+            proposal = SwapService._lock_pending(proposal_id)
+            proposal.status = 'cancelled'
+            proposal.save(update_fields=['status', 'updated_at'])
+        return proposal
+
+
+def counter_timeout(timeout):
+    """How long a counter adjusted in place may live in the default cache.
+
+    Adjustments only reach the process that makes them unless the cache is
+    shared (``CACHE_URL``), so with a per-process cache counters are
+    recounted every ``LOCAL_COUNTER_TIMEOUT`` seconds instead.
+    """
+    if settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+        return min(timeout, getattr(settings, 'LOCAL_COUNTER_TIMEOUT', 30))
+    return timeout
+
+
+class PlatformStatsService:
+    """Platform-wide counters served from cache.
+
+    Counters are seeded with COUNT(*) on a cache miss and then kept current
+    by model signals once the writing transaction commits (see
+    ``hub.signals``). They expire after ``STATS_TIMEOUT`` (see
+    ``counter_timeout``) so bulk updates that bypass signals are reconciled
+    periodically.
+    """
+    STATS_TIMEOUT = 60 * 60
+    KEY_PREFIX = 'platform_stats:'
+    COUNTERS = ('active_items', 'users', 'orders')
+
+    @staticmethod
+    def _queryset(name):
+        if name == 'active_items':
+            return Item.objects.filter(is_active=True)
+        if name == 'users':
+            return User.objects.all()
+        return Order.objects.all()
+
+    @staticmethod
+    def _count(name):
+        return PlatformStatsService._queryset(name).count()
+
+    @staticmethod
+    def refresh():
+        """Recount every counter from the database and cache the result"""
+        stats = {name: PlatformStatsService._count(name) for name in PlatformStatsService.COUNTERS}
+        cache.set_many(
+            {PlatformStatsService.KEY_PREFIX + name: value for name, value in stats.items()},
+            counter_timeout(PlatformStatsService.STATS_TIMEOUT)
+        )
+        return stats
+
+    @staticmethod
+    def get_stats():
+        """Return {'active_items', 'users', 'orders'} without hitting the DB when cached"""
+        keys = [PlatformStatsService.KEY_PREFIX + name for name in PlatformStatsService.COUNTERS]
+        cached = cache.get_many(keys)
+        if len(cached) != len(keys):
+            return PlatformStatsService.refresh()
+        return {name: cached[PlatformStatsService.KEY_PREFIX + name] for name in PlatformStatsService.COUNTERS}
+
+    @staticmethod
+    async def aget_stats():
+        """Async variant of get_stats, recounting with the async ORM on a miss"""
+        keys = [PlatformStatsService.KEY_PREFIX + name for name in PlatformStatsService.COUNTERS]
+        cached = await cache.aget_many(keys)
+        if len(cached) == len(keys):
+            return {name: cached[PlatformStatsService.KEY_PREFIX + name] for name in PlatformStatsService.COUNTERS}
+        stats = {}
+        for name in PlatformStatsService.COUNTERS:
+            stats[name] = await PlatformStatsService._queryset(name).acount()
+        await cache.aset_many(
+            {PlatformStatsService.KEY_PREFIX + name: value for name, value in stats.items()},
+            counter_timeout(PlatformStatsService.STATS_TIMEOUT)
+        )
+        return stats
+
+    @staticmethod
+    def adjust(name, delta):
+        """Atomically move a cached counter; a missing key is left for the next refresh"""
+        try:
+            cache.incr(PlatformStatsService.KEY_PREFIX + name, delta)
+        except ValueError:
+            pass
+
+    @staticmethod
+    def invalidate(name):
+        """Drop a counter whose change can't be told; every counter is recounted on next read"""
+        cache.delete(PlatformStatsService.KEY_PREFIX + name)
+
+
+class ProfileStatsService:
+    """Per-user profile counters served from cache.
+
+    A miss is seeded with one COUNT(*) per counter; the signals that change
+    them (a listing activated, deactivated or deleted, a message received)
+    drop the key, so a profile view on a warm cache does not count at all.
+    """
+    TIMEOUT = 60 * 60
+    KEY_PREFIX = 'profile_stats:'
+
+    @staticmethod
+    def _key(user_id):
+        return f"{ProfileStatsService.KEY_PREFIX}{user_id}"
+
+    @staticmethod
+    def get(user_id):
+        """Return {'active_listings', 'messages_received'} for one user"""
+        stats = cache.get(ProfileStatsService._key(user_id))
+        if stats is None:
+            stats = {
+                'active_listings': Item.objects.filter(seller_id=user_id, is_active=True).count(),
+                'messages_received': Message.objects.filter(receiver_id=user_id).count(),
+            }
+            cache.set(ProfileStatsService._key(user_id), stats, ProfileStatsService.TIMEOUT)
+        return stats
+
+    @staticmethod
+    def invalidate(user_ids):
+        cache.delete_many([ProfileStatsService._key(user_id) for user_id in user_ids])
+
+
+class UnreadCountService:
+    """Per-user unread notification counts served from cache.
+
+    A miss is seeded with a COUNT(*), checked once more after seeding: a
+    notification committed between the COUNT and the seed found no counter
+    to adjust, so a seed that no longer matches is dropped and recounted on
+    the next read. Afterwards the counter is moved by
+    model signals (create, save, delete) once the write commits, and by the
+    bulk mark-read helpers, which adjust by the number of rows they actually
+    flipped. Counters expire after ``TIMEOUT`` (30 seconds unless the cache
+    is shared, see ``counter_timeout``) and ``reconcile_unread_counts``
+    rewrites them from the database, so drift from writes that bypass both
+    is bounded.
+    """
+    TIMEOUT = 60 * 60
+    KEY_PREFIX = 'unread_notifications:'
+
+    @staticmethod
+    def _key(user_id):
+        return f"{UnreadCountService.KEY_PREFIX}{user_id}"
+
+    @staticmethod
+    def _queryset(user_id):
+        return Notification.objects.filter(user_id=user_id, is_read=False)
+
+    @staticmethod
+    def get(user_id):
+        key = UnreadCountService._key(user_id)
+        count = cache.get(key)
+        if count is None:
+            count = UnreadCountService._queryset(user_id).count()
+            # add() so a concurrent get() that seeded first is not overwritten
+            if cache.add(key, count, counter_timeout(UnreadCountService.TIMEOUT)):
+                current = UnreadCountService._queryset(user_id).count()
+                if cache.get(key) != current:
+                    cache.delete(key)
+                count = current
+        return count
+
+    @staticmethod
+    async def aget(user_id):
+        key = UnreadCountService._key(user_id)
+        count = await cache.aget(key)
+        if count is None:
+            count = await UnreadCountService._queryset(user_id).acount()
+            if await cache.aadd(key, count, counter_timeout(UnreadCountService.TIMEOUT)):
+                current = await UnreadCountService._queryset(user_id).acount()
+                if await cache.aget(key) != current:
+                    await cache.adelete(key)
+                count = current
+        return count
+
+    @staticmethod
+    def adjust(user_id, delta):
+        """Atomically move a cached counter; a missing key is recounted on next read"""
+        try:
+            if cache.incr(UnreadCountService._key(user_id), delta) < 0:
+                cache.delete(UnreadCountService._key(user_id))
+        except ValueError:
+            pass
+
+    @staticmethod
+    async def aadjust(user_id, delta):
+        try:
+            if await cache.aincr(UnreadCountService._key(user_id), delta) < 0:
+                await cache.adelete(UnreadCountService._key(user_id))
+        except ValueError:
+            pass
+
+    @staticmethod
+    def invalidate(user_ids):
+        """Drop counters after writes that bypass the signals (bulk_create); recounted on next read"""
+        cache.delete_many([UnreadCountService._key(user_id) for user_id in user_ids])
+
+    @staticmethod
+    def reconcile(batch_size=1000):
+        """Rewrite cached counters that drifted from the database; returns (cached, corrected)"""
+        user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+        cached_total = corrected = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            cached = cache.get_many([UnreadCountService._key(user_id) for user_id in batch])
+            if not cached:
+                continue
+            cached_total += len(cached)
+            actual = dict(
+                Notification.objects.filter(user_id__in=batch, is_read=False)
+                .values('user_id').annotate(count=Count('id')).values_list('user_id', 'count')
+            )
+            fixes = {}
+            for user_id in batch:
+                key = UnreadCountService._key(user_id)
+                if key in cached and cached[key] != actual.get(user_id, 0):
+                    fixes[key] = actual.get(user_id, 0)
+            if fixes:
+                cache.set_many(fixes, counter_timeout(UnreadCountService.TIMEOUT))
+                corrected += len(fixes)
+        return cached_total, corrected
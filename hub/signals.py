@@ -0,0 +1,201 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .events import publish_event
+from .models import Item, Message, Notification, Order, SavedSearch
+from .price_alerts import alert_price_drop, rearm_alerts
+from .saved_searches import index_saved_search, match_items
+from .services import PlatformStatsService, ProfileStatsService, UnreadCountService
+from .swap_matching import forget_item, update_item
+
+
+# Old value of a field that was deferred when the instance was loaded
+UNKNOWN = object()
+
+# The fields swap matching indexes; anything else changing leaves suggestions as they are
+SWAP_FIELDS = ('name', 'category', 'desired_swap_item', 'is_active', 'seller_id')
+
+
+def _loaded(instance, *fields):
+    """True if every field was fetched (or set) on ``instance``; reading a deferred one queries"""
+    return all(field in instance.__dict__ for field in fields)
+
+
+def _swap_signature(item):
+    return tuple(item.__dict__.get(field, UNKNOWN) for field in SWAP_FIELDS)
+
+
+@receiver(post_init, sender=Item)
+def remember_item_active_state(sender, instance, **kwargs):
+    # Values are read from __dict__: touching a deferred field here would
+    # refresh_from_db, build another instance and land back in post_init
+    if not instance.pk:
+        instance._stats_was_active, instance._saved_price, instance._swap_signature = False, None, None
+        return
+    instance._stats_was_active = instance.__dict__.get('is_active', UNKNOWN)
+    instance._saved_price = instance.__dict__.get('price', UNKNOWN)
+    instance._swap_signature = _swap_signature(instance)
+
+
+def _adjust_active_items(delta, seller_id):
+    PlatformStatsService.adjust('active_items', delta)
+    ProfileStatsService.invalidate([seller_id])
+
+
+def _recount_active_items(seller_id):
+    PlatformStatsService.invalidate('active_items')
+    ProfileStatsService.invalidate([seller_id])
+
+
+# Counters move only once the write commits; a rolled back signup or checkout leaves them alone
+@receiver(post_save, sender=Item)
+def update_active_item_count(sender, instance, created, **kwargs):
+    if not _loaded(instance, 'is_active'):
+        return  # still deferred, so it was not written
+    was_active = False if created else instance._stats_was_active
+    seller_id = instance.seller_id
+    if was_active is UNKNOWN:
+        # Set on an instance loaded without it: whether it changed can't be told
+        transaction.on_commit(lambda: _recount_active_items(seller_id))
+    elif instance.is_active != was_active:
+        delta = 1 if instance.is_active else -1
+        transaction.on_commit(lambda: _adjust_active_items(delta, seller_id))
+    instance._stats_was_active = instance.is_active
+
+
+@receiver(post_save, sender=Item)
+def check_price_alerts(sender, instance, created, **kwargs):
+    if not _loaded(instance, 'price'):
+        return
+    old_price, new_price = instance._saved_price, instance.price
+    instance._saved_price = new_price
+    if created or old_price is None or new_price is None or new_price == old_price:
+        return
+    if old_price is UNKNOWN:
+        # Both are no-ops for watchers already in the right state
+        rearm_alerts(instance.pk, new_price)
+        transaction.on_commit(lambda: alert_price_drop(instance.pk, new_price))
+    elif new_price < old_price:
+        transaction.on_commit(lambda: alert_price_drop(instance.pk, new_price))
+    else:
+        rearm_alerts(instance.pk, new_price)
+
+
+@receiver(post_save, sender=Item)
+def match_saved_searches(sender, instance, created, **kwargs):
+    if created and instance.is_active:
+        transaction.on_commit(lambda: match_items([instance]))
+
+
+@receiver(post_save, sender=Item)
+def update_swap_matches(sender, instance, created, **kwargs):
+    signature = _swap_signature(instance)
+    # UNKNOWN differs from any loaded value, so a field set after a deferred load counts as changed
+    if created or signature != instance._swap_signature:
+        transaction.on_commit(lambda: update_item(instance))
+    instance._swap_signature = signature
+
+
+@receiver(pre_delete, sender=Item)
+def forget_swap_matches(sender, instance, **kwargs):
+    forget_item(instance.pk)
+
+
+@receiver(post_save, sender=SavedSearch)
+def reindex_saved_search(sender, instance, **kwargs):
+    index_saved_search(instance)
+
+
+@receiver(post_delete, sender=Item)
+def discount_deleted_item(sender, instance, **kwargs):
+    seller_id = instance.seller_id
+    if instance._stats_was_active is UNKNOWN:
+        transaction.on_commit(lambda: _recount_active_items(seller_id))
+    elif instance._stats_was_active:
+        transaction.on_commit(lambda: _adjust_active_items(-1, seller_id))
+
+
+@receiver(post_save, sender=User)
+def count_new_user(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: PlatformStatsService.adjust('users', 1))
+
+
+@receiver(post_delete, sender=User)
+def discount_deleted_user(sender, instance, **kwargs):
+    transaction.on_commit(lambda: PlatformStatsService.adjust('users', -1))
+
+
+@receiver(post_save, sender=Order)
+def count_new_order(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: PlatformStatsService.adjust('orders', 1))
+
+
+@receiver(post_delete, sender=Order)
+def discount_deleted_order(sender, instance, **kwargs):
+    transaction.on_commit(lambda: PlatformStatsService.adjust('orders', -1))
+
+
+@receiver(post_init, sender=Notification)
+def remember_notification_read_state(sender, instance, **kwargs):
+    if not instance.pk:
+        instance._counted_unread = False
+    elif _loaded(instance, 'is_read'):
+        instance._counted_unread = not instance.is_read
+    else:
+        instance._counted_unread = UNKNOWN
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_count(sender, instance, created, **kwargs):
+    if not _loaded(instance, 'is_read'):
+        return
+    unread = not instance.is_read
+    if instance._counted_unread is UNKNOWN:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: UnreadCountService.invalidate([user_id]))
+    elif unread != instance._counted_unread:
+        user_id, delta = instance.user_id, 1 if unread else -1
+        transaction.on_commit(lambda: UnreadCountService.adjust(user_id, delta))
+    instance._counted_unread = unread
+
+
+@receiver(post_delete, sender=Notification)
+def discount_deleted_notification(sender, instance, **kwargs):
+    if instance._counted_unread is UNKNOWN:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: UnreadCountService.invalidate([user_id]))
+    elif instance._counted_unread:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: UnreadCountService.adjust(user_id, -1))
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, created, **kwargs):
+    if created:
+        publish_event(instance.user_id, 'notification', {
+            'id': instance.pk,
+            'type': instance.notification_type,
+            'title': instance.title,
+            'message': instance.message,
+        })
+
+
+@receiver(post_save, sender=Message)
+def count_received_message(sender, instance, created, **kwargs):
+    if created:
+        ProfileStatsService.invalidate([instance.receiver_id])
+
+
+@receiver(post_save, sender=Message)
+def push_message(sender, instance, created, **kwargs):
+    if created:
+        publish_event(instance.receiver_id, 'message', {
+            'id': instance.pk,
+            'sender': instance.sender.username,
+            'item_id': instance.item_id,
+            'content': instance.content[:200],
+        })
@@ -0,0 +1,231 @@
+"""
+Swap matching over ``Item.desired_swap_item``.
+
+Every active listing is indexed in ``SwapTerm`` by what it offers (name and
+category tokens) and what it wants (``desired_swap_item`` tokens, split into
+alternatives on "or", commas and slashes). Listing A gets a ``SwapEdge`` to
+listing B when B offers every term of one of A's alternatives and the two
+have different sellers: A's owner would give A for B. Direct swaps are
+2-cycles of that graph and multi-party swaps (A→B→C→A) longer ones; both
+are stored as ``SwapCycle`` rows. A listing change only rebuilds its own
+terms and edges and searches for cycles through that listing, so
+suggestions are never computed by rescanning the catalogue per request.
+"""
+import logging
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Item, SwapCycle, SwapCycleMember, SwapEdge, SwapTerm
+from .retrieval import tokenize
+
+logger = logging.getLogger(__name__)
+
+MAX_TERM_LENGTH = SwapTerm._meta.get_field('term').max_length
+ALTERNATIVES_RE = re.compile(r"\bor\b|[,;/|]")
+# Words that say nothing about what is wanted ("anything", "something similar")
+WANT_FILLER = frozenset('anything something else other similar'.split())
+
+
+def offer_terms(item):
+    text = f"{item.name} {item.category} {item.get_category_display()}"
+    return {term[:MAX_TERM_LENGTH] for term in tokenize(text)}
+
+
+def want_terms(item):
+    """The alternatives ``item`` would accept, each a frozenset of terms that must all be offered"""
+    groups = []
+    for text in ALTERNATIVES_RE.split((item.desired_swap_item or '').lower()):
+        terms = frozenset(term[:MAX_TERM_LENGTH] for term in tokenize(text) if term not in WANT_FILLER)
+        if terms and terms not in groups:
+            groups.append(terms)
+    return groups
+
+
+def _term_rows(item, offers, wants):
+    return (
+        [SwapTerm(item_id=item.pk, kind='offer', term=term) for term in offers] +
+        [
+            SwapTerm(item_id=item.pk, kind='want', group=group, term=term)
+            for group, terms in enumerate(wants)
+            for term in terms
+        ]
+    )
+
+
+def _wanted_items(item, wants):
+    """Ids of listings offering every term of one of the alternatives ``item`` wants"""
+    if not wants:
+        return []
+    offered = defaultdict(set)
+    rows = (
+        SwapTerm.objects.filter(kind='offer', term__in=set().union(*wants), item__is_active=True)
+        .exclude(item__seller_id=item.seller_id)
+        .values_list('item_id', 'term')
+    )
+    for item_id, term in rows:
+        offered[item_id].add(term)
+    return [item_id for item_id, terms in offered.items() if any(group <= terms for group in wants)]
+
+
+def _wanting_items(item, offers):
+    """Ids of listings with an alternative ``item`` fully offers"""
+    if not offers:
+        return []
+    hits = {
+        (item_id, group): count
+        for item_id, group, count in (
+            SwapTerm.objects.filter(kind='want', term__in=offers, item__is_active=True)
+            .exclude(item__seller_id=item.seller_id)
+            .values('item_id', 'group')
+            .annotate(hits=Count('id'))
+            .values_list('item_id', 'group', 'hits')
+        )
+    }
+    if not hits:
+        return []
+    totals = (
+        SwapTerm.objects.filter(kind='want', item_id__in={item_id for item_id, _ in hits})
+        .values('item_id', 'group')
+        .annotate(total=Count('id'))
+        .values_list('item_id', 'group', 'total')
+    )
+    return list({item_id for item_id, group, total in totals if hits.get((item_id, group)) == total})
+
+
+def find_cycles(item, max_length=None, limit=None, lowest=False):
+    """
+    Simple cycles through ``item`` of 2..max_length listings with distinct
+    sellers, as lists of item ids starting at ``item``. With ``lowest`` only
+    cycles in which ``item`` has the smallest id are returned (full rebuilds
+    use it to find each cycle once).
+    """
+    max_length = max_length or getattr(settings, 'SWAP_MAX_CYCLE_LENGTH', 4)
+    limit = limit or getattr(settings, 'SWAP_MAX_CYCLES_PER_ITEM', 20)
+
+    # Walk edges backwards from the item, one query per hop: ``distance`` is
+    # how many hops each listing needs to get back, which prunes the search.
+    distance = {item.pk: 0}
+    sellers = {item.pk: item.seller_id}
+    successors = {}
+    frontier = [item.pk]
+    for depth in range(1, max_length):
+        edges = SwapEdge.objects.filter(to_item_id__in=frontier)
+        if lowest:
+            edges = edges.filter(from_item_id__gt=item.pk)
+        frontier = []
+        for from_id, to_id, seller_id in edges.values_list('from_item_id', 'to_item_id', 'from_item__seller_id'):
+            successors.setdefault(from_id, []).append(to_id)
+            sellers[from_id] = seller_id
+            if from_id not in distance:
+                distance[from_id] = depth
+                frontier.append(from_id)
+        if not frontier:
+            break
+    successors[item.pk] = [
+        to_id for to_id in SwapEdge.objects.filter(from_item_id=item.pk).values_list('to_item_id', flat=True)
+        if to_id in distance
+    ]
+
+    cycles = []
+
+    def extend(path, owners):
+        for next_id in successors.get(path[-1], ()):
+            if len(cycles) >= limit:
+                return
+            if next_id == item.pk:
+                if len(path) > 1:
+                    cycles.append(list(path))
+            elif (next_id not in path and sellers[next_id] not in owners
+                  and len(path) + distance[next_id] <= max_length):
+                path.append(next_id)
+                owners.add(sellers[next_id])
+                extend(path, owners)
+                owners.discard(sellers[next_id])
+                path.pop()
+
+    extend([item.pk], {item.seller_id})
+    return cycles
+
+
+def _store_cycles(cycles):
+    rotated = {}
+    for ids in cycles:
+        start = ids.index(min(ids))
+        ids = ids[start:] + ids[:start]
+        rotated['-'.join(map(str, ids))] = ids
+    if not rotated:
+        return
+    SwapCycle.objects.bulk_create(
+        [SwapCycle(key=key, size=len(ids)) for key, ids in rotated.items()],
+        ignore_conflicts=True,
+    )
+    cycle_ids = dict(SwapCycle.objects.filter(key__in=rotated).values_list('key', 'pk'))
+    SwapCycleMember.objects.bulk_create(
+        [
+            SwapCycleMember(cycle_id=cycle_ids[key], item_id=item_id, position=position)
+            for key, ids in rotated.items()
+            for position, item_id in enumerate(ids)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def forget_item(item_id):
+    """Drop the suggestions a listing takes part in (its edges and terms go with the row)"""
+    SwapCycle.objects.filter(members__item_id=item_id).delete()
+
+
+def update_item(item):
+    """Re-index one listing and recompute its edges and cycles; returns the number of cycles found"""
+    with transaction.atomic():
+        forget_item(item.pk)
+        SwapEdge.objects.filter(Q(from_item_id=item.pk) | Q(to_item_id=item.pk)).delete()
+        SwapTerm.objects.filter(item_id=item.pk).delete()
+        if not item.is_active:
+            return 0
+        offers, wants = offer_terms(item), want_terms(item)
+        SwapTerm.objects.bulk_create(_term_rows(item, offers, wants))
+        edges = [SwapEdge(from_item_id=item.pk, to_item_id=pk) for pk in _wanted_items(item, wants)]
+        edges += [SwapEdge(from_item_id=pk, to_item_id=item.pk) for pk in _wanting_items(item, offers)]
+        if not edges:
+            return 0
+        SwapEdge.objects.bulk_create(edges, ignore_conflicts=True)
+        cycles = find_cycles(item)
+        _store_cycles(cycles)
+    if cycles:
+        logger.info(f"Swap matching: {len(cycles)} swap cycles through item {item.pk}")
+    return len(cycles)
+
+
+def rebuild(batch_size=500):
+    """Rebuild the whole index from scratch; returns (edges, cycles)"""
+    with transaction.atomic():
+        SwapCycle.objects.all().delete()
+        SwapEdge.objects.all().delete()
+        SwapTerm.objects.all().delete()
+        items = list(Item.objects.filter(is_active=True).order_by('pk'))
+        terms = {}
+        for item in items:
+            terms[item.pk] = (offer_terms(item), want_terms(item))
+        SwapTerm.objects.bulk_create(
+            [row for item in items for row in _term_rows(item, *terms[item.pk])], batch_size=batch_size
+        )
+        edges = [
+            SwapEdge(from_item_id=item.pk, to_item_id=pk)
+            for item in items
+            for pk in _wanted_items(item, terms[item.pk][1])
+        ]
+        SwapEdge.objects.bulk_create(edges, batch_size=batch_size)
+        linked = set(SwapEdge.objects.values_list('from_item_id', flat=True))
+        cycles = 0
+        for item in items:
+            if item.pk in linked:
+                found = find_cycles(item, lowest=True)
+                _store_cycles(found)
+                cycles += len(found)
+    logger.info(f"Swap matching rebuilt: {len(edges)} edges, {cycles} cycles over {len(items)} listings")
+    return len(edges), cycles
@@ -1,3 +1,1227 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+import hashlib
+import hmac
+import json
+import threading
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.template import Context, engines
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, IntegrityError, connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .emails import email_templates
+from .media import clear_media_url_cache
+from .messaging import send_message
+from .fake_gateway import start_in_thread
+from .gateway import CircuitBreaker, CircuitOpenError, GatewayError, StripeGateway
+from .catalogue import extract_slots, find_listings
+from .chatbot import get_chatbot, intent_engine
+from .retrieval import NUMPY_AVAILABLE, FAQDocument, FAQIndex, load_help_center_documents
+from .transcripts import TranscriptWriter, transcript_writer
+from . import message_delivery, retention
+from .models import (
+    Cart, CartItem, ChatMessage, Conversation, Item, Message, MessageDelivery, Notification, NotificationArchive, Order, OrderItem, Payment, SavedSearch, SwapCycleMember, SwapEdge, SwapProposal,
+    WebhookEvent,
+)
+from .providers import ProviderError, ProviderRegistry, payment_providers
+from .reconciliation import MockProvider, PaymentReconciler
+from .webhooks import process_event, record_event
+from .saved_searches import matching_searches
+from .swap_matching import want_terms
+from .serializers import ItemSerializer, SavedSearchSerializer
+from .services import NotificationService, PlatformStatsService, SwapError, SwapService, UnreadCountService, counter_timeout
+
+conversations_migration = import_module('hub.migrations.0017_conversations')
+
+
+class ItemMediaURLTests(TestCase):
+    def setUp(self):
+        clear_media_url_cache()
+        self.addCleanup(clear_media_url_cache)
+        seller = User.objects.create_user('seller')
+        for i in range(3):
+            Item.objects.create(
+                seller=seller, name=f'Desk {i}', description='-', category='decor', price=50,
+                image1=f'item_images/desk{i}.jpg', image2=f'item_images/desk{i}b.jpg',
+            )
+        self.request = RequestFactory().get('/api/items/', HTTP_HOST='localhost')
+
+    def _serialize(self):
+        return ItemSerializer(Item.objects.all(), many=True, context={'request': self.request}).data
+
+    def test_repeat_pages_make_no_storage_calls(self):
+        with mock.patch.object(FileSystemStorage, 'url', autospec=True, side_effect=lambda s, name: f'/media/{name}') as url:
+            first = self._serialize()
+            self.assertEqual(url.call_count, 6)
+            url.reset_mock()
+            self.assertEqual(self._serialize(), first)
+            url.assert_not_called()
+        self.assertEqual(first[0]['image1'], first[0]['image_url'])
+        self.assertTrue(first[0]['image2'].startswith('http://localhost/media/item_images/'))
+
+    @override_settings(MEDIA_CDN_BASE_URL='https://cdn.example.com/')
+    def test_cdn_urls_skip_storage(self):
+        with mock.patch.object(FileSystemStorage, 'url', autospec=True) as url:
+            data = self._serialize()
+        url.assert_not_called()
+        self.assertEqual(
+            {row['image2'] for row in data},
+            {f'https://cdn.example.com/item_images/desk{i}b.jpg' for i in range(3)},
+        )
+
+
+@skipUnless(NUMPY_AVAILABLE, "FAQ retrieval needs NumPy")
+class FAQIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = FAQIndex([
+            FAQDocument('How do refunds work?', 'Refunds go back to the original payment method within a week.'),
+            FAQDocument('How do I pay?', 'Pay by card or UPI at checkout. Payment is held until delivery.'),
+            FAQDocument('How do I ship an item?', 'Ship the item with any courier and add the tracking number.'),
+            FAQDocument('Can I swap items?', 'Offer one of your items in exchange for the item you want.'),
+        ])
+
+    def titles(self, query, k=3):
+        return [doc.title for _, doc in self.index.search(query, k=k)]
+
+    def test_best_matching_answer_ranks_first(self):
+        self.assertEqual(self.titles('when will my refund arrive')[0], 'How do refunds work?')
+        self.assertEqual(self.titles('can I pay with UPI')[0], 'How do I pay?')
+
+    def test_rare_terms_outweigh_common_ones(self):
+        # "item" is in most documents, "courier" in one
+        self.assertEqual(self.titles('item courier')[0], 'How do I ship an item?')
+
+    def test_scores_are_descending_and_limited_to_k(self):
+        results = self.index.search('item payment swap refund', k=2)
+        self.assertEqual(len(results), 2)
+        self.assertGreaterEqual(results[0][0], results[1][0])
+        self.assertLessEqual(results[0][0], 1.0 + 1e-6)
+
+    def test_unknown_or_stopword_queries_match_nothing(self):
+        self.assertEqual(self.index.search('xylophone'), [])
+        self.assertEqual(self.index.search('how do I'), [])
+        self.assertEqual(FAQIndex([]).search('refund'), [])
+
+    def test_help_center_articles_are_indexed(self):
+        index = FAQIndex(load_help_center_documents())
+        _, document = index.search('how do I verify my account', k=1)[0]
+        self.assertEqual(document.title, 'How do I verify my account?')
+        self.assertEqual(document.source, 'help_center')
+
+
+class IntentEngineTests(SimpleTestCase):
+    def test_plural_keywords_match(self):
+        self.assertEqual(intent_engine.classify('any tips for selling textbooks'), 'selling')
+        self.assertEqual(intent_engine.classify('How do refunds work?'), 'refund')
+
+    def test_short_words_are_not_stemmed_into_keywords(self):
+        self.assertIsNone(intent_engine.classify('his book is great'))
+        self.assertEqual(intent_engine.classify('hi'), 'greeting')
+
+
+class CatalogueListingsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        seller = User.objects.create_user('seller', 'seller@example.com')
+        for price in (10, 20, 30):
+            Item.objects.create(seller=seller, name='Calculus textbook', description='-', category='textbook', price=price)
+
+    def test_cached_results_are_kept_per_limit(self):
+        slots = extract_slots('show me calculus textbooks')
+        self.assertEqual(len(find_listings(slots, limit=1)), 1)
+        self.assertEqual(len(find_listings(slots, limit=3)), 3)
+
+    def test_filler_words_do_not_become_keywords(self):
+        self.assertEqual(extract_slots('any good calculators under 500?')['keywords'], ['calculator'])
+        slots = extract_slots('hello, any books under 200?')
+        self.assertEqual((slots['category'], slots['keywords'], slots['max_price']), ('textbook', [], 200))
+        self.assertEqual(extract_slots('is this lamp still there')['keywords'], ['lamp', 'still'])
+        self.assertEqual(extract_slots('show me campus analysis passes')['keywords'], ['campus', 'analysis', 'pass'])
+
+    def test_any_keyword_matches_and_more_matches_rank_first(self):
+        seller = User.objects.get(username='seller')
+        Item.objects.create(seller=seller, name='Casio calculator', description='-', category='equipment', price=400)
+        Item.objects.create(seller=seller, name='Graphing calculator', description='-', category='equipment', price=450)
+        names = [listing['name'] for listing in find_listings(extract_slots('any graphing calculators under 500?'))]
+        self.assertEqual(names, ['Graphing calculator', 'Casio calculator'])
+        self.assertEqual(find_listings(extract_slots('looking for a working calculator')), find_listings(extract_slots('looking for calculators')))
+
+    def test_explicit_requests_reach_the_catalogue(self):
+        Item.objects.create(seller=User.objects.get(username='seller'), name='Desk lamp', description='-', category='decor', price=150)
+        action, slots = get_chatbot()._route('show me cheap lamps')
+        self.assertEqual(action, 'catalogue')
+        self.assertEqual([listing['name'] for listing in find_listings(slots)], ['Desk lamp'])
+
+
+class TranscriptWriterTests(TestCase):
+    def test_failed_flush_keeps_the_batch(self):
+        writer = TranscriptWriter()
+        writer._ensure_thread = lambda: None  # flush by hand
+        writer.record('s1', 'user', 'first')
+        with mock.patch.object(ChatMessage.objects, 'bulk_create', side_effect=DatabaseError('down')):
+            self.assertEqual(writer.flush(), 0)
+        writer.record('s1', 'bot', 'second')
+        self.assertEqual([m.content for m in writer.pending('s1')], ['first', 'second'])
+
+        self.assertEqual(writer.flush(), 2)
+        self.assertEqual(
+            list(ChatMessage.objects.filter(session_id='s1').order_by('id').values_list('content', flat=True)),
+            ['first', 'second'],
+        )
+        self.assertEqual(writer.pending('s1'), [])
+
+
+    def test_concurrent_flushes_write_each_turn_once(self):
+        writer = TranscriptWriter()
+        writer._ensure_thread = lambda: None
+        writer.record('s1', 'user', 'first')
+        entered, release = threading.Event(), threading.Event()
+        written = []
+
+        def slow_bulk_create(batch, **kwargs):
+            entered.set()
+            release.wait(5)
+            written.append([m.content for m in batch])
+            return batch
+
+        with mock.patch.object(ChatMessage.objects, 'bulk_create', side_effect=slow_bulk_create):
+            first = threading.Thread(target=writer.flush)
+            first.start()
+            entered.wait(5)
+            writer.record('s1', 'bot', 'second')
+            second = threading.Thread(target=writer.flush)
+            second.start()
+            second.join(0.2)
+            # The second flush waits for the first instead of replacing its in-flight batch
+            self.assertTrue(second.is_alive())
+            self.assertEqual([m.content for m in writer.pending('s1')], ['first', 'second'])
+            release.set()
+            first.join(5)
+            second.join(5)
+        self.assertEqual(written, [['first'], ['second']])
+
+    def test_buffer_drops_oldest_turns_while_writes_fail(self):
+        writer = TranscriptWriter(max_buffer=3)
+        writer._ensure_thread = lambda: None
+        with mock.patch.object(ChatMessage.objects, 'bulk_create', side_effect=DatabaseError('down')):
+            for i in range(5):
+                writer.record('s1' if i % 2 else 's2', 'user', f'turn {i}')
+                writer.flush()
+        self.assertEqual(writer._pending_count, 3)
+        self.assertEqual([m.content for m in writer.pending('s1')], ['turn 3'])
+        self.assertEqual([m.content for m in writer.pending('s2')], ['turn 2', 'turn 4'])
+
+
+class EmailTemplateRenderTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user('ana', email='ana@example.com', first_name='Ana & Bo'),
+            User.objects.create_user('cy', email='cy@example.com', first_name='<b>Cy</b>'),
+            User.objects.create_user('dee', email='dee@example.com'),
+        ]
+        self.shared = {'subject': 'Exams <soon>', 'body': 'Sell your books\nbefore term ends & save'}
+
+    def render_alone(self, name, context):
+        """Reference render: fresh templates and a fresh context per recipient"""
+        subject, text, html = email_templates._registered[name]
+        engine = engines['django'].engine
+        return (
+            ' '.join(engine.from_string(subject).render(Context(context, autoescape=False)).split()),
+            engine.get_template(text).render(Context(context, autoescape=False)),
+            engine.get_template(html).render(Context(context)),
+        )
+
+    def test_batch_matches_single_renders(self):
+        rendered = email_templates.render_many('announcement', [{'user': user} for user in self.users], shared=self.shared)
+        for user, email in zip(self.users, rendered):
+            with self.subTest(user=user.username):
+                expected = self.render_alone('announcement', {**self.shared, 'user': user})
+                self.assertEqual((email.subject, email.text, email.html), expected)
+                self.assertEqual(email_templates.render('announcement', {**self.shared, 'user': user}).html, email.html)
+        self.assertIn('Hello Ana & Bo,', rendered[0].text)
+        self.assertIn('Hello &lt;b&gt;Cy&lt;/b&gt;,', rendered[1].html)
+        self.assertIn('Hello dee,', rendered[2].text)
+
+    def test_recipient_values_do_not_leak_into_later_renders(self):
+        first, second = email_templates.render_many(
+            'announcement', [{'user': self.users[0], 'body': 'Just for Ana'}, {'user': self.users[1]}], shared=self.shared,
+        )
+        self.assertIn('Just for Ana', first.text)
+        self.assertNotIn('Just for Ana', second.text)
+        self.assertIn('Sell your books', second.text)
+
+    def test_bulk_email_sends_each_recipient_their_render(self):
+        self.assertEqual(NotificationService.send_bulk_email(self.users, 'announcement', self.shared), 3)
+        self.assertEqual([message.to for message in mail.outbox], [[user.email] for user in self.users])
+        self.assertEqual({message.subject for message in mail.outbox}, {'Exams <soon>'})
+        self.assertIn('Hello Ana & Bo,', mail.outbox[0].body)
+
+
+class PlatformStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_counters_move_only_on_commit(self):
+        users = PlatformStatsService.get_stats()['users']
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    User.objects.create_user('rolled_back')
+                    raise DatabaseError('checkout failed')
+            except DatabaseError:
+                pass
+        self.assertEqual(PlatformStatsService.get_stats()['users'], users)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user('committed')
+        self.assertEqual(PlatformStatsService.get_stats()['users'], users + 1)
+
+
+class EventStreamTests(TestCase):
+    def test_wsgi_declines_to_stream(self):
+        self.client.force_login(User.objects.create_user('reader'))
+        response = self.client.get('/api/events/', HTTP_HOST='localhost', secure=True)
+        self.assertEqual(response.status_code, 204)
+
+
+class UnreadCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader')
+
+    def test_rolled_back_notification_is_not_counted(self):
+        self.assertEqual(UnreadCountService.get(self.user.pk), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Notification.objects.create(user=self.user, notification_type='order_status', title='t', message='m')
+                    raise DatabaseError('rolled back')
+            except DatabaseError:
+                pass
+            Notification.objects.create(user=self.user, notification_type='order_status', title='t', message='m')
+        self.assertEqual(UnreadCountService.get(self.user.pk), 1)
+
+    def test_notification_committed_while_seeding_is_not_lost(self):
+        add = cache.add
+
+        def add_after_a_new_notification(key, value, timeout):
+            # Committed after the seeding COUNT; its adjust() finds no counter yet
+            with self.captureOnCommitCallbacks(execute=True):
+                Notification.objects.create(user=self.user, notification_type='order_status', title='t', message='m')
+            return add(key, value, timeout)
+
+        with mock.patch.object(cache, 'add', side_effect=add_after_a_new_notification):
+            self.assertEqual(UnreadCountService.get(self.user.pk), 1)
+        self.assertEqual(UnreadCountService.get(self.user.pk), 1)
+
+    def test_per_process_cache_recounts_often(self):
+        self.assertEqual(counter_timeout(UnreadCountService.TIMEOUT), 30)
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}):
+            self.assertEqual(counter_timeout(UnreadCountService.TIMEOUT), UnreadCountService.TIMEOUT)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader')
+        seller = User.objects.create_user('seller')
+        Item.objects.create(seller=seller, name='Casio calculator', description='-', category='equipment', price=400)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notification = Notification.objects.create(
+                user=self.user, notification_type='order_status', title='t', message='m',
+            )
+
+    async def get(self, path, **kwargs):
+        return await self.async_client.get(path, secure=True, **kwargs)
+
+    async def test_search_suggestions(self):
+        response = await self.get('/search-suggestions/', data={'q': 'equip'})
+        self.assertEqual(response.json()['suggestions'], [
+            {'text': 'Casio calculator', 'category': 'equipment'},
+            {'text': 'Category: equipment', 'category': 'equipment'},
+        ])
+        response = await self.get('/search-suggestions/', data={'q': 'e'})
+        self.assertEqual(response.json(), {'suggestions': []})
+
+    async def test_unread_count_with_session_or_jwt(self):
+        self.assertEqual((await self.get('/api/notifications/unread-count/')).status_code, 401)
+        token = str(RefreshToken.for_user(self.user).access_token)
+        response = await self.get('/api/notifications/unread-count/', headers={'authorization': f'Bearer {token}'})
+        self.assertEqual(response.json(), {'count': 1})
+        await self.async_client.aforce_login(self.user)
+        self.assertEqual((await self.get('/api/notifications/unread-count/')).json(), {'count': 1})
+
+    async def test_mark_notification_read(self):
+        path = f'/notifications/{self.notification.pk}/read/'
+        self.assertEqual((await self.get(path)).status_code, 302)
+        await self.async_client.aforce_login(self.user)
+        self.assertEqual((await self.get(path)).json(), {'success': True})
+        self.assertTrue((await Notification.objects.aget(pk=self.notification.pk)).is_read)
+        self.assertEqual(await UnreadCountService.aget(self.user.pk), 0)
+        self.assertEqual((await self.get('/notifications/0/read/')).json(), {'success': False})
+
+    async def test_chatbot_answers_posts_and_renders_the_page(self):
+        response = await self.async_client.post(
+            '/chatbot/', {'message': 'hello', 'session_id': 's1'}, secure=True,
+        )
+        body = response.json()
+        self.assertTrue(body['success'])
+        self.assertEqual(body['session_id'], 's1')
+        self.assertTrue(body['response'])
+        await sync_to_async(transcript_writer.flush)()
+        self.assertEqual(
+            [m async for m in ChatMessage.objects.filter(session_id='s1').order_by('pk').values_list('message_type', flat=True)],
+            ['user', 'bot'],
+        )
+        response = await self.get('/chatbot/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('suggested_questions', response.context)
+
+
+class PaymentReconciliationTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user('buyer')
+        self.seller = User.objects.create_user('seller')
+        self.item = Item.objects.create(seller=self.seller, name='Lamp', description='-', category='decor', price=300)
+
+    def _order(self, status='pending'):
+        order = Order.objects.create(buyer=self.buyer, seller=self.seller, total_amount=300, status=status)
+        OrderItem.objects.create(order=order, item=self.item, price_at_time=300)
+        return order
+
+    def _payment(self, order, provider, **fields):
+        payment = Payment.objects.create(order=order, provider=provider, amount=300, **fields)
+        # Past the settle window
+        Payment.objects.filter(pk=payment.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        return payment
+
+    def _reconcile(self):
+        with mock.patch('hub.reconciliation._notify_order_paid') as notify:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = PaymentReconciler([MockProvider(latency=0)], concurrency=2).run()
+        return result, notify
+
+    def test_cash_on_delivery_is_left_pending(self):
+        payment = self._payment(self._order(), 'cod')
+        result, notify = self._reconcile()
+        self.assertEqual(result.checked, 0)
+        self.assertEqual(Payment.objects.get(pk=payment.pk).status, 'pending')
+        notify.assert_not_called()
+
+    def test_only_orders_moved_from_pending_are_announced(self):
+        pending, confirmed = self._order(), self._order(status='confirmed')
+        self._payment(pending, 'stripe', stripe_payment_intent_id='pi_1')
+        self._payment(confirmed, 'stripe', stripe_payment_intent_id='pi_2')
+        result, notify = self._reconcile()
+        self.assertEqual(result.transitions, {('pending', 'completed'): 2})
+        self.assertEqual(Order.objects.get(pk=pending.pk).status, 'confirmed')
+        self.assertEqual([call.args[0].pk for call in notify.call_args_list], [pending.pk])
+
+    def test_mock_run_does_not_write(self):
+        payment = self._payment(self._order(), 'stripe', stripe_payment_intent_id='pi_1')
+        call_command('reconcile_payments', '--mock', '--mock-latency', '0', stdout=StringIO())
+        self.assertEqual(Payment.objects.get(pk=payment.pk).status, 'pending')
+
+    def test_checkout_records_a_pending_payment(self):
+        order = self._order()
+        gateway = mock.Mock()
+        gateway.create_payment_intent.return_value = {'id': 'pi_9', 'client_secret': 'secret'}
+        with mock.patch('hub.providers.stripe.get_stripe_gateway', return_value=gateway):
+            payment_providers.get('stripe').create(order)
+        self.assertTrue(Payment.objects.filter(
+            order=order, provider='stripe', status='pending', stripe_payment_intent_id='pi_9'
+        ).exists())
+
+    def test_razorpay_webhook_settles_the_checkout_row(self):
+        order = self._order()
+        razorpay_order = payment_providers.get('razorpay').create(order)
+        with self.captureOnCommitCallbacks():
+            payment_providers.get('razorpay').handle_event('payment.captured', {'payload': {'payment': {'entity': {
+                'id': 'pay_1', 'order_id': razorpay_order['id'], 'amount': 30000, 'currency': 'INR',
+                'notes': {'order_id': str(order.pk)},
+            }}}})
+        payment = Payment.objects.get(order=order)
+        self.assertEqual((payment.status, payment.stripe_charge_id), ('completed', 'pay_1'))
+
+
+class GatewayCircuitBreakerTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server, cls.base_url = start_in_thread()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.state = self.server.state
+        self.state.error_rate = 0.0
+        self.state.latency = 0.0
+
+    def _client(self, **options):
+        options = {'failure_threshold': 3, 'reset_timeout': 60, **options}
+        return StripeGateway('stripe', self.base_url, ('sk_test', ''), **options)
+
+    def test_outage_opens_the_circuit_and_then_fails_fast(self):
+        client = self._client()
+        self.state.error_rate = 1.0
+        for _ in range(3):
+            with self.assertRaises(GatewayError) as raised:
+                client.retrieve_payment_intent('pi_1')
+            self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+        served = self.state.requests
+        with self.assertRaises(CircuitOpenError):
+            client.retrieve_payment_intent('pi_1')
+        self.assertEqual(self.state.requests, served)
+
+    def test_successful_trial_closes_the_circuit(self):
+        client = self._client(reset_timeout=0.05)
+        self.state.error_rate = 1.0
+        for _ in range(3):
+            with self.assertRaises(GatewayError):
+                client.retrieve_payment_intent('pi_1')
+        time.sleep(0.06)
+        self.assertEqual(client.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.state.error_rate = 0.0
+        self.assertEqual(client.retrieve_payment_intent('pi_1')['id'], 'pi_1')
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens_the_circuit(self):
+        client = self._client(reset_timeout=0.05)
+        self.state.error_rate = 1.0
+        for _ in range(3):
+            with self.assertRaises(GatewayError):
+                client.retrieve_payment_intent('pi_1')
+        time.sleep(0.06)
+        with self.assertRaises(GatewayError) as raised:
+            client.retrieve_payment_intent('pi_1')
+        self.assertNotIsInstance(raised.exception, CircuitOpenError)
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            client.retrieve_payment_intent('pi_1')
+
+    def test_read_timeouts_count_as_failures(self):
+        client = self._client(timeout=(1, 0.05), failure_threshold=2)
+        self.state.latency = 0.2
+        for _ in range(2):
+            with self.assertRaises(GatewayError) as raised:
+                client.retrieve_payment_intent('pi_1')
+            self.assertIsNone(raised.exception.status_code)
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+    def test_rejected_requests_do_not_open_the_circuit(self):
+        client = self._client()
+        for _ in range(4):
+            with self.assertRaises(GatewayError) as raised:
+                client.request('GET', '/v1/unknown')
+            self.assertFalse(raised.exception.retryable)
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_calls_reuse_one_pooled_connection(self):
+        client = self._client()
+        for _ in range(5):
+            client.create_payment_intent(1000, 'inr', {'order_id': 1})
+        pools = client.session.get_adapter(self.base_url).poolmanager.pools
+        self.assertEqual(len(pools), 1)
+        pool = pools[next(iter(pools.keys()))]
+        self.assertEqual((pool.num_connections, pool.num_requests), (1, 5))
+
+
+class PaymentProviderRegistryTests(SimpleTestCase):
+    def test_checkout_options_load_no_providers(self):
+        registry = ProviderRegistry()
+        options = registry.options()
+        self.assertEqual(list(options), ['stripe', 'razorpay', 'paypal', 'cod'])
+        self.assertEqual(options['stripe']['name'], 'Credit/Debit Card')
+        self.assertFalse(options['paypal']['enabled'])
+        self.assertEqual(registry.loaded(), [])
+
+    def test_listed_only_options_are_not_providers(self):
+        registry = ProviderRegistry()
+        self.assertNotIn('paypal', registry.names())
+        with self.assertRaises(ProviderError):
+            registry.get('paypal')
+
+
+class CheckoutPaymentReuseTests(TestCase):
+    def setUp(self):
+        buyer, seller = User.objects.create_user('buyer'), User.objects.create_user('seller')
+        self.order = Order.objects.create(buyer=buyer, seller=seller, total_amount=300)
+
+    def test_repeat_stripe_checkout_reuses_the_pending_intent(self):
+        gateway = mock.Mock()
+        gateway.create_payment_intent.return_value = {'id': 'pi_1', 'client_secret': 'secret_1'}
+        gateway.retrieve_payment_intent.return_value = {'id': 'pi_1', 'client_secret': 'secret_1', 'status': 'requires_payment_method'}
+        with mock.patch('hub.providers.stripe.get_stripe_gateway', return_value=gateway):
+            first = payment_providers.get('stripe').create(self.order)
+            second = payment_providers.get('stripe').create(self.order)
+        self.assertEqual(first, second)
+        gateway.create_payment_intent.assert_called_once()
+        self.assertEqual(Payment.objects.filter(order=self.order).count(), 1)
+
+    def test_canceled_stripe_intent_is_replaced(self):
+        gateway = mock.Mock()
+        gateway.create_payment_intent.side_effect = [
+            {'id': 'pi_1', 'client_secret': 'secret_1'}, {'id': 'pi_2', 'client_secret': 'secret_2'},
+        ]
+        gateway.retrieve_payment_intent.return_value = {'id': 'pi_1', 'client_secret': 'secret_1', 'status': 'canceled'}
+        with mock.patch('hub.providers.stripe.get_stripe_gateway', return_value=gateway):
+            payment_providers.get('stripe').create(self.order)
+            self.assertEqual(payment_providers.get('stripe').create(self.order), {'client_secret': 'secret_2'})
+        self.assertEqual(
+            dict(Payment.objects.filter(order=self.order).values_list('stripe_payment_intent_id', 'status')),
+            {'pi_1': 'failed', 'pi_2': 'pending'},
+        )
+
+    def test_repeat_razorpay_checkout_reuses_the_order(self):
+        first = payment_providers.get('razorpay').create(self.order)
+        second = payment_providers.get('razorpay').create(self.order)
+        self.assertEqual((second['id'], second['amount']), (first['id'], 30000))
+        self.assertEqual(Payment.objects.filter(order=self.order).count(), 1)
+
+
+def razorpay_captured(order, razorpay_order_id, payment_id='pay_1'):
+    return {'event': 'payment.captured', 'payload': {'payment': {'entity': {
+        'id': payment_id, 'order_id': razorpay_order_id, 'amount': 30000, 'currency': 'INR',
+        'notes': {'order_id': str(order.pk)},
+    }}}}
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET='whsec', WEBHOOK_BACKGROUND=False)
+class WebhookReplayTests(TestCase):
+    def setUp(self):
+        buyer, seller = User.objects.create_user('buyer'), User.objects.create_user('seller')
+        self.order = Order.objects.create(buyer=buyer, seller=seller, total_amount=300)
+        self.razorpay_order = payment_providers.get('razorpay').create(self.order)
+
+    def _deliver(self, body, event_id='evt_1'):
+        raw = json.dumps(body).encode()
+        return self.client.post(
+            '/payment/webhook/razorpay/', raw, content_type='application/json', HTTP_HOST='localhost', secure=True,
+            HTTP_X_RAZORPAY_SIGNATURE=hmac.new(b'whsec', raw, hashlib.sha256).hexdigest(),
+            HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+
+    def test_replayed_event_is_a_no_op(self):
+        body = razorpay_captured(self.order, self.razorpay_order['id'])
+        with mock.patch('hub.webhooks._notify_order_paid') as notify:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self._deliver(body).status_code, 200)
+            with self.captureOnCommitCallbacks(execute=True):
+                with mock.patch.object(payment_providers.get('razorpay'), 'handle_event') as handle:
+                    self.assertEqual(self._deliver(body).status_code, 200)
+        handle.assert_not_called()
+        notify.assert_called_once()
+        event = WebhookEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), ('processed', 1))
+        self.assertEqual(list(Payment.objects.values_list('status', flat=True)), ['completed'])
+        self.assertEqual(process_event(event.pk), 'processed')
+        self.assertEqual(WebhookEvent.objects.get().attempts, 1)
+
+    def test_forged_signature_is_rejected(self):
+        raw = json.dumps(razorpay_captured(self.order, self.razorpay_order['id'])).encode()
+        response = self.client.post(
+            '/payment/webhook/razorpay/', raw, content_type='application/json', HTTP_HOST='localhost', secure=True,
+            HTTP_X_RAZORPAY_SIGNATURE='0' * 64,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+
+class OrderTotalsTests(TestCase):
+    def test_decimal_line_totals_match_stored_totals(self):
+        buyer, seller = User.objects.create_user('buyer'), User.objects.create_user('seller')
+        item = Item.objects.create(seller=seller, name='Pens', description='-', category='other', price=10)
+        order = Order.objects.create(buyer=buyer, seller=seller, total_amount='30.30')
+        OrderItem.objects.create(order=order, item=item, price_at_time='10.10', quantity=3)
+        self.assertEqual(str(order.calculate_total()), '30.30')
+        out = StringIO()
+        call_command('check_order_totals', stdout=out)
+        self.assertIn('All order totals match', out.getvalue())
+
+    def test_mismatch_fails_the_check_unless_fixed(self):
+        buyer, seller = User.objects.create_user('buyer'), User.objects.create_user('seller')
+        item = Item.objects.create(seller=seller, name='Pens', description='-', category='other', price=10)
+        order = Order.objects.create(buyer=buyer, seller=seller, total_amount='25.00')
+        OrderItem.objects.create(order=order, item=item, price_at_time='10.10', quantity=3)
+        with self.assertRaises(CommandError):
+            call_command('check_order_totals', stdout=StringIO())
+        call_command('check_order_totals', '--fix', stdout=StringIO())
+        order.refresh_from_db()
+        self.assertEqual(str(order.total_amount), '30.30')
+        call_command('check_order_totals', stdout=StringIO())
+
+    def test_api_and_web_checkout_store_the_same_totals(self):
+        seller = User.objects.create_user('seller')
+        pens = Item.objects.create(seller=seller, name='Pens', description='-', category='other', price='10.10')
+        lamp = Item.objects.create(seller=seller, name='Lamp', description='-', category='decor', price='0.70')
+        totals = []
+        for username in ('api_buyer', 'web_buyer'):
+            buyer = User.objects.create_user(username)
+            cart = Cart.objects.create(user=buyer)
+            CartItem.objects.create(cart=cart, item=pens, quantity=3)
+            CartItem.objects.create(cart=cart, item=lamp, quantity=3)
+            if username == 'api_buyer':
+                client = APIClient()
+                client.force_authenticate(buyer)
+                response = client.post('/api/carts/checkout/', {'shipping_address': 'Hostel 4'}, HTTP_HOST='localhost', secure=True)
+                self.assertEqual(response.status_code, 201)
+            else:
+                self.client.force_login(buyer)
+                self.client.post('/checkout/', {'shipping_address': 'Hostel 4', 'payment_method': 'cod'}, HTTP_HOST='localhost', secure=True)
+            order = Order.objects.get(buyer=buyer)
+            self.assertFalse(cart.cartitem_set.exists())
+            totals.append(order.total_amount)
+        self.assertEqual(totals, [Decimal('32.40'), Decimal('32.40')])
+
+
+class DeferredFieldSignalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user('seller')
+        self.item = Item.objects.create(seller=self.seller, name='Kettle', description='-', category='appliance', price=500)
+
+    def test_deferred_loads_do_not_recurse_or_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual([item.name for item in Item.objects.only('name')], ['Kettle'])
+
+    def test_field_set_after_deferred_load_recounts(self):
+        self.assertEqual(PlatformStatsService.get_stats()['active_items'], 1)
+        item = Item.objects.only('name').get(pk=self.item.pk)
+        item.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        self.assertEqual(PlatformStatsService.get_stats()['active_items'], 0)
+
+
+class ProfilePageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user('seller')
+        self.items = [
+            Item.objects.create(seller=self.seller, name=f'Desk {i}', description='-', category='decor', price=50)
+            for i in range(25)
+        ]
+        Item.objects.create(seller=User.objects.create_user('someone'), name='Not mine', description='-', category='decor', price=5)
+        for i in range(12):
+            send_message(User.objects.create_user(f'buyer{i}'), self.items[i], f'Hello {i}')
+        self.client.force_login(self.seller)
+
+    def get(self, path, **params):
+        return self.client.get(path, params, HTTP_HOST='localhost', secure=True)
+
+    def test_listing_pages(self):
+        newest_first = [item.pk for item in reversed(self.items)]
+        pages = [self.get('/profile/listings/', page=page) for page in (1, 2, 3)]
+        self.assertEqual([[item.pk for item in r.context['user_items']] for r in pages],
+                         [newest_first[:12], newest_first[12:24], newest_first[24:]])
+        self.assertEqual([r.context['next_listings_page'] for r in pages], [2, 3, None])
+        self.assertContains(pages[0], 'data-partial="/profile/listings/?page=2"')
+        self.assertNotContains(pages[0], '<html')
+        self.assertNotContains(pages[2], 'data-load-more')
+        self.assertEqual(self.get('/profile/listings/', page='x').context['listings_page'], 1)
+
+    def test_inbox_pages(self):
+        first, second = self.get('/profile/inbox/'), self.get('/profile/inbox/', page=2)
+        self.assertEqual([c.preview for c in first.context['conversations']], [f'Hello {i}' for i in range(11, 1, -1)])
+        self.assertEqual([c.preview for c in second.context['conversations']], ['Hello 1', 'Hello 0'])
+        self.assertEqual((first.context['next_inbox_page'], second.context['next_inbox_page']), (2, None))
+        self.assertContains(first, '1 new')
+        self.assertContains(first, f'?conversation={Conversation.objects.get(buyer__username="buyer11").pk}')
+
+    def test_profile_page_uses_cached_stats_and_no_fallback_counts(self):
+        response = self.get('/profile/', listings_page=3, inbox_page=2)
+        self.assertEqual(response.context['stats'], {'active_listings': 25, 'messages_received': 12})
+        self.assertEqual((len(response.context['user_items']), len(response.context['conversations'])), (1, 2))
+        # Session, user, one listings page and one inbox page; no COUNT(*)
+        with self.assertNumQueries(4):
+            self.get('/profile/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.create(seller=self.seller, name='Lamp', description='-', category='decor', price=5)
+        self.assertEqual(self.get('/profile/').context['stats']['active_listings'], 26)
+
+    def test_partials_require_login(self):
+        self.client.logout()
+        for path in ('/profile/listings/', '/profile/inbox/'):
+            self.assertEqual(self.get(path).status_code, 302)
+
+
+class SavedSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('searcher')
+        self.seller = User.objects.create_user('seller')
+
+    def test_stopword_only_query_is_rejected(self):
+        serializer = SavedSearchSerializer(data={'query': 'how to'})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('query', serializer.errors)
+        self.assertTrue(SavedSearchSerializer(data={'query': 'how to', 'category': 'textbook'}).is_valid())
+
+    def test_unknown_category_is_rejected(self):
+        serializer = SavedSearchSerializer(data={'category': 'spaceships'})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('category', serializer.errors)
+
+    def test_stopword_only_query_matches_nothing(self):
+        SavedSearch.objects.create(user=self.user, query='how to')
+        everything = SavedSearch.objects.create(user=self.user, category='decor')
+        item = Item.objects.create(seller=self.seller, name='Desk lamp', description='-', category='decor', price=200)
+        self.assertEqual(matching_searches(item), [everything.pk])
+
+
+class SerializedWritersMixin:
+    """Racing threads in a TransactionTestCase.
+
+    SQLite ignores SELECT ... FOR UPDATE, so for these tests its transactions
+    take the write lock at BEGIN: racing writers queue the way PostgreSQL row
+    locks make them, instead of failing with "database is locked".
+    """
+
+    def setUp(self):
+        super().setUp()
+        if connection.vendor == 'sqlite':
+            options = connections.settings[DEFAULT_DB_ALIAS].setdefault('OPTIONS', {})
+            patcher = mock.patch.dict(options, {'transaction_mode': 'IMMEDIATE'})
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def race(self, target, *args_per_thread):
+        """Run ``target`` once per args tuple, all released together; each thread closes its connection"""
+        barrier = threading.Barrier(len(args_per_thread))
+
+        def run(*args):
+            try:
+                barrier.wait()
+                target(*args)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=args) for args in args_per_thread]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+class SwapAcceptConcurrencyTests(SerializedWritersMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        owner = User.objects.create_user('owner')
+        self.wanted = Item.objects.create(seller=owner, name='Bike', description='-', category='other', price=1000)
+        self.proposals = []
+        for name in ('first', 'second'):
+            proposer = User.objects.create_user(name)
+            offered = Item.objects.create(seller=proposer, name=f'{name} desk', description='-', category='decor', price=900)
+            self.proposals.append(SwapProposal.objects.create(
+                proposer=proposer, receiver=owner, offered_item=offered, requested_item=self.wanted
+            ))
+
+    def test_only_one_competing_acceptance_succeeds(self):
+        outcomes = []
+
+        def accept(proposal):
+            try:
+                SwapService.accept(proposal.pk)
+                outcomes.append('accepted')
+            except SwapError:
+                outcomes.append('refused')
+
+        self.race(accept, *[(proposal,) for proposal in self.proposals])
+
+        self.assertEqual(sorted(outcomes), ['accepted', 'refused'])
+        self.assertEqual(
+            sorted(SwapProposal.objects.values_list('status', flat=True)), ['accepted', 'rejected']
+        )
+        self.assertFalse(Item.objects.get(pk=self.wanted.pk).is_active)
+
+
+class WebhookConcurrencyTests(SerializedWritersMixin, TransactionTestCase):
+    def test_concurrent_workers_apply_an_event_once(self):
+        buyer, seller = User.objects.create_user('buyer'), User.objects.create_user('seller')
+        order = Order.objects.create(buyer=buyer, seller=seller, total_amount=300)
+        razorpay_order = payment_providers.get('razorpay').create(order)
+        event, _ = record_event('razorpay', 'evt_1', 'payment.captured', razorpay_captured(order, razorpay_order['id']))
+        outcomes = []
+        with mock.patch('hub.webhooks._notify_order_paid') as notify:
+            self.race(lambda: outcomes.append(process_event(event.pk)), (), ())
+        self.assertEqual(outcomes, ['processed', 'processed'])
+        notify.assert_called_once()
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('processed', 1))
+        payment = Payment.objects.get(order=order)
+        self.assertEqual((payment.status, payment.stripe_charge_id), ('completed', 'pay_1'))
+        self.assertEqual(Order.objects.get(pk=order.pk).status, 'confirmed')
+
+
+class SwapCancelTests(TestCase):
+    def test_accepted_swap_cannot_be_cancelled(self):
+        owner, proposer = User.objects.create_user('owner'), User.objects.create_user('proposer')
+        proposal = SwapProposal.objects.create(
+            proposer=proposer, receiver=owner,
+            offered_item=Item.objects.create(seller=proposer, name='Desk', description='-', category='decor', price=1),
+            requested_item=Item.objects.create(seller=owner, name='Bike', description='-', category='other', price=1),
+        )
+        SwapService.accept(proposal.pk)
+        self.client.force_login(proposer)
+        response = self.client.patch(f'/api/swaps/{proposal.pk}/cancel/', HTTP_HOST='localhost', secure=True)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(SwapProposal.objects.get(pk=proposal.pk).status, 'accepted')
+
+
+class SwapMatchingTests(TestCase):
+    def listing(self, name, category, wants='', seller=None):
+        seller = seller or User.objects.create_user(f'seller{User.objects.count()}')
+        with self.captureOnCommitCallbacks(execute=True):
+            return Item.objects.create(
+                seller=seller, name=name, description='-', category=category, price=100, desired_swap_item=wants,
+            )
+
+    def edges_from(self, item):
+        return set(SwapEdge.objects.filter(from_item=item).values_list('to_item__name', flat=True))
+
+    def test_wanted_text_splits_into_alternatives(self):
+        self.assertEqual(
+            want_terms(Item(desired_swap_item='Graphing calculator or any textbook, lab coat / anything')),
+            [frozenset({'graphing', 'calculator'}), frozenset({'textbook'}), frozenset({'lab', 'coat'})],
+        )
+
+    def test_either_alternative_matches(self):
+        self.listing('Casio calculator', 'equipment')
+        self.listing('Physics textbook', 'textbook')
+        self.listing('Desk lamp', 'decor')
+        lamp = self.listing('Reading lamp', 'decor', wants='calculator or textbook')
+        self.assertEqual(self.edges_from(lamp), {'Casio calculator', 'Physics textbook'})
+        call_command('rebuild_swap_matches', stdout=StringIO())
+        self.assertEqual(self.edges_from(lamp), {'Casio calculator', 'Physics textbook'})
+
+    def test_every_term_of_an_alternative_is_required(self):
+        self.listing('Basic calculator', 'equipment')
+        self.listing('Graphing calculator', 'equipment')
+        lamp = self.listing('Reading lamp', 'decor', wants='graphing calculator, lab coat')
+        self.assertEqual(self.edges_from(lamp), {'Graphing calculator'})
+
+    def test_later_listing_matches_an_earlier_alternative(self):
+        lamp = self.listing('Reading lamp', 'decor', wants='any calculator or textbook')
+        owner = User.objects.create_user('owner')
+        textbook = self.listing('Physics textbook', 'textbook', wants='lamp', seller=owner)
+        self.assertEqual(self.edges_from(lamp), {'Physics textbook'})
+        self.assertEqual(
+            list(SwapCycleMember.objects.values_list('item_id', flat=True).order_by('item_id')),
+            [lamp.pk, textbook.pk],
+        )
+
+
+class SwapProposalListingQueryTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        wanted = Item.objects.create(seller=self.owner, name='Bike', description='-', category='other', price=1000)
+        for i in range(6):
+            proposer = User.objects.create_user(f'proposer{i}')
+            offered = Item.objects.create(seller=proposer, name=f'Desk {i}', description='-', category='decor', price=900)
+            SwapProposal.objects.create(proposer=proposer, receiver=self.owner, offered_item=offered, requested_item=wanted)
+            SwapProposal.objects.create(proposer=self.owner, receiver=proposer, offered_item=wanted, requested_item=offered)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_listings_cost_a_fixed_number_of_queries(self):
+        # One page query plus the paginator's COUNT, however many proposals there are
+        for url, expected in [('/api/swaps/', 12), ('/api/swaps/received/', 6), ('/api/swaps/sent/', 6)]:
+            with self.subTest(url=url), self.assertNumQueries(2):
+                response = self.client.get(url, HTTP_HOST='localhost', secure=True)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], expected)
+
+
+class OldNotificationsMixin:
+    def setUp(self):
+        self.user = User.objects.create_user('reader')
+
+    def notification(self, days_old, is_read=True, notification_type='order_status', **fields):
+        notification = Notification.objects.create(
+            user=self.user, notification_type=notification_type, title='t', message='m', is_read=is_read, **fields,
+        )
+        Notification.objects.filter(pk=notification.pk).update(created_at=timezone.now() - timedelta(days=days_old))
+        return notification
+
+
+@override_settings(NOTIFICATION_RETENTION_DAYS={'default': 90, 'message_received': 30})
+class NotificationArchiveTests(OldNotificationsMixin, TestCase):
+    def test_archives_expired_read_rows_in_batches(self):
+        expired = [self.notification(100) for _ in range(5)] + [self.notification(40, notification_type='message_received')]
+        kept = [self.notification(100, is_read=False), self.notification(40), self.notification(10)]
+        with mock.patch('hub.retention.ensure_partitions', wraps=retention.ensure_partitions) as batches:
+            self.assertEqual(retention.archive_read_notifications(batch_size=2), 6)
+        self.assertEqual(batches.call_count, 3)
+        self.assertEqual(set(Notification.objects.values_list('pk', flat=True)), {n.pk for n in kept})
+        self.assertEqual(NotificationArchive.objects.count(), len(expired))
+
+    def test_archived_rows_keep_their_content(self):
+        notification = self.notification(100, occurrences=4)
+        notification.refresh_from_db()
+        retention.archive_read_notifications()
+        archived = NotificationArchive.objects.get()
+        self.assertEqual((archived.user, archived.title, archived.occurrences), (self.user, 't', 4))
+        self.assertEqual(archived.created_at, notification.created_at)
+
+    def test_rerunning_archives_nothing_twice(self):
+        self.notification(100)
+        self.assertEqual(retention.archive_read_notifications(), 1)
+        self.assertEqual(retention.archive_read_notifications(), 0)
+        self.assertEqual(NotificationArchive.objects.count(), 1)
+
+    def test_dry_run_writes_nothing(self):
+        self.notification(100)
+        output = StringIO()
+        call_command('archive_notifications', '--dry-run', stdout=output)
+        self.assertIn('Would archive 1 notifications.', output.getvalue())
+        self.assertEqual((Notification.objects.count(), NotificationArchive.objects.count()), (1, 0))
+
+
+# Committed archive rows: PostgreSQL will not drop a partition with pending constraint checks
+@override_settings(NOTIFICATION_ARCHIVE_DAYS=365)
+class NotificationArchivePurgeTests(OldNotificationsMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        retention._known_partitions.clear()
+
+    def test_purge_drops_rows_past_the_archive_period(self):
+        self.notification(400)
+        self.notification(100)
+        self.assertEqual(retention.archive_read_notifications(), 2)
+        retention.purge_archive()
+        self.assertEqual(NotificationArchive.objects.count(), 1)
+        self.assertLess(NotificationArchive.objects.get().created_at, timezone.now() - timedelta(days=99))
+
+
+class ConversationTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user('seller')
+        self.buyer = User.objects.create_user('buyer')
+        self.item = Item.objects.create(seller=self.seller, name='Lamp', description='-', category='decor', price=300)
+        self.client = APIClient()
+
+    def test_backfill_groups_messages_by_item_and_buyer(self):
+        other = User.objects.create_user('other')
+        history = [
+            Message.objects.create(sender=self.buyer, receiver=self.seller, item=self.item, content='Still available?'),
+            Message.objects.create(sender=other, receiver=self.seller, item=self.item, content='Would you take 250?'),
+            Message.objects.create(sender=self.seller, receiver=self.buyer, item=self.item, content='Yes it is'),
+        ]
+        conversations_migration.backfill_conversations(django_apps, None)
+        by_buyer = {c.buyer_id: c for c in Conversation.objects.all()}
+        self.assertEqual(set(by_buyer), {self.buyer.pk, other.pk})
+        thread = by_buyer[self.buyer.pk]
+        self.assertEqual((thread.seller, thread.last_message, thread.preview), (self.seller, history[2], 'Yes it is'))
+        self.assertEqual((thread.buyer_unread, thread.seller_unread), (0, 0))
+        self.assertEqual(list(thread.messages.order_by('pk')), [history[0], history[2]])
+        self.assertEqual(list(by_buyer[other.pk].messages.all()), [history[1]])
+
+    def test_sending_counts_unread_for_the_receiver(self):
+        send_message(self.buyer, self.item, 'Still available?')
+        send_message(self.buyer, self.item, 'I can pick it up today')
+        reply = send_message(self.seller, self.item, 'Yes', conversation=Conversation.objects.get())
+        conversation = Conversation.objects.get()
+        self.assertEqual((conversation.buyer_unread, conversation.seller_unread), (1, 2))
+        self.assertEqual((conversation.last_message, conversation.preview), (reply, 'Yes'))
+        self.assertEqual(reply.receiver, self.buyer)
+
+    def test_reading_the_newest_page_clears_only_the_readers_counter(self):
+        for i in range(35):
+            send_message(self.buyer, self.item, f'Message {i}')
+        conversation = Conversation.objects.get()
+        self.client.force_authenticate(self.seller)
+        inbox_row = self.client.get('/api/conversations/', HTTP_HOST='localhost', secure=True).json()['results'][0]
+        self.assertEqual((inbox_row['unread'], inbox_row['preview']), (35, 'Message 34'))
+
+        path = f'/api/conversations/{conversation.pk}/messages/'
+        page = self.client.get(path, HTTP_HOST='localhost', secure=True).json()
+        self.assertEqual([m['content'] for m in page['results']][:2], ['Message 34', 'Message 33'])
+        self.assertEqual(len(page['results']), 30)
+        conversation.refresh_from_db()
+        self.assertEqual((conversation.seller_unread, conversation.buyer_unread), (0, 0))
+
+        send_message(self.buyer, self.item, 'One more')
+        older = self.client.get(page['next'], HTTP_HOST='localhost', secure=True).json()
+        self.assertEqual([m['content'] for m in older['results']], [f'Message {i}' for i in range(4, -1, -1)])
+        conversation.refresh_from_db()
+        self.assertEqual(conversation.seller_unread, 1)
+
+    def test_reply_through_the_api(self):
+        send_message(self.buyer, self.item, 'Still available?')
+        conversation = Conversation.objects.get()
+        self.client.force_authenticate(self.seller)
+        response = self.client.post(
+            f'/api/conversations/{conversation.pk}/messages/', {'content': 'Yes'}, HTTP_HOST='localhost', secure=True,
+        )
+        self.assertEqual(response.status_code, 201)
+        conversation.refresh_from_db()
+        self.assertEqual((conversation.buyer_unread, conversation.preview), (1, 'Yes'))
+        outsider = APIClient()
+        outsider.force_authenticate(User.objects.create_user('outsider'))
+        path = f'/api/conversations/{conversation.pk}/messages/'
+        self.assertEqual(outsider.get(path, HTTP_HOST='localhost', secure=True).status_code, 404)
+
+
+@override_settings(MESSAGE_DELIVERY_BACKGROUND=False)
+class MessageDeliveryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.sender = User.objects.create_user('sender', 'sender@example.com')
+        self.receiver = User.objects.create_user('receiver', 'receiver@example.com')
+        self.item = Item.objects.create(seller=self.receiver, name='Lamp', description='-', category='decor', price=15)
+
+    def _enqueue(self):
+        message = Message.objects.create(sender=self.sender, receiver=self.receiver, item=self.item, content='Still available?')
+        message_delivery.enqueue(message)
+        return message
+
+    def test_failed_email_is_left_to_the_digest_not_retried(self):
+        message = self._enqueue()
+        with mock.patch.object(NotificationService, 'send_templated_email', side_effect=OSError('smtp down')) as send:
+            message_delivery.deliver_pending()
+            message_delivery.deliver_pending()
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(MessageDelivery.objects.get(message=message).status, 'delivered')
+        notification = Notification.objects.get(user=self.receiver)
+        self.assertEqual((notification.occurrences, notification.emailed_occurrences), (1, 0))
+
+    def test_sent_email_is_not_repeated_by_the_digest(self):
+        self._enqueue()
+        with mock.patch.object(NotificationService, 'send_email_notification', return_value=True):
+            message_delivery.deliver_pending()
+        self.assertEqual(Notification.objects.get(user=self.receiver).emailed_occurrences, 1)
+
+    def test_failure_before_commit_leaves_nothing_to_duplicate(self):
+        message = self._enqueue()
+        with mock.patch.object(NotificationService, 'notify_coalesced', side_effect=DatabaseError('boom')):
+            message_delivery.deliver_pending()
+        self.assertEqual(MessageDelivery.objects.get(message=message).status, 'failed')
+        self.assertFalse(Notification.objects.exists())
+        with mock.patch.object(NotificationService, 'send_email_notification', return_value=True):
+            message_delivery.deliver_pending()
+        self.assertEqual(MessageDelivery.objects.get(message=message).status, 'delivered')
+        self.assertEqual(Notification.objects.get(user=self.receiver).occurrences, 1)
+
+
+    @override_settings(MESSAGE_DELIVERY_MAX_ATTEMPTS=2)
+    def test_abandoned_claim_at_the_attempt_limit_is_marked_failed(self):
+        message = self._enqueue()
+        MessageDelivery.objects.filter(message=message).update(
+            status='processing', attempts=2, claimed_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(message_delivery.deliver_pending(), 0)
+        delivery = MessageDelivery.objects.get(message=message)
+        self.assertEqual((delivery.status, delivery.attempts), ('failed', 2))
+        self.assertTrue(delivery.last_error)
+
+    def test_abandoned_claim_with_attempts_left_is_retried(self):
+        message = self._enqueue()
+        MessageDelivery.objects.filter(message=message).update(
+            status='processing', attempts=1, claimed_at=timezone.now() - timedelta(hours=1)
+        )
+        with mock.patch.object(NotificationService, 'send_email_notification', return_value=True):
+            self.assertEqual(message_delivery.deliver_pending(), 1)
+        self.assertEqual(MessageDelivery.objects.get(message=message).status, 'delivered')
+
+
+class NotificationCoalescingTests(TestCase):
+    def setUp(self):
+        self.sender = User.objects.create_user('sender')
+        self.receiver = User.objects.create_user('receiver')
+        self.item = Item.objects.create(seller=self.receiver, name='Lamp', description='-', category='decor', price=15)
+
+    def _notify(self):
+        return NotificationService.notify_message_received(self.receiver, self.sender, self.item, 'Hi', send_email=False)
+
+    def test_repeats_fold_into_the_open_row(self):
+        first, created = self._notify()
+        self.assertTrue(created)
+        second, created = self._notify()
+        self.assertFalse(created)
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(Notification.objects.get().occurrences, 2)
+
+    def test_losing_a_concurrent_insert_folds_into_the_winner(self):
+        # Another request inserts the notification after our lookup has missed it
+        competitor, _ = self._notify()
+        select_for_update = Notification.objects.select_for_update
+        stale = [Notification.objects.none()]
+        with mock.patch.object(
+            Notification.objects, 'select_for_update', side_effect=lambda: stale.pop() if stale else select_for_update()
+        ):
+            notification, created = self._notify()
+        self.assertFalse(created)
+        self.assertEqual(notification.pk, competitor.pk)
+        self.assertEqual(list(Notification.objects.values_list('occurrences', flat=True)), [2])
+
+    def test_only_one_open_row_per_item(self):
+        self._notify()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notification.objects.create(
+                user=self.receiver, notification_type='message_received', title='-', message='-', related_item=self.item
+            )
+        Notification.objects.update(is_read=True)
+        _, created = self._notify()
+        self.assertTrue(created)
+
+
+@override_settings(CRON_SECRET='s3cret', MESSAGE_DELIVERY_BACKGROUND=False)
+class CronJobTests(TestCase):
+    def test_requires_the_cron_secret(self):
+        response = self.client.get('/api/cron/deliver-messages/', HTTP_HOST='localhost', secure=True)
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(
+            '/api/cron/deliver-messages/', HTTP_HOST='localhost', secure=True, HTTP_AUTHORIZATION='Bearer wrong'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_runs_the_delivery_command(self):
+        sender = User.objects.create_user('sender', 'sender@example.com')
+        receiver = User.objects.create_user('receiver', 'receiver@example.com')
+        item = Item.objects.create(seller=receiver, name='Lamp', description='-', category='decor', price=15)
+        message_delivery.enqueue(Message.objects.create(sender=sender, receiver=receiver, item=item, content='Hi'))
+        with mock.patch.object(NotificationService, 'send_email_notification', return_value=True):
+            response = self.client.get(
+                '/api/cron/deliver-messages/', HTTP_HOST='localhost', secure=True, HTTP_AUTHORIZATION='Bearer s3cret'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(MessageDelivery.objects.get().status, 'delivered')
+        self.assertTrue(Notification.objects.filter(user=receiver).exists())
+
+    def test_runs_the_digest_command(self):
+        receiver = User.objects.create_user('receiver', 'receiver@example.com')
+        item = Item.objects.create(seller=receiver, name='Lamp', description='-', category='decor', price=15)
+        notification = Notification.objects.create(
+            user=receiver, notification_type='price_drop', title='Price drop', message='-', related_item=item,
+            occurrences=1, emailed_occurrences=0,
+        )
+        Notification.objects.filter(pk=notification.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        response = self.client.get(
+            '/api/cron/send-digests/', HTTP_HOST='localhost', secure=True, HTTP_AUTHORIZATION='Bearer s3cret'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['receiver@example.com'])
+        notification.refresh_from_db()
+        self.assertEqual(notification.emailed_occurrences, 1)
@@ -0,0 +1,143 @@
+"""
+Buffered chat transcript persistence.
+
+Chatbot exchanges are queued in memory, partitioned by session, and written
+with a single ``bulk_create`` from a background thread, so answering a
+message no longer costs two INSERTs on the request path. Unflushed turns
+stay visible to ``history()`` until they reach the database. Flushes run
+one at a time; a failed batch is put back and retried, and while the
+database stays down the oldest turns beyond ``max_buffer`` are dropped.
+"""
+import atexit
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptWriter:
+    def __init__(self, batch_size=50, flush_interval=2.0, background=True, max_buffer=5000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.background = background
+        self.max_buffer = max_buffer
+        self._pending = {}  # session_id -> [unsaved ChatMessage]
+        self._inflight = []  # batch currently being written
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one flush at a time (timer, size trigger, atexit)
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def record(self, session_id, message_type, content):
+        """Queue one chat turn for persistence"""
+        message = ChatMessage(
+            session_id=session_id,
+            message_type=message_type,
+            content=content,
+            timestamp=timezone.now(),
+        )
+        with self._lock:
+            self._pending.setdefault(session_id, []).append(message)
+            self._pending_count += 1
+            full = self._pending_count >= self.batch_size
+        if not self.background:
+            self.flush()
+        else:
+            self._ensure_thread()
+            if full:
+                self._wakeup.set()
+        return message
+
+    async def arecord(self, session_id, message_type, content):
+        """record() for async callers; synchronous flushing is moved off the event loop"""
+        if self.background:
+            return self.record(session_id, message_type, content)
+        return await sync_to_async(self.record)(session_id, message_type, content)
+
+    def pending(self, session_id):
+        with self._lock:
+            inflight = [m for m in self._inflight if m.session_id == session_id and m.pk is None]
+            return inflight + self._pending.get(session_id, [])
+
+    def history(self, session_id):
+        """Stored and still-buffered turns for a session, oldest first"""
+        stored = list(ChatMessage.objects.filter(session_id=session_id).order_by('timestamp', 'id'))
+        return stored + self.pending(session_id)
+
+    def flush(self):
+        """Write every buffered turn in one bulk INSERT; returns the row count"""
+        with self._flush_lock:
+            with self._lock:
+                batch = [message for messages in self._pending.values() for message in messages]
+                self._pending = {}
+                self._pending_count = 0
+                self._inflight = batch
+            if not batch:
+                return 0
+            try:
+                ChatMessage.objects.bulk_create(batch, batch_size=500)
+            except Exception as e:
+                logger.error(f"Failed to persist {len(batch)} chat messages, will retry: {str(e)}")
+                self._requeue(batch)
+                return 0
+            with self._lock:
+                self._inflight = []
+            return len(batch)
+
+    def _requeue(self, batch):
+        # Failed turns go back in front of anything recorded meanwhile, keeping each session in order
+        with self._lock:
+            failed = {}
+            for message in batch:
+                message.pk = None
+                message._state.adding = True
+                failed.setdefault(message.session_id, []).append(message)
+            for session_id, messages in self._pending.items():
+                failed.setdefault(session_id, []).extend(messages)
+            self._pending_count += len(batch)
+            self._inflight = []
+            overflow = self._pending_count - self.max_buffer
+            if overflow > 0:
+                queued = sorted((m for messages in failed.values() for m in messages), key=lambda m: m.timestamp)
+                dropped = {id(m) for m in queued[:overflow]}
+                for session_id in list(failed):
+                    failed[session_id] = [m for m in failed[session_id] if id(m) not in dropped]
+                    if not failed[session_id]:
+                        del failed[session_id]
+                self._pending_count -= overflow
+                logger.warning(f"Chat transcript buffer full, dropped the {overflow} oldest unsaved messages")
+            self._pending = failed
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='chat-transcript-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            # Don't hold a connection open between flushes (serverless pool limits)
+            connection.close()
+
+
+transcript_writer = TranscriptWriter(
+    batch_size=getattr(settings, 'CHAT_TRANSCRIPT_BATCH_SIZE', 50),
+    flush_interval=getattr(settings, 'CHAT_TRANSCRIPT_FLUSH_INTERVAL', 2.0),
+    background=getattr(settings, 'CHAT_TRANSCRIPT_BACKGROUND', True),
+    max_buffer=getattr(settings, 'CHAT_TRANSCRIPT_MAX_BUFFER', 5000),
+)
+atexit.register(transcript_writer.flush)
@@ -8,6 +8,8 @@ urlpatterns = [
     path('login/', views.user_login, name='user_login'),
     path('logout/', views.user_logout, name='user_logout'),
     path('profile/', views.profile, name='profile'),
+    path('profile/listings/', views.profile_listings, name='profile_listings'),
+    path('profile/inbox/', views.profile_inbox, name='profile_inbox'),
     path('items/', views.item_list, name='item_list'),
     path('items/<int:item_id>/', views.item_detail, name='item_detail'),
     path('items/create/', views.item_create, name='item_create'),
@@ -31,8 +33,9 @@ urlpatterns = [
     path('payment/create-intent/<int:order_id>/', payment_views.create_payment_intent, name='create_payment_intent'),
     path('payment/create-razorpay-order/<int:order_id>/', payment_views.create_razorpay_order, name='create_razorpay_order'),
     path('payment/process-cod/<int:order_id>/', payment_views.process_cod_payment, name='process_cod_payment'),
-    path('payment/webhook/stripe/', payment_views.stripe_webhook, name='stripe_webhook'),
-    path('payment/webhook/razorpay/', payment_views.razorpay_webhook, name='razorpay_webhook'),
+    path('payment/webhook/stripe/', payment_views.payment_webhook, {'provider_name': 'stripe'}, name='stripe_webhook'),
+    path('payment/webhook/razorpay/', payment_views.payment_webhook, {'provider_name': 'razorpay'}, name='razorpay_webhook'),
+    path('payment/webhook/<str:provider_name>/', payment_views.payment_webhook, name='payment_webhook'),
     path('payment/history/', payment_views.payment_history, name='payment_history'),
     path('payment/refund/<int:payment_id>/', payment_views.refund_payment, name='refund_payment'),
     
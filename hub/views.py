@@ -6,10 +6,13 @@ from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse, JsonResponse
 from .models import Item, Message, Cart, CartItem, Order, OrderItem, Notification, Review, ChatMessage
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models import Q
 from django.conf import settings
-from .services import NotificationService
-from .chatbot import EduCycleChatbot
+from .services import CheckoutService, NotificationService, PlatformStatsService, ProfileStatsService
+from . import messaging
+from .chatbot import get_chatbot
+from asgiref.sync import sync_to_async
 import uuid
 
 # Create your views here.
@@ -26,7 +29,10 @@ def home(request):
         )
     if category:
         items = items.filter(category=category)
-    return render(request, 'hub/item_list.html', {'items': items})
+    return render(request, 'hub/item_list.html', {
+        'items': items,
+        'platform_stats': PlatformStatsService.get_stats(),
+    })
 
 def register(request):
     if request.method == 'POST':
@@ -107,7 +113,7 @@ def item_list(request):
         'category_filter': category_filter
     })
 
-def search_suggestions(request):
+async def search_suggestions(request):
     """AJAX endpoint for search suggestions"""
     query = request.GET.get('q', '').strip()
     if len(query) < 2:
@@ -123,7 +129,7 @@ def search_suggestions(request):
         Q(category__icontains=query)
     ).values('name', 'category').distinct()[:10]
     
-    for item in items:
+    async for item in items:
         suggestions.append({
             'text': item['name'],
             'category': item['category']
@@ -134,7 +140,7 @@ def search_suggestions(request):
         category__icontains=query
     ).values_list('category', flat=True).distinct()[:5]
     
-    for category in categories:
+    async for category in categories:
         suggestions.append({
             'text': f"Category: {category}",
             'category': category
@@ -185,38 +191,77 @@ def item_detail(request, item_id):
 def send_message(request, item_id):
     try:
         item = Item.objects.get(id=item_id)
+        # Replies from the profile inbox name the conversation they belong to
+        conversation = None
+        conversation_id = request.POST.get('conversation') or request.GET.get('conversation')
+        if conversation_id and conversation_id.isdigit():
+            conversation = messaging.inbox(request.user).filter(pk=conversation_id, item=item).first()
+            if conversation:
+                conversation.other = conversation.other_participant(request.user)
         if request.method == 'POST':
             content = request.POST.get('content')
             if content and len(content.strip()) > 0:
-                message_obj = Message.objects.create(
-                    sender=request.user,
-                    receiver=item.seller,
-                    item=item,
-                    content=content.strip()
-                )
-                
-                # Send notification to seller
-                NotificationService.notify_message_received(
-                    receiver=item.seller,
-                    sender=request.user,
-                    item=item,
-                    message_content=content.strip()
-                )
-                
-                messages.success(request, 'Message sent to the seller!')
+                if conversation is None and item.seller_id == request.user.pk:
+                    messages.error(request, 'You cannot message yourself.')
+                    return redirect('item_detail', item_id=item.id)
+                # The receiver's notification and email are sent by the delivery worker
+                messaging.send_message(request.user, item, content.strip(), conversation=conversation)
+                receiver = conversation.other if conversation else item.seller
+
+                messages.success(request, f'Message sent to {receiver.username}!')
+                if conversation:
+                    return redirect('profile')
                 return redirect('item_detail', item_id=item.id)
             else:
                 messages.error(request, 'Message content cannot be empty.')
-        return render(request, 'hub/send_message.html', {'item': item})
+        return render(request, 'hub/send_message.html', {'item': item, 'conversation': conversation})
     except Item.DoesNotExist:
         messages.error(request, 'Item not found.')
         return redirect('item_list')
 
+PROFILE_LISTINGS_PAGE_SIZE = 12
+PROFILE_INBOX_PAGE_SIZE = 10
+
+def _page_number(request, name='page'):
+    try:
+        return max(int(request.GET.get(name, 1)), 1)
+    except ValueError:
+        return 1
+
+def _page(queryset, page, size):
+    """One page without a COUNT(*): one extra row tells whether another page follows"""
+    rows = list(queryset[(page - 1) * size:page * size + 1])
+    return rows[:size], (page + 1 if len(rows) > size else None)
+
+def _profile_listings(request, page):
+    items, next_page = _page(
+        Item.objects.filter(seller=request.user).order_by('-created_at', '-pk'), page, PROFILE_LISTINGS_PAGE_SIZE
+    )
+    return {'user_items': items, 'listings_page': page, 'next_listings_page': next_page}
+
+def _profile_inbox(request, page):
+    conversations, next_page = _page(messaging.inbox(request.user), page, PROFILE_INBOX_PAGE_SIZE)
+    for conversation in conversations:
+        conversation.other = conversation.other_participant(request.user)
+        conversation.unread = conversation.unread_for(request.user)
+    return {'conversations': conversations, 'inbox_page': page, 'next_inbox_page': next_page}
+
 @login_required
 def profile(request):
-    user_items = Item.objects.filter(seller=request.user).order_by('-created_at')
-    received_messages = Message.objects.filter(receiver=request.user).order_by('-timestamp')
-    return render(request, 'hub/profile.html', {'user_items': user_items, 'received_messages': received_messages})
+    context = {'stats': ProfileStatsService.get(request.user.pk)}
+    context.update(_profile_listings(request, _page_number(request, 'listings_page')))
+    context.update(_profile_inbox(request, _page_number(request, 'inbox_page')))
+    return render(request, 'hub/profile.html', context)
+
+@login_required
+def profile_listings(request):
+    """Next page of the profile's listings, as an HTML fragment"""
+    return render(request, 'hub/partials/profile_listings.html', _profile_listings(request, _page_number(request)))
+
+@login_required
+def profile_inbox(request):
+    """Next page of the profile's conversations, as an HTML fragment"""
+    return render(request, 'hub/partials/profile_inbox.html', _profile_inbox(request, _page_number(request)))
 
 @login_required
 def item_edit(request, item_id):
@@ -337,65 +382,34 @@ def checkout(request):
             })
         
         try:
-            # Create orders for each seller
-            seller_orders = {}
+            seller_orders = CheckoutService.place_orders(request.user, cart, shipping_address, payment_method)
             
-            for cart_item in cart_items:
-                seller = cart_item.item.seller
-                if seller not in seller_orders:
-                    seller_orders[seller] = {
-                        'order': Order.objects.create(
-                            buyer=request.user,
-                            seller=seller,
-                            total_amount=0,
-                            shipping_address=shipping_address,
-                            payment_method=payment_method
-                        ),
-                        'items': []
-                    }
-                
-                # Create order item
-                order_item = OrderItem.objects.create(
-                    order=seller_orders[seller]['order'],
-                    item=cart_item.item,
-                    quantity=cart_item.quantity,
-                    price_at_time=cart_item.item.price or 0
-                )
-                
-                seller_orders[seller]['items'].append(order_item)
-                seller_orders[seller]['order'].total_amount += order_item.get_total_price()
-                seller_orders[seller]['order'].save()
+            # Send notifications for each order
+            for order, order_items in seller_orders:
+                for order_item in order_items:
+                    # Notify seller
+                    NotificationService.notify_item_sold(
+                        seller=order_item.item.seller,
+                        buyer=request.user,
+                        item=order_item.item,
+                        order=order
+                    )
+                    
+                    # Notify buyer
+                    NotificationService.notify_item_purchased(
+                        buyer=request.user,
+                        seller=order_item.item.seller,
+                        item=order_item.item,
+                        order=order
+                    )
             
-                            # Clear the cart
-                cart.cartitem_set.all().delete()
-                
-                # Send notifications for each order
-                for order_data in seller_orders.values():
-                    order = order_data['order']
-                    for order_item in order.orderitem_set.all():
-                        # Notify seller
-                        NotificationService.notify_item_sold(
-                            seller=order_item.item.seller,
-                            buyer=request.user,
-                            item=order_item.item,
-                            order=order
-                        )
-                        
-                        # Notify buyer
-                        NotificationService.notify_item_purchased(
-                            buyer=request.user,
-                            seller=order_item.item.seller,
-                            item=order_item.item,
-                            order=order
-                        )
-                
-                # Redirect to payment for the first order
-                if seller_orders:
-                    first_order = list(seller_orders.values())[0]['order']
-                    return redirect('payment_page', order_id=first_order.id)
-                else:
-                    messages.success(request, 'Order placed successfully! You will receive confirmation emails.')
-                    return redirect('orders')
+            # Redirect to payment for the first order
+            if seller_orders:
+                first_order = seller_orders[0][0]
+                return redirect('payment_page', order_id=first_order.id)
+            else:
+                messages.success(request, 'Order placed successfully! You will receive confirmation emails.')
+                return redirect('orders')
             
         except Exception as e:
             messages.error(request, f'Error processing order: {str(e)}')
@@ -447,11 +461,10 @@ def payment_page(request, order_id):
     """Display payment page for an order"""
     try:
         order = Order.objects.get(id=order_id, buyer=request.user)
-        total_amount = sum(item.get_total_price() for item in order.orderitem_set.all())
         
         return render(request, 'hub/payment.html', {
             'order': order,
-            'total_amount': total_amount,
+            'total_amount': order.total_amount,
             'stripe_public_key': settings.STRIPE_PUBLISHABLE_KEY,
         })
     except Order.DoesNotExist:
@@ -581,9 +594,10 @@ def notifications(request):
     return render(request, 'hub/notifications.html', {'notifications': notifications})
 
 @login_required
-def mark_notification_read(request, notification_id):
+async def mark_notification_read(request, notification_id):
     """Mark a notification as read"""
-    if NotificationService.mark_notification_read(notification_id, request.user):
+    user = await request.auser()
+    if await NotificationService.amark_notification_read(notification_id, user):
         return JsonResponse({'success': True})
     return JsonResponse({'success': False})
 
@@ -594,7 +608,7 @@ def mark_all_notifications_read(request):
     return JsonResponse({'success': True})
 
 # Chatbot Views
-def chatbot(request):
+async def chatbot(request):
     """Enhanced chatbot interface"""
     if request.method == 'POST':
         message = request.POST.get('message', '').strip()
@@ -602,8 +616,8 @@ def chatbot(request):
         
         if message:
             try:
-                chatbot = EduCycleChatbot()
-                response = chatbot.get_response(message, session_id)
+                chatbot = get_chatbot()
+                response = await chatbot.aget_response(message, session_id)
                 return JsonResponse({
                     'response': response,
                     'session_id': session_id,
@@ -623,9 +637,12 @@ def chatbot(request):
                 'success': False
             })
     
-    # For GET request, return the chatbot page
+    # For GET request, return the chatbot page (templates read the session synchronously)
+    return await sync_to_async(_render_chatbot_page)(request)
+
+def _render_chatbot_page(request):
     try:
-        chatbot = EduCycleChatbot()
+        chatbot = get_chatbot()
         suggested_questions = chatbot.get_suggested_questions()
         welcome_message = chatbot.get_welcome_message()
         quick_stats = chatbot.get_quick_stats()
@@ -650,7 +667,7 @@ def chatbot(request):
 
 def get_chat_history(request, session_id):
     """Get chat history for a session"""
-    chatbot = EduCycleChatbot()
+    chatbot = get_chatbot()
     history = chatbot.get_conversation_history(session_id)
     
     messages = []
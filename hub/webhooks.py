@@ -0,0 +1,123 @@
+"""
+Idempotent payment webhook processing.
+
+Webhook endpoints only verify the signature and store the delivery as a
+``WebhookEvent``; the unique (provider, event_id) constraint turns provider
+retries into no-ops. Events are applied later by a background worker (or
+the ``process_webhook_events`` command), each inside one transaction that
+locks the order, so a payment is recorded and announced exactly once.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Order, Payment, WebhookEvent
+from .providers import payment_providers
+from .services import NotificationService
+from .workers import QueueWorker
+
+logger = logging.getLogger(__name__)
+
+
+def record_event(provider, event_id, event_type, payload):
+    """Store a delivery; returns (event, created), created is False for retries"""
+    return WebhookEvent.objects.get_or_create(
+        provider=provider,
+        event_id=event_id,
+        defaults={'event_type': event_type, 'payload': payload},
+    )
+
+
+def _notify_order_paid(order):
+    for order_item in order.orderitem_set.select_related('item__seller'):
+        NotificationService.notify_item_sold(
+            seller=order_item.item.seller,
+            buyer=order.buyer,
+            item=order_item.item,
+            order=order
+        )
+        NotificationService.notify_item_purchased(
+            buyer=order.buyer,
+            seller=order_item.item.seller,
+            item=order_item.item,
+            order=order
+        )
+
+
+def apply_payment(provider, order_id, lookup, amount, currency, status):
+    """Move the order's payment for ``lookup`` to ``status``; returns True if anything changed.
+
+    Provider ``handle_event`` implementations call this inside the event's transaction.
+    """
+    order = Order.objects.select_for_update().select_related('buyer').get(id=order_id)
+    payment, created = Payment.objects.get_or_create(
+        order=order,
+        **lookup,
+        defaults={'provider': provider, 'amount': amount, 'currency': currency, 'status': status},
+    )
+    if not created:
+        # Never downgrade a completed payment, and don't repeat a transition
+        if payment.status == status or payment.status in ('completed', 'refunded'):
+            return False
+        payment.status = status
+        payment.save(update_fields=['status', 'updated_at'])
+
+    if status == 'completed':
+        order.status = 'confirmed'
+        order.save(update_fields=['status', 'updated_at'])
+        transaction.on_commit(lambda: _notify_order_paid(order))
+    return True
+
+
+def process_event(event_pk):
+    """Apply one stored event exactly once; returns its final status"""
+    try:
+        with transaction.atomic():
+            event = WebhookEvent.objects.select_for_update().get(pk=event_pk)
+            if event.status in ('processed', 'ignored'):
+                return event.status
+            event.attempts += 1
+            handled = payment_providers.get(event.provider).handle_event(event.event_type, event.payload)
+            event.status = 'processed' if handled else 'ignored'
+            event.last_error = ''
+            event.processed_at = timezone.now()
+            event.save(update_fields=['status', 'attempts', 'last_error', 'processed_at'])
+            return event.status
+    except Exception as e:
+        # The handler's writes were rolled back; record the failure for a retry
+        logger.error(f"Webhook event {event_pk} failed: {str(e)}")
+        # A concurrent worker may have applied it meanwhile; never mark that failed
+        WebhookEvent.objects.filter(pk=event_pk).exclude(status__in=('processed', 'ignored')).update(
+            status='failed', attempts=F('attempts') + 1, last_error=str(e)[:2000]
+        )
+        return 'failed'
+
+
+def process_pending(limit=100, retry_failed=True):
+    """Process queued (and retryable failed) events, oldest first; returns the number handled"""
+    max_attempts = getattr(settings, 'WEBHOOK_MAX_ATTEMPTS', 5)
+    statuses = ['pending', 'failed'] if retry_failed else ['pending']
+    pending = list(
+        WebhookEvent.objects.filter(status__in=statuses, attempts__lt=max_attempts)
+        .order_by('received_at')
+        .values_list('pk', flat=True)[:limit]
+    )
+    for event_pk in pending:
+        process_event(event_pk)
+    return len(pending)
+
+
+webhook_worker = QueueWorker('webhook-worker', process_pending)
+
+
+def dispatch(event, created):
+    """Schedule a freshly stored event; retries of known events need nothing"""
+    if not created:
+        return
+    if getattr(settings, 'WEBHOOK_BACKGROUND', True):
+        transaction.on_commit(webhook_worker.notify)
+    else:
+        process_event(event.pk)
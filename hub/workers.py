@@ -0,0 +1,56 @@
+"""
+In-process background queue workers.
+
+A ``QueueWorker`` owns one daemon thread that drains a database-backed
+queue: ``notify()`` (usually from ``transaction.on_commit``) wakes it for
+fresh rows, and an idle poll every ``poll_interval`` seconds also retries
+failed ones. The queue itself lives in the database, so rows a dying
+process never reached are picked up by the next worker or by the queue's
+management command.
+"""
+import logging
+import threading
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueueWorker:
+    """``process(retry_failed=...)`` handles one batch and returns how many rows it took"""
+
+    def __init__(self, name, process, poll_interval=5.0):
+        self.name = name
+        self.process = process
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def notify(self):
+        self._ensure_thread()
+        self._wakeup.set()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            woken = self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                # Failed rows are retried on the idle poll, not in a tight loop
+                if not woken:
+                    self.process()
+                while self.process(retry_failed=False):
+                    pass
+            except Exception as e:
+                logger.error(f"{self.name} error: {str(e)}")
+            finally:
+                connection.close()